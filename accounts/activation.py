@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core import signing
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import User
+
+ACTIVATION_SALT = 'accounts.activation'
+DEFAULT_MAX_AGE = 60 * 60 * 24 * 7
+
+
+def _max_age():
+    return getattr(settings, 'ACCOUNT_ACTIVATION_MAX_AGE', DEFAULT_MAX_AGE)
+
+
+def make_activation_token(user):
+    """
+    Returns a signed, timestamped token for activating `user`. Nothing is
+    stored: the signature proves we issued it and the timestamp bounds its
+    age. Accounts created without a password (bulk imports) are flagged so
+    activation can send them on to choose one.
+    """
+    payload = {'u': user.pk}
+    if not user.has_usable_password():
+        payload['p'] = 1
+    return signing.dumps(payload, salt=ACTIVATION_SALT, compress=True)
+
+
+def read_activation_token(token):
+    """
+    Returns (user_id, needs_password) for a valid token, or None if it is
+    tampered with or older than settings.ACCOUNT_ACTIVATION_MAX_AGE.
+    """
+    try:
+        payload = signing.loads(token, salt=ACTIVATION_SALT, max_age=_max_age())
+    except signing.BadSignature:
+        return None
+    return payload['u'], bool(payload.get('p'))
+
+
+def activation_url(user, base_url=None):
+    """Absolute activation link for `user`."""
+    base_url = base_url or getattr(settings, 'SITE_URL', '')
+    return base_url.rstrip('/') + reverse('activate', args=[make_activation_token(user)])
+
+
+def activate_user(user_id):
+    """
+    Activates an account with a single primary-key UPDATE. Returns False if
+    it was already active or is gone. Accounts that have logged in before
+    were deactivated on purpose, so an old link can't reactivate them.
+    """
+    return User.objects.filter(pk=user_id, is_active=False, last_login__isnull=True).update(is_active=True) == 1
+
+
+def pending_activation_users():
+    """Participant accounts that were created but never activated."""
+    return User.objects.filter(is_active=False, is_staff=False, last_login__isnull=True)
+
+
+def build_activation_email(user, base_url=None, connection=None):
+    """Renders the activation email for `user` without sending it."""
+    context = {
+        'user': user,
+        'activation_link': activation_url(user, base_url),
+        'needs_password': not user.has_usable_password(),
+        'valid_days': max(1, _max_age() // (60 * 60 * 24)),
+    }
+    subject = render_to_string('accounts/emails/activation_subject.txt', context).strip()
+    body = render_to_string('accounts/emails/activation_body.txt', context)
+    return EmailMessage(subject, body, to=[user.email], connection=connection)
+
+
+def send_activation_email(user, base_url=None):
+    """Sends one activation email. Mail failures are swallowed so sign-up still succeeds."""
+    return build_activation_email(user, base_url, get_connection(fail_silently=True)).send()
+
+
+def send_activation_emails(users, base_url=None, batch_size=200, progress=None):
+    """
+    Renders and sends activation emails for `users` in batches over a single
+    reused mail connection. Only the columns the email needs are loaded, and
+    the queryset is streamed, so memory stays flat however many are pending.
+    Returns the number of emails sent.
+    """
+    users = users.exclude(email='').only('pk', 'email', 'first_name', 'password').order_by('pk')
+    sent = 0
+    with get_connection() as connection:
+        batch = []
+        for user in users.iterator(chunk_size=batch_size):
+            batch.append(build_activation_email(user, base_url, connection))
+            if len(batch) >= batch_size:
+                sent += connection.send_messages(batch) or 0
+                batch = []
+                if progress:
+                    progress(sent)
+        if batch:
+            sent += connection.send_messages(batch) or 0
+    return sent
+
+
+def set_password_url(user):
+    """Password-setting link (the password reset confirm page) for an account without a password."""
+    uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+    return reverse('password_reset_confirm', args=[uidb64, default_token_generator.make_token(user)])
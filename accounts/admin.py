@@ -1,8 +1,16 @@
-from django.contrib import admin
+import csv
+import io
+
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.shortcuts import redirect, render
+from django.urls import path
 from django.contrib.auth.models import Group # Import Group
-from .models import User, UserProfile, RegistrationCode, EventRegistration, ParticipantRegistrationLog
-from import_export.admin import ImportExportModelAdmin
+from .models import User, UserProfile, RegistrationCode, EventRegistration, ParticipantRegistrationLog, RegistrationLogDailyCount
+from campusinnovate.chunked_import_export import ChunkedImportExportModelAdmin
+from .forms import ParticipantImportForm
+from .importer import import_participants
+from .resources import RegistrationCodeResource
 
 # --- Inlines ---
 class UserProfileInline(admin.StackedInline):
@@ -20,13 +28,37 @@ class CustomUserAdmin(BaseUserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'get_groups')
     list_filter = ('is_staff', 'is_active', 'groups') 
 
+    change_list_template = 'admin/accounts/user/change_list.html'
+
     @admin.display(description='Roles')
     def get_groups(self, obj):
         return ", ".join([g.name for g in obj.groups.all()])
 
+    def get_urls(self):
+        custom = [path('import-participants/', self.admin_site.admin_view(self.import_participants_view), name='accounts_user_import_participants')]
+        return custom + super().get_urls()
+
+    def import_participants_view(self, request):
+        """Bulk-creates participants from an uploaded CSV (see accounts.importer)."""
+        if not self.has_add_permission(request):
+            return redirect('admin:accounts_user_changelist')
+        form = ParticipantImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            rows = csv.DictReader(io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig'))
+            result = import_participants(rows, event=form.cleaned_data['event'])
+            messages.success(request, f"Imported {len(result.created)} participant(s); {len(result.rejected)} row(s) rejected.")
+            for line, email, reason in result.rejected[:20]:
+                messages.warning(request, f"Line {line} ({email or 'no email'}): {reason}")
+            if len(result.rejected) > 20:
+                messages.warning(request, f"...and {len(result.rejected) - 20} more rejected row(s).")
+            return redirect('admin:accounts_user_changelist')
+        context = {**self.admin_site.each_context(request), 'opts': self.model._meta, 'form': form, 'title': 'Import participants'}
+        return render(request, 'admin/accounts/user/import_participants.html', context)
+
 # --- Registration Code Admin ---
 @admin.register(RegistrationCode)
-class RegistrationCodeAdmin(ImportExportModelAdmin):
+class RegistrationCodeAdmin(ChunkedImportExportModelAdmin):
+    resource_classes = [RegistrationCodeResource]
     list_display = ('code', 'event', 'is_active', 'uses_count', 'max_uses', 'expires_at', 'created_by')
     list_filter = ('is_active', 'event', 'created_at')
     search_fields = ('code', 'event__event_name', 'created_by__username')
@@ -55,3 +87,15 @@ class RegistrationLogAdmin(admin.ModelAdmin):
     def has_add_permission(self, request): return False
     def has_change_permission(self, request, obj=None): return False
     def has_delete_permission(self, request, obj=None): return False
+
+# --- Registration Log Rollup Admin ---
+@admin.register(RegistrationLogDailyCount)
+class RegistrationLogDailyCountAdmin(admin.ModelAdmin):
+    list_display = ('day', 'code_used', 'ip_address', 'status', 'attempts')
+    list_filter = ('status', 'day')
+    search_fields = ('code_used', 'ip_address')
+
+    # Rollups are written by the compact_registration_logs command only
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+    def has_delete_permission(self, request, obj=None): return False
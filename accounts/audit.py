@@ -0,0 +1,134 @@
+import atexit
+from datetime import datetime, time as datetime_time, timedelta
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ParticipantRegistrationLog, RegistrationLogDailyCount
+
+logger = logging.getLogger(__name__)
+
+
+class RegistrationLogBuffer:
+    """
+    Collects ParticipantRegistrationLog rows in memory and writes them with
+    a single bulk_create once `max_size` rows are queued or the oldest one
+    is `max_age` seconds old. A background thread flushes idle buffers and
+    an atexit hook flushes whatever is left when the process shuts down.
+
+    Configure with settings.REGISTRATION_LOG_BUFFER = {'MAX_SIZE': ..., 'MAX_AGE': ...}.
+    A MAX_SIZE of 1 writes every row immediately.
+    """
+
+    def __init__(self, max_size=100, max_age=5.0):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._rows = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def add(self, **fields):
+        fields.setdefault('timestamp', timezone.now())
+        if fields.get('reason'):
+            # One oversized value would otherwise fail the whole batch.
+            fields['reason'] = fields['reason'][:255]
+        with self._lock:
+            self._rows.append(ParticipantRegistrationLog(**fields))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = len(self._rows) >= self.max_size or time.monotonic() - self._oldest >= self.max_age
+        if due:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def flush(self):
+        """Writes all queued rows. Returns the number written."""
+        with self._lock:
+            rows, self._rows, self._oldest = self._rows, [], None
+        if not rows:
+            return 0
+        try:
+            ParticipantRegistrationLog.objects.bulk_create(rows, batch_size=500)
+        except Exception:
+            # The audit log must never take a sign-up request down with it.
+            logger.exception("Dropped %d registration log rows", len(rows))
+            return 0
+        return len(rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            with self._lock:
+                if self._flusher is None or not self._flusher.is_alive():
+                    self._flusher = threading.Thread(target=self._flush_periodically, name='registration-log-flusher', daemon=True)
+                    self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.max_age)
+            if self._rows:
+                self.flush()
+                connection.close() # Connections are per-thread; don't leak this one.
+
+
+_options = getattr(settings, 'REGISTRATION_LOG_BUFFER', {})
+registration_log = RegistrationLogBuffer(
+    max_size=_options.get('MAX_SIZE', 100),
+    max_age=_options.get('MAX_AGE', 5.0),
+)
+atexit.register(registration_log.flush)
+
+
+def log_registration_attempt(**fields):
+    """Queues one ParticipantRegistrationLog row (see RegistrationLogBuffer)."""
+    registration_log.add(**fields)
+
+
+def compact_registration_logs(before, batch_size=5000):
+    """
+    Folds ParticipantRegistrationLog rows older than `before` into
+    RegistrationLogDailyCount rows, one day per transaction, then deletes
+    them. Returns (rows compacted, days processed).
+    """
+    old_logs = ParticipantRegistrationLog.objects.filter(timestamp__lt=before)
+    days = old_logs.annotate(day=TruncDate('timestamp')).values_list('day', flat=True).distinct().order_by('day')
+    compacted = processed_days = 0
+
+    for day in list(days):
+        day_start = timezone.make_aware(datetime.combine(day, datetime_time.min))
+        day_logs = old_logs.filter(timestamp__gte=day_start, timestamp__lt=day_start + timedelta(days=1))
+        with transaction.atomic():
+            groups = day_logs.values('code_used', 'ip_address', 'status').annotate(attempts=Count('id'))
+            existing = {
+                (row.code_used, row.ip_address, row.status): row
+                for row in RegistrationLogDailyCount.objects.select_for_update().filter(day=day)
+            }
+            to_create, to_update = [], []
+            for group in groups:
+                key = (group['code_used'], group['ip_address'], group['status'])
+                if key in existing:
+                    existing[key].attempts += group['attempts']
+                    to_update.append(existing[key])
+                else:
+                    to_create.append(RegistrationLogDailyCount(day=day, **group))
+            RegistrationLogDailyCount.objects.bulk_create(to_create, batch_size=500)
+            RegistrationLogDailyCount.objects.bulk_update(to_update, ['attempts'], batch_size=500)
+
+            while True:
+                ids = list(day_logs.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                deleted, _ = ParticipantRegistrationLog.objects.filter(pk__in=ids).delete()
+                compacted += deleted
+        processed_days += 1
+    return compacted, processed_days
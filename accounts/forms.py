@@ -1,5 +1,6 @@
 from django import forms
 from .models import User
+from events.models import Event
 from django.core.exceptions import ValidationError
 
 class ParticipantRegistrationForm(forms.ModelForm):
@@ -39,3 +40,9 @@ class ParticipantRegistrationForm(forms.ModelForm):
         if password and password_confirm and password != password_confirm:
             raise ValidationError("Passwords do not match.")
         return password_confirm
+
+
+class ParticipantImportForm(forms.Form):
+    """Admin form for bulk-importing participants from a registrar CSV."""
+    csv_file = forms.FileField(label="CSV file", help_text="Columns: email, first_name, last_name, student_roll_number, branch, year_of_study")
+    event = forms.ModelChoiceField(queryset=Event.objects.all(), required=False, help_text="Optionally register everyone for this event.")
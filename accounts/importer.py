@@ -0,0 +1,122 @@
+import secrets
+from itertools import islice
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from events.stats import bump_event_stats
+from .models import User, UserProfile, EventRegistration
+
+IMPORT_COLUMNS = ('email', 'first_name', 'last_name', 'student_roll_number', 'branch', 'year_of_study')
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = []   # (user_id, email) for every account created
+        self.rejected = []  # (line number, email, reason) for every skipped row
+
+    def reject(self, line, email, reason):
+        self.rejected.append((line, email, reason))
+
+
+def _clean_row(row):
+    """Normalizes one CSV row. Raises ValueError with the reason it can't be imported."""
+    data = {column: (row.get(column) or '').strip() for column in IMPORT_COLUMNS}
+    data['email'] = data['email'].lower()
+    try:
+        validate_email(data['email'])
+    except ValidationError:
+        raise ValueError("Invalid email address")
+    if not data['student_roll_number']:
+        raise ValueError("Missing roll number")
+    if len(data['student_roll_number']) > 20:
+        raise ValueError("Roll number is too long")
+    if data['year_of_study']:
+        try:
+            data['year_of_study'] = int(data['year_of_study'])
+        except ValueError:
+            raise ValueError("Year of study must be a number")
+    else:
+        data['year_of_study'] = None
+    return data
+
+
+def _import_chunk(chunk, event, result, seen_emails, seen_rolls):
+    rows = []
+    for line, raw in chunk:
+        try:
+            data = _clean_row(raw)
+        except ValueError as e:
+            result.reject(line, (raw.get('email') or '').strip(), str(e))
+            continue
+        if data['email'] in seen_emails:
+            result.reject(line, data['email'], "Duplicate email in file")
+        elif data['student_roll_number'] in seen_rolls:
+            result.reject(line, data['email'], "Duplicate roll number in file")
+        else:
+            seen_emails.add(data['email'])
+            seen_rolls.add(data['student_roll_number'])
+            rows.append((line, data))
+
+    # One query each for clashes with accounts that already exist.
+    emails = [data['email'] for _, data in rows]
+    rolls = [data['student_roll_number'] for _, data in rows]
+    taken_emails = set(User.objects.filter(username__in=emails).values_list('username', flat=True))
+    taken_emails |= set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    taken_rolls = set(UserProfile.objects.filter(student_roll_number__in=rolls).values_list('student_roll_number', flat=True))
+
+    accepted = []
+    for line, data in rows:
+        if data['email'] in taken_emails:
+            result.reject(line, data['email'], "An account with this email already exists")
+        elif data['student_roll_number'] in taken_rolls:
+            result.reject(line, data['email'], "Roll number is already registered")
+        else:
+            accepted.append(data)
+    if not accepted:
+        return
+
+    with transaction.atomic():
+        # Same format as set_unusable_password(), minus its per-character random.choice() loop.
+        User.objects.bulk_create([
+            User(username=data['email'], email=data['email'], first_name=data['first_name'][:150],
+                 last_name=data['last_name'][:150], password=UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(30), is_staff=False, is_active=False)
+            for data in accepted
+        ])
+        # Not every backend returns ids from bulk_create, so read them back in one query.
+        user_ids = dict(User.objects.filter(username__in=[data['email'] for data in accepted]).values_list('username', 'pk'))
+        UserProfile.objects.bulk_create([
+            UserProfile(user_id=user_ids[data['email']], student_roll_number=data['student_roll_number'],
+                        branch=data['branch'][:50] or None, year_of_study=data['year_of_study'])
+            for data in accepted
+        ])
+        if event is not None:
+            EventRegistration.objects.bulk_create([
+                EventRegistration(participant_id=user_ids[data['email']], event=event) for data in accepted
+            ])
+            bump_event_stats(event.pk, registrations_registered=len(accepted))
+
+    result.created.extend((user_ids[data['email']], data['email']) for data in accepted)
+
+
+def import_participants(rows, event=None, chunk_size=1000, progress=None):
+    """
+    Creates inactive participant accounts (User + UserProfile, plus an
+    EventRegistration if `event` is given) from an iterable of CSV dict
+    rows, `chunk_size` rows per transaction. Rows that are invalid or clash
+    with existing or earlier rows are reported in the result instead of
+    aborting the import. `progress(result)` is called after each chunk.
+    """
+    result = ImportResult()
+    seen_emails, seen_rolls = set(), set()
+    numbered = enumerate(rows, start=2) # Line 1 is the CSV header
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+        _import_chunk(chunk, event, result, seen_emails, seen_rolls)
+        if progress:
+            progress(result)
+    return result
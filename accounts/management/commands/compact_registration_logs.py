@@ -0,0 +1,20 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.audit import compact_registration_logs
+
+
+class Command(BaseCommand):
+    help = "Rolls registration log rows older than --days up into daily per-code/per-IP counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="Keep this many days of raw rows (default: 30).")
+
+    def handle(self, *args, **options):
+        # Cut on a day boundary so no day is split between raw rows and rollups.
+        cutoff_day = timezone.localdate() - timedelta(days=options['days'])
+        before = timezone.make_aware(datetime.combine(cutoff_day, time.min))
+        rows, days = compact_registration_logs(before)
+        self.stdout.write(self.style.SUCCESS(f"Compacted {rows} log row(s) across {days} day(s) before {cutoff_day}."))
@@ -0,0 +1,63 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.activation import activation_url
+from accounts.importer import IMPORT_COLUMNS, import_participants
+from accounts.models import User
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-creates inactive participant accounts from a registrar CSV with the columns "
+        + ", ".join(IMPORT_COLUMNS) + ". Accounts get no password; they choose one from their activation link."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--event', type=int, help="Also register every imported student for this event id.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--links', help="Write email,activation_link rows for the created accounts to this CSV file.")
+        parser.add_argument('--base-url', help="Site URL for activation links (default: settings.SITE_URL).")
+
+    def handle(self, *args, **options):
+        event = None
+        if options['event']:
+            try:
+                event = Event.objects.get(pk=options['event'])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {options['event']} does not exist.")
+
+        started = time.perf_counter()
+        with open(options['csv_path'], newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            missing = set(IMPORT_COLUMNS) - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+
+            def progress(result):
+                self.stderr.write(f"  {len(result.created)} created, {len(result.rejected)} rejected...")
+
+            result = import_participants(reader, event=event, chunk_size=options['chunk_size'], progress=progress)
+        elapsed = time.perf_counter() - started
+
+        for line, email, reason in result.rejected:
+            self.stdout.write(self.style.WARNING(f"Line {line} ({email or 'no email'}): {reason}"))
+
+        if options['links']:
+            with open(options['links'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['email', 'activation_link'])
+                for user_id, email in result.created:
+                    user = User(pk=user_id, email=email)
+                    user.set_unusable_password()
+                    writer.writerow([email, activation_url(user, options['base_url'])])
+
+        rows = len(result.created) + len(result.rejected)
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(result.created)} participant(s), rejected {len(result.rejected)} row(s) "
+            f"in {elapsed:.1f}s ({rate:.0f} rows/s)."
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.activation import pending_activation_users, send_activation_emails
+
+
+class Command(BaseCommand):
+    help = "Re-sends activation emails to every participant account that has not been activated yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, help="Only accounts registered for this event id.")
+        parser.add_argument('--batch-size', type=int, default=200, help="Emails sent per batch over the shared connection.")
+        parser.add_argument('--base-url', help="Site URL for activation links (default: settings.SITE_URL).")
+
+    def handle(self, *args, **options):
+        users = pending_activation_users()
+        if options['event']:
+            users = users.filter(event_registrations__event_id=options['event'])
+
+        sent = send_activation_emails(
+            users, base_url=options['base_url'], batch_size=options['batch_size'],
+            progress=lambda count: self.stderr.write(f"  {count} sent..."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} activation email(s)."))
@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import F, Q
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 
 # The events model is referenced by RegistrationCode and EventRegistration
 # It's assumed to be in an app named 'events'
@@ -37,6 +39,25 @@ class UserProfile(models.Model):
 
 # --- 3. Registration Code Model ---
 # Used to gate participant sign-ups.
+class RegistrationCodeQuerySet(models.QuerySet):
+    def redeemable(self):
+        """Codes that are active, unexpired and still have uses left."""
+        now = timezone.now()
+        return self.filter(is_active=True, uses_count__lt=F('max_uses')).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+        )
+
+    def claim(self, pk):
+        """
+        Claims one use of a code with a single conditional UPDATE.
+        Returns False if the code was not redeemable at that instant, so
+        concurrent callers can never push uses_count past max_uses.
+        """
+        claimed = self.redeemable().filter(pk=pk).update(
+            uses_count=F('uses_count') + 1, updated_at=timezone.now()
+        )
+        return claimed == 1
+
 class RegistrationCode(models.Model):
     code = models.CharField(max_length=50, unique=True)
     event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, 
@@ -53,6 +74,14 @@ class RegistrationCode(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RegistrationCodeQuerySet.as_manager()
+
+    def check_redeemable(self):
+        """Raises ValueError with a user-facing reason if the code can't be used."""
+        if not self.is_active: raise ValueError("This code is not active.")
+        if self.expires_at and self.expires_at < timezone.now(): raise ValueError("This code has expired.")
+        if self.uses_count >= self.max_uses: raise ValueError("This code has reached its maximum uses.")
+
     def __str__(self):
         return f"{self.code} ({self.uses_count}/{self.max_uses} used)"
 
@@ -91,7 +120,31 @@ class ParticipantRegistrationLog(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     reason = models.CharField(max_length=255, blank=True, null=True, 
                               help_text="e.g., Code expired, Code invalid, Email exists")
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the attempt happens, not when the buffered row is written (see accounts/audit.py).
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp'], name='reglog_timestamp_idx'),
+            models.Index(fields=['ip_address', 'timestamp'], name='reglog_ip_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f"{self.email_attempt} at {self.timestamp} - {self.status}"
+
+# --- 6. Registration Log Daily Rollup ---
+# Old ParticipantRegistrationLog rows are compacted into per-day counts
+# by `python manage.py compact_registration_logs`.
+class RegistrationLogDailyCount(models.Model):
+    day = models.DateField()
+    code_used = models.CharField(max_length=50, blank=True, null=True)
+    ip_address = models.GenericIPAddressField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=ParticipantRegistrationLog.STATUS_CHOICES)
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'code_used', 'ip_address', 'status')
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.day}: {self.attempts} {self.status} attempt(s) from {self.ip_address}"
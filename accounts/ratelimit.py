@@ -0,0 +1,70 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Defaults per endpoint; override any of them with settings.RATE_LIMITS,
+# e.g. RATE_LIMITS = {'registration': {'LIMIT': 5, 'WINDOW': 300}}.
+DEFAULT_RATE_LIMITS = {
+    'registration': {'LIMIT': 10, 'WINDOW': 15 * 60},
+    'team_join': {'LIMIT': 10, 'WINDOW': 15 * 60},
+}
+
+
+class SlidingWindowRateLimit:
+    """
+    Approximate sliding-window limiter kept entirely in the Django cache.
+
+    Each identity (e.g. "ip:10.0.0.1") has one counter per fixed window. The
+    count over the last `window` seconds is estimated as the current
+    window's count plus the previous window's count weighted by how much of
+    it still overlaps the sliding window. Checking costs one get_many and
+    recording a hit one add/incr per identity; neither touches the database.
+    """
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def _key(self, identity, bucket):
+        digest = hashlib.sha1(str(identity).encode()).hexdigest()[:20]
+        return f'ratelimit:{self.scope}:{digest}:{bucket}'
+
+    def counts(self, *identities, now=None):
+        """Returns the estimated hits in the sliding window for each identity."""
+        now = time.time() if now is None else now
+        bucket, offset = divmod(now, self.window)
+        bucket = int(bucket)
+        keys = {identity: (self._key(identity, bucket - 1), self._key(identity, bucket)) for identity in identities}
+        stored = cache.get_many([key for pair in keys.values() for key in pair])
+        previous_weight = 1 - offset / self.window
+        return {
+            identity: stored.get(current, 0) + stored.get(previous, 0) * previous_weight
+            for identity, (previous, current) in keys.items()
+        }
+
+    def is_limited(self, *identities, now=None):
+        """True if any of the identities has used up its allowance."""
+        return any(count >= self.limit for count in self.counts(*identities, now=now).values())
+
+    def hit(self, *identities, now=None):
+        """Records one attempt against each identity."""
+        now = time.time() if now is None else now
+        bucket = int(now // self.window)
+        for identity in identities:
+            key = self._key(identity, bucket)
+            # Keep the bucket around for the window after it, where it's still weighted in.
+            cache.add(key, 0, timeout=self.window * 2)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Evicted between add() and incr(); start the bucket over.
+                cache.set(key, 1, timeout=self.window * 2)
+
+
+def get_rate_limit(scope):
+    """Builds the limiter for an endpoint from DEFAULT_RATE_LIMITS and settings.RATE_LIMITS."""
+    options = {**DEFAULT_RATE_LIMITS.get(scope, {}), **getattr(settings, 'RATE_LIMITS', {}).get(scope, {})}
+    return SlidingWindowRateLimit(scope, limit=options['LIMIT'], window=options['WINDOW'])
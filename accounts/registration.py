@@ -0,0 +1,50 @@
+from django.db import transaction
+
+from .models import RegistrationCode, User, UserProfile, EventRegistration
+
+
+def register_participant(data, code_str):
+    """
+    Creates an inactive participant account from validated registration
+    form data and redeems `code_str` for it.
+
+    The password is hashed before any transaction is opened, and the code's
+    use is claimed with a conditional UPDATE as the last statement, so the
+    code row is locked only for the moment it takes to commit. Concurrent
+    sign-ups on a shared event code therefore don't queue behind each other.
+
+    Raises RegistrationCode.DoesNotExist or ValueError (with a user-facing
+    reason) if the code can't be redeemed.
+    """
+    code = RegistrationCode.objects.get(code=code_str)
+    code.check_redeemable()
+
+    user = User(
+        username=data['email'],
+        email=data['email'],
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        is_staff=False,
+        is_active=False # Recommended: Keep false until email is verified
+    )
+    user.set_password(data['password'])
+
+    with transaction.atomic():
+        user.save()
+        UserProfile.objects.create(
+            user=user,
+            student_roll_number=data.get('student_roll_number'),
+            branch=data.get('branch'),
+            year_of_study=data.get('year_of_study')
+        )
+
+        # Link User to Event if code is event-specific
+        if code.event_id:
+            EventRegistration.objects.create(participant=user, event_id=code.event_id)
+
+        if not RegistrationCode.objects.claim(code.pk):
+            # Someone else took the last use (or the code changed) since we read it.
+            code.refresh_from_db()
+            code.check_redeemable()
+            raise ValueError("This code has reached its maximum uses.")
+    return user
@@ -0,0 +1,20 @@
+from import_export import fields, widgets
+
+from campusinnovate.chunked_import_export import ChunkedModelResource
+from .models import RegistrationCode
+
+
+class RegistrationCodeResource(ChunkedModelResource):
+    """Codes are matched on `code`; `event` is the event id, blank for campus-wide codes."""
+    uses_count = fields.Field(attribute='uses_count', column_name='uses_count', widget=widgets.IntegerWidget(), readonly=True)  # counted by redemptions only
+
+    class Meta:
+        model = RegistrationCode
+        fields = ('code', 'event', 'max_uses', 'uses_count', 'expires_at', 'is_active')
+        export_order = fields
+        import_id_fields = ('code',)
+
+    def before_save_instance(self, instance, row, **kwargs):
+        user = kwargs.get('user')
+        if instance.created_by_id is None and user is not None:
+            instance.created_by = user
@@ -1,3 +1,468 @@
-from django.test import TestCase
+import io
+import os
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail import get_connection
+from django.db import connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from campusinnovate.chunked_import_export import export_lines, import_rows
+from campusinnovate.testing import make_event
+from events.models import EventStats
+from submissions.models import Submission
+from teams.models import Team, TeamMember
+from tracking.models import Feedback
+from .activation import make_activation_token, read_activation_token, activate_user, pending_activation_users, send_activation_emails
+from .audit import RegistrationLogBuffer, compact_registration_logs
+from .importer import import_participants
+from .resources import RegistrationCodeResource
+from .models import (
+    RegistrationCode, User, UserProfile, EventRegistration,
+    ParticipantRegistrationLog, RegistrationLogDailyCount,
+)
+from .ratelimit import SlidingWindowRateLimit, get_rate_limit
+from .registration import register_participant
+
+# Benchmarks are slow and print timings; run them with
+#   CAMPUSINNOVATE_BENCHMARKS=1 python manage.py test
+RUN_BENCHMARKS = bool(os.environ.get('CAMPUSINNOVATE_BENCHMARKS'))
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+
+
+def registration_data(i):
+    return {
+        'email': f'student{i}@example.edu',
+        'first_name': 'Student',
+        'last_name': str(i),
+        'password': 'correct-horse',
+        'student_roll_number': f'R{i:06d}',
+        'branch': 'CSE',
+        'year_of_study': 2,
+    }
+
+
+def run_in_threads(func, count, workers=32):
+    """Runs func(i) for i in range(count) concurrently and returns the results."""
+    def worker(i):
+        try:
+            return func(i)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, range(count)))
+
+
+class RegistrationCodeRedemptionTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', is_staff=True)
+
+    def make_code(self, **kwargs):
+        return RegistrationCode.objects.create(code='CODE', created_by=self.admin, **kwargs)
+
+    def test_claim_stops_at_max_uses(self):
+        code = self.make_code(max_uses=2)
+        self.assertTrue(RegistrationCode.objects.claim(code.pk))
+        self.assertTrue(RegistrationCode.objects.claim(code.pk))
+        self.assertFalse(RegistrationCode.objects.claim(code.pk))
+        code.refresh_from_db()
+        self.assertEqual(code.uses_count, 2)
+
+    def test_claim_rejects_inactive_and_expired_codes(self):
+        code = self.make_code(max_uses=5, is_active=False)
+        self.assertFalse(RegistrationCode.objects.claim(code.pk))
+        RegistrationCode.objects.filter(pk=code.pk).update(is_active=True, expires_at=timezone.now())
+        self.assertFalse(RegistrationCode.objects.claim(code.pk))
+
+    @override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+    def test_register_participant_creates_account_and_uses_code(self):
+        code = self.make_code(max_uses=1)
+        user = register_participant(registration_data(1), 'CODE')
+        self.assertFalse(user.is_active)
+        self.assertTrue(user.check_password('correct-horse'))
+        self.assertTrue(UserProfile.objects.filter(user=user, student_roll_number='R000001').exists())
+        code.refresh_from_db()
+        self.assertEqual(code.uses_count, 1)
+
+        with self.assertRaisesMessage(ValueError, "maximum uses"):
+            register_participant(registration_data(2), 'CODE')
+        self.assertFalse(User.objects.filter(email='student2@example.edu').exists())
+
+
+
+def import_row(i, **overrides):
+    row = {'email': f'Student{i}@Example.edu', 'first_name': 'Student', 'last_name': str(i),
+           'student_roll_number': f'R{i:06d}', 'branch': 'CSE', 'year_of_study': '2'}
+    row.update(overrides)
+    return row
+
+
+class ParticipantImportTests(TestCase):
+    def test_imports_in_chunks_and_reports_duplicates(self):
+        event = make_event()
+        User.objects.create(username='student3@example.edu', email='student3@example.edu')
+        rows = [import_row(i) for i in range(1, 6)]
+        rows += [
+            import_row(1, student_roll_number='R999999'),   # duplicate email in file
+            import_row(7, student_roll_number='R000002'),   # duplicate roll number in file
+            import_row(8, email='not-an-email'),
+            import_row(9, year_of_study='second'),
+        ]
+        result = import_participants(rows, event=event, chunk_size=2)
+
+        self.assertEqual(len(result.created), 4)
+        self.assertEqual([line for line, _, _ in result.rejected], [4, 7, 8, 9, 10])
+        user = User.objects.get(email='student1@example.edu')
+        self.assertFalse(user.is_active)
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(user.profile.student_roll_number, 'R000001')
+        self.assertEqual(EventRegistration.objects.filter(event=event).count(), 4)
+        self.assertEqual(EventStats.objects.get(event=event).registrations_registered, 4)
+
+
+def code_row(i, **overrides):
+    row = {'code': f'CODE{i:05d}', 'event': '', 'max_uses': '3', 'uses_count': '', 'expires_at': '', 'is_active': '1'}
+    row.update(overrides)
+    return row
+
+
+class RegistrationCodeChunkedImportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.edu', 'pw')
+        self.event = make_event()
+        RegistrationCode.objects.create(code='CODE00001', created_by=self.admin, max_uses=1, uses_count=1)
+
+    def rows(self):
+        return [
+            code_row(1, event=str(self.event.pk), uses_count='99'),  # update; uses_count is read-only
+            code_row(2),
+            code_row(3, max_uses='many'),
+            code_row(2),                                               # duplicate in file
+            code_row(4, event='999999'),
+            code_row(5),
+        ]
+
+    def test_dry_run_reports_the_diff_without_writing(self):
+        result = import_rows(RegistrationCodeResource(), self.rows(), dry_run=True, user=self.admin, chunk_size=2)
+
+        self.assertEqual((result.new, result.updated, result.unchanged), (2, 1, 0))
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6])
+        self.assertEqual(result.diff[0], (2, 'update', [('event', None, str(self.event.pk)), ('max_uses', 1, 3)]))
+        self.assertEqual([chunk[:2] for chunk in result.chunks], [(2, 3), (4, 5), (6, 7)])
+        self.assertEqual(RegistrationCode.objects.count(), 1)
+
+    def test_import_saves_each_chunk_with_bulk_queries(self):
+        rows = [code_row(i) for i in range(1, 401)]
+        # Per chunk: existing rows, savepoint, bulk_create, release; plus the first chunk's bulk_update.
+        with self.assertNumQueries(4 * 4 + 1):
+            result = import_rows(RegistrationCodeResource(), rows, user=self.admin, chunk_size=100)
+        self.assertEqual((result.new, result.updated), (399, 1))
+
+        self.assertEqual(RegistrationCode.objects.count(), 400)
+        updated = RegistrationCode.objects.get(code='CODE00001')
+        self.assertEqual((updated.max_uses, updated.uses_count), (3, 1))
+        self.assertTrue(RegistrationCode.objects.filter(code='CODE00400', created_by=self.admin, is_active=True).exists())
+
+        again = import_rows(RegistrationCodeResource(), rows, user=self.admin, chunk_size=100)
+        self.assertEqual((again.new, again.updated, again.unchanged), (0, 0, 400))
+
+    def test_missing_id_column_is_rejected(self):
+        with self.assertRaises(ValueError):
+            import_rows(RegistrationCodeResource(), [{'max_uses': '3'}], user=self.admin)
+
+    def test_admin_chunked_import_and_stream_export(self):
+        self.client.force_login(self.admin)
+        csv_file = io.BytesIO(b'code,max_uses,is_active\nCODE00001,2,1\nCODE00002,5,0\n')
+        csv_file.name = 'codes.csv'
+        response = self.client.post(reverse('admin:accounts_registrationcode_chunked_import'), {'csv_file': csv_file})
+        self.assertContains(response, '1 new, 1 updated, 0 unchanged, 0 rejected')
+        self.assertEqual(RegistrationCode.objects.count(), 2)
+
+        response = self.client.get(reverse('admin:accounts_registrationcode_stream_export'), {'is_active__exact': '1'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['code,event,max_uses,uses_count,expires_at,is_active', 'CODE00001,,2,1,,1'])
+
+        self.assertEqual(''.join(export_lines(RegistrationCodeResource(), RegistrationCode.objects.order_by('code'))).count('\n'), 3)
+
+
+class ActivationTokenTests(TestCase):
+    def test_token_round_trip_and_activation(self):
+        user = User.objects.create_user(username='s@example.edu', password='pw', is_active=False)
+        token = make_activation_token(user)
+        self.assertEqual(read_activation_token(token), (user.pk, False))
+        self.assertIsNone(read_activation_token(token[:-1] + ('A' if token[-1] != 'A' else 'B')))
+        self.assertTrue(activate_user(user.pk))
+        self.assertFalse(activate_user(user.pk))
+
+    def test_passwordless_accounts_are_flagged(self):
+        user = User(pk=42)
+        user.set_unusable_password()
+        self.assertEqual(read_activation_token(make_activation_token(user)), (42, True))
+
+    @override_settings(ACCOUNT_ACTIVATION_MAX_AGE=-1)
+    def test_expired_token_is_rejected(self):
+        self.assertIsNone(read_activation_token(make_activation_token(User.objects.create(username='x'))))
+
+
+class ActivationEmailTests(TestCase):
+    def test_bulk_resend_batches_over_one_connection(self):
+        User.objects.bulk_create([User(username=f's{i}', email=f's{i}@example.edu', is_active=False) for i in range(45)])
+        User.objects.create(username='active', email='active@example.edu', is_active=True)
+        User.objects.create(username='staff', email='staff@example.edu', is_active=False, is_staff=True)
+
+        batches = []
+        with mock.patch('accounts.activation.get_connection', wraps=get_connection) as connections_opened:
+            sent = send_activation_emails(pending_activation_users(), batch_size=20, progress=batches.append)
+        self.assertEqual(sent, 45)
+        self.assertEqual(connections_opened.call_count, 1)
+        self.assertEqual(batches, [20, 40])
+        self.assertEqual(len(mail.outbox), 45)
+        self.assertIn('/accounts/activate/', mail.outbox[0].body)
+
+    def test_activation_link_activates_account(self):
+        user = User.objects.create_user(username='s@example.edu', password='pw', is_active=False)
+        response = self.client.get(reverse('activate', args=[make_activation_token(user)]))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        user.refresh_from_db()
+        self.assertTrue(user.is_active)
+
+    def test_passwordless_account_is_sent_to_set_a_password(self):
+        user = User.objects.create(username='imported@example.edu', is_active=False)
+        user.set_unusable_password()
+        user.save()
+        response = self.client.get(reverse('activate', args=[make_activation_token(user)]))
+        self.assertIn('/accounts/reset/', response['Location'])
+
+
+class ParticipantDashboardTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(username='student', password='pw', first_name='Sam')
+        self.client.force_login(self.student)
+
+    def add_event(self, i, with_team=True):
+        event = make_event(event_name=f'Event {i}', event_end=timezone.now() - timedelta(days=1))
+        EventRegistration.objects.create(participant=self.student, event=event)
+        if with_team:
+            team = Team.objects.create(event=event, team_name=f'Team {i}', leader=self.student)
+            TeamMember.objects.create(team=team, participant=self.student)
+            Submission.objects.create(team=team, project_title='p', project_description='d')
+            Feedback.objects.create(event=event, participant=self.student, rating=5)
+        return event
+
+    def test_query_count_does_not_grow_with_events(self):
+        self.add_event(0)
+        # session, user, registrations, memberships, unread notification count
+        with self.assertNumQueries(5):
+            self.client.get(reverse('participant_dashboard'))
+        for i in range(1, 6):
+            self.add_event(i, with_team=i % 2 == 0)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('participant_dashboard'))
+        self.assertEqual(len(response.context['my_registrations']), 6)
+
+    def test_shows_team_submission_and_feedback_state(self):
+        event = self.add_event(0)
+        self.add_event(1, with_team=False)
+        regs = {reg.event_id: reg for reg in self.client.get(reverse('participant_dashboard')).context['my_registrations']}
+        done = regs[event.pk]
+        self.assertEqual((done.membership.team.member_count, done.membership.has_submission, done.has_feedback), (1, True, True))
+        self.assertTrue(done.is_team_leader)
+        self.assertFalse(done.can_give_feedback)
+        pending = next(reg for pk, reg in regs.items() if pk != event.pk)
+        self.assertIsNone(pending.membership)
+        self.assertTrue(pending.can_give_feedback)
+
+
+class RegistrationLogTests(TestCase):
+    def log(self, buffer, **fields):
+        buffer.add(email_attempt='bot@example.com', code_used='GUESS', ip_address='10.0.0.1', status='fail', **fields)
+
+    def test_buffer_flushes_in_batches(self):
+        buffer = RegistrationLogBuffer(max_size=3, max_age=60)
+        self.log(buffer)
+        self.log(buffer)
+        self.assertEqual(ParticipantRegistrationLog.objects.count(), 0)
+        self.log(buffer)
+        self.assertEqual(ParticipantRegistrationLog.objects.count(), 3)
+        self.log(buffer, reason='x' * 300)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(len(ParticipantRegistrationLog.objects.last().reason), 255)
+
+    def test_compaction_rolls_up_old_rows(self):
+        buffer = RegistrationLogBuffer(max_size=1000, max_age=60)
+        old = timezone.now() - timedelta(days=40)
+        for _ in range(3):
+            self.log(buffer, timestamp=old)
+        self.log(buffer, timestamp=timezone.now())
+        buffer.flush()
+
+        self.assertEqual(compact_registration_logs(timezone.now() - timedelta(days=30)), (3, 1))
+        self.log(buffer, timestamp=old)
+        buffer.flush()
+        compact_registration_logs(timezone.now() - timedelta(days=30))
+
+        rollup = RegistrationLogDailyCount.objects.get()
+        self.assertEqual((rollup.day, rollup.attempts), (timezone.localdate(old), 4))
+        self.assertEqual(ParticipantRegistrationLog.objects.count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SlidingWindowRateLimitTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.limit = SlidingWindowRateLimit('test', limit=3, window=60)
+
+    def test_limits_after_allowance_is_used(self):
+        for _ in range(2):
+            self.limit.hit('ip:1', now=1000)
+        self.assertFalse(self.limit.is_limited('ip:1', now=1001))
+        self.limit.hit('ip:1', now=1002)
+        self.assertTrue(self.limit.is_limited('ip:1', now=1003))
+        self.assertFalse(self.limit.is_limited('ip:2', now=1003))
+
+    def test_any_limited_identity_blocks(self):
+        for _ in range(3):
+            self.limit.hit('email:a@example.com', now=1000)
+        self.assertTrue(self.limit.is_limited('ip:9', 'email:a@example.com', now=1000))
+
+    def test_previous_window_decays(self):
+        for _ in range(3):
+            self.limit.hit('ip:1', now=1199) # Last second of window [1140, 1200)
+        # 15s into the next window, 75% of the previous window still counts.
+        self.assertAlmostEqual(self.limit.counts('ip:1', now=1215)['ip:1'], 2.25)
+        self.assertFalse(self.limit.is_limited('ip:1', now=1215))
+        self.assertTrue(self.limit.is_limited('ip:1', now=1200))
+        self.assertEqual(self.limit.counts('ip:1', now=1260)['ip:1'], 0)
+
+    @override_settings(RATE_LIMITS={'registration': {'LIMIT': 1}})
+    def test_settings_override_defaults(self):
+        limit = get_rate_limit('registration')
+        self.assertEqual((limit.limit, limit.window), (1, 15 * 60))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ConcurrentRedemptionTests(TransactionTestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', is_staff=True)
+
+    def test_parallel_claims_never_overuse_code(self):
+        code = RegistrationCode.objects.create(code='BURST', created_by=self.admin, max_uses=50)
+        results = run_in_threads(lambda i: RegistrationCode.objects.claim(code.pk), 300)
+        code.refresh_from_db()
+        self.assertEqual(sum(results), 50)
+        self.assertEqual(code.uses_count, 50)
+
+    def test_parallel_registrations_never_overuse_code(self):
+        code = RegistrationCode.objects.create(code='BURST', created_by=self.admin, max_uses=40)
+
+        def attempt(i):
+            try:
+                register_participant(registration_data(i), 'BURST')
+                return True
+            except ValueError:
+                return False
+
+        results = run_in_threads(attempt, 200)
+        code.refresh_from_db()
+        self.assertEqual(sum(results), 40)
+        self.assertEqual(code.uses_count, 40)
+        self.assertEqual(User.objects.filter(is_staff=False).count(), 40)
+
+
+def legacy_register_participant(data, code_str):
+    """The previous redemption path: lock the code row, then hash and insert."""
+    with transaction.atomic():
+        code = RegistrationCode.objects.select_for_update().get(code=code_str)
+        code.check_redeemable()
+        user = User.objects.create_user(
+            username=data['email'], email=data['email'], password=data['password'],
+            first_name=data['first_name'], last_name=data['last_name'], is_active=False,
+        )
+        UserProfile.objects.create(user=user, student_roll_number=data['student_roll_number'])
+        code.uses_count += 1
+        code.save()
+        if code.event_id:
+            EventRegistration.objects.create(participant=user, event_id=code.event_id)
+    return user
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class RedemptionThroughputBenchmark(TransactionTestCase):
+    REGISTRATIONS = 64
+    WORKERS = 16
+
+    def measure(self, func, offset):
+        RegistrationCode.objects.create(
+            code=f'BENCH{offset}', created_by=User.objects.get(username='admin'), max_uses=self.REGISTRATIONS
+        )
+        started = time.perf_counter()
+        run_in_threads(lambda i: func(registration_data(offset + i), f'BENCH{offset}'), self.REGISTRATIONS, self.WORKERS)
+        return self.REGISTRATIONS / (time.perf_counter() - started)
+
+    def test_legacy_vs_conditional_increment(self):
+        if connections['default'].vendor == 'sqlite':
+            self.skipTest("needs a database with row-level locking (e.g. MySQL)")
+        User.objects.create(username='admin', is_staff=True)
+        legacy = self.measure(legacy_register_participant, 0)
+        current = self.measure(register_participant, 10000)
+        print(f"\nregistration code redemption ({self.WORKERS} threads, {connections['default'].vendor}): "
+              f"select_for_update {legacy:.1f}/s, conditional increment {current:.1f}/s")
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+@override_settings(CACHES=LOCMEM_CACHE)
+class RateLimitOverheadBenchmark(TestCase):
+    def test_rejection_overhead(self):
+        limit = SlidingWindowRateLimit('bench', limit=5, window=60)
+        keys = ('ip:203.0.113.7', 'email:bot@example.com')
+        for _ in range(5):
+            limit.hit(*keys)
+        rounds = 20000
+        started = time.perf_counter()
+        for _ in range(rounds):
+            limit.is_limited(*keys)
+        check = (time.perf_counter() - started) / rounds * 1e6
+        started = time.perf_counter()
+        for _ in range(rounds):
+            limit.hit(*keys)
+        hit = (time.perf_counter() - started) / rounds * 1e6
+        print(f"\nrate limit (locmem): is_limited {check:.1f}us, hit {hit:.1f}us per call")
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class ParticipantImportBenchmark(TestCase):
+    STUDENTS = 50000
+
+    def test_import_throughput(self):
+        event = make_event()
+        rows = (import_row(i) for i in range(self.STUDENTS))
+        started = time.perf_counter()
+        result = import_participants(rows, event=event, chunk_size=1000)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(result.created), self.STUDENTS)
+        print(f"\nparticipant import ({connections['default'].vendor}): {self.STUDENTS} students "
+              f"in {elapsed:.1f}s, {self.STUDENTS / elapsed:.0f} rows/s")
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class RegistrationCodeImportBenchmark(TestCase):
+    CODES = 10000
+
+    def test_chunked_import_throughput(self):
+        admin = User.objects.create(username='admin')
+        rows = [code_row(i) for i in range(self.CODES)]
+        started = time.perf_counter()
+        result = import_rows(RegistrationCodeResource(), rows, user=admin)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(result.new, self.CODES)
+        print(f"\nregistration code import ({connections['default'].vendor}): {self.CODES} codes "
+              f"in {elapsed:.1f}s, {self.CODES / elapsed:.0f} rows/s")
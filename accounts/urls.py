@@ -5,6 +5,7 @@ from . import views
 urlpatterns = [
     # Registration
     path('register/', views.register_participant_view, name='register'),
+    path('activate/<str:token>/', views.activate_account_view, name='activate'),
 
     # Login and Logout
     path('login/', views.CustomLoginView.as_view(), name='login'),
@@ -1,11 +1,18 @@
+from django.db.models import Exists, OuterRef
 from django.shortcuts import render, redirect
-from django.db import transaction
 from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
-from .models import RegistrationCode, User, UserProfile, EventRegistration, ParticipantRegistrationLog
+from .models import RegistrationCode, User, EventRegistration
+from .activation import read_activation_token, activate_user, set_password_url, send_activation_email
+from .audit import log_registration_attempt
+from .ratelimit import get_rate_limit
 from .forms import ParticipantRegistrationForm
+from .registration import register_participant
+from submissions.models import Submission
+from teams.models import TeamMember
+from tracking.models import Feedback
 
 # --- Participant Registration View ---
 def register_participant_view(request):
@@ -13,71 +20,69 @@ def register_participant_view(request):
         return redirect('dashboard') # Redirect logged-in users away
 
     if request.method == 'POST':
-        form = ParticipantRegistrationForm(request.POST)
-        
         ip_address = request.META.get('REMOTE_ADDR')
         email = request.POST.get('email', '').strip()
         code_str = request.POST.get('registration_code', '').strip()
 
+        # Turn away repeated code guessing before it costs any queries.
+        rate_limit = get_rate_limit('registration')
+        rate_limit_keys = (f'ip:{ip_address}', f'email:{email.lower()}')
+        if rate_limit.is_limited(*rate_limit_keys):
+            messages.error(request, 'Too many failed registration attempts. Please try again later.')
+            return render(request, 'accounts/register.html', {'form': ParticipantRegistrationForm()}, status=429)
+
+        form = ParticipantRegistrationForm(request.POST)
+
         if form.is_valid():
             try:
-                with transaction.atomic():
-                    code = RegistrationCode.objects.select_for_update().get(code=code_str)
-
-                    # 1. Validate the Code
-                    if not code.is_active: raise ValueError("This code is not active.")
-                    if code.expires_at and code.expires_at < timezone.now(): raise ValueError("This code has expired.")
-                    if code.uses_count >= code.max_uses: raise ValueError("This code has reached its maximum uses.")
-
-                    # 2. Create the User & Profile
-                    user = User.objects.create_user(
-                        username=form.cleaned_data['email'],
-                        email=form.cleaned_data['email'],
-                        password=form.cleaned_data['password'],
-                        first_name=form.cleaned_data['first_name'],
-                        last_name=form.cleaned_data['last_name'],
-                        is_staff=False,
-                        is_active=False # Recommended: Keep false until email is verified
-                    )
-                    
-                    UserProfile.objects.create(
-                        user=user,
-                        student_roll_number=form.cleaned_data.get('student_roll_number'),
-                        branch=form.cleaned_data.get('branch'),
-                        year_of_study=form.cleaned_data.get('year_of_study')
-                    )
-
-                    # 3. Update the Code Usage
-                    code.uses_count += 1
-                    code.save()
-
-                    # 4. Link User to Event if code is event-specific
-                    if code.event:
-                        EventRegistration.objects.create(participant=user, event=code.event)
-
-                    # 5. Log Success & Send Email (Email sending logic needs setup)
-                    ParticipantRegistrationLog.objects.create(
-                        email_attempt=email, code_used=code_str, ip_address=ip_address, 
-                        status='success', reason='Registration successful'
-                    )
-                    
-                    messages.success(request, 'Registration successful! Please check your email to activate your account.')
-                    return redirect('login')
+                user = register_participant(form.cleaned_data, code_str)
+                send_activation_email(user, base_url=request.build_absolute_uri('/'))
+
+                # Log Success
+                log_registration_attempt(
+                    email_attempt=email, code_used=code_str, ip_address=ip_address, 
+                    status='success', reason='Registration successful'
+                )
+
+                messages.success(request, 'Registration successful! Please check your email to activate your account.')
+                return redirect('login')
 
             except RegistrationCode.DoesNotExist:
+                rate_limit.hit(*rate_limit_keys)
                 messages.error(request, 'Invalid registration code.')
-                ParticipantRegistrationLog.objects.create(email_attempt=email, code_used=code_str, ip_address=ip_address, status='fail', reason='Code does not exist')
+                log_registration_attempt(email_attempt=email, code_used=code_str, ip_address=ip_address, status='fail', reason='Code does not exist')
             except ValueError as e:
+                rate_limit.hit(*rate_limit_keys)
                 messages.error(request, str(e))
-                ParticipantRegistrationLog.objects.create(email_attempt=email, code_used=code_str, ip_address=ip_address, status='fail', reason=str(e))
+                log_registration_attempt(email_attempt=email, code_used=code_str, ip_address=ip_address, status='fail', reason=str(e))
             except Exception as e:
                 messages.error(request, 'An unexpected error occurred. Please check the form.')
-                ParticipantRegistrationLog.objects.create(email_attempt=email, code_used=code_str, ip_address=ip_address, status='fail', reason=f"Form Error: {e}")
+                log_registration_attempt(email_attempt=email, code_used=code_str, ip_address=ip_address, status='fail', reason=f"Form Error: {e}")
     else:
         form = ParticipantRegistrationForm()
 
     return render(request, 'accounts/register.html', {'form': form})
 
+# --- Account Activation View ---
+def activate_account_view(request, token):
+    """Activates an account from a signed link. Valid links need no token lookup, just one UPDATE."""
+    token_data = read_activation_token(token)
+    if token_data is None:
+        messages.error(request, 'This activation link is invalid or has expired.')
+        return redirect('login')
+
+    user_id, needs_password = token_data
+    activate_user(user_id)
+    if needs_password:
+        # Imported accounts have no password yet; let them choose one now.
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None and not user.has_usable_password():
+            messages.success(request, 'Your account is active. Please choose a password.')
+            return redirect(set_password_url(user))
+
+    messages.success(request, 'Your account is active. You can now log in.')
+    return redirect('login')
+
 # --- Login and Logout Views ---
 class CustomLoginView(auth_views.LoginView):
     template_name = 'accounts/login.html'
@@ -94,9 +99,33 @@ def dashboard_redirect_view(request):
 # --- Participant Dashboard View ---
 @login_required
 def participant_dashboard_view(request):
+    """
+    Shows every event the participant registered for, with their team,
+    submission and feedback state. Two queries in total, however many
+    events they are in: one for the registrations (with a feedback flag),
+    one for their team memberships (with a submission flag).
+    """
     if request.user.is_staff:
         return redirect('event_manager_dashboard') # Prevent staff from accessing this
 
-    my_registrations = EventRegistration.objects.filter(participant=request.user).select_related('event')
+    my_registrations = list(
+        EventRegistration.objects.filter(participant=request.user)
+        .select_related('event')
+        .annotate(has_feedback=Exists(Feedback.objects.filter(event=OuterRef('event'), participant=OuterRef('participant'))))
+        .order_by('-event__event_start')
+    )
+    memberships = (
+        TeamMember.objects.filter(participant=request.user)
+        .select_related('team')
+        .annotate(has_submission=Exists(Submission.objects.filter(team=OuterRef('team'))))
+    )
+    membership_by_event = {membership.team.event_id: membership for membership in memberships}
+
+    now = timezone.now()
+    for reg in my_registrations:
+        reg.membership = membership_by_event.get(reg.event_id)
+        reg.is_team_leader = reg.membership is not None and reg.membership.team.leader_id == request.user.pk
+        reg.can_give_feedback = reg.status == 'registered' and reg.event.event_end <= now and not reg.has_feedback
+
     context = {'my_registrations': my_registrations}
     return render(request, 'accounts/participant_dashboard.html', context)
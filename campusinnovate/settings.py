@@ -62,6 +62,8 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 # Context processor for notification count
                 'communications.context_processors.unread_notifications_count',
+                # The user's staff roles per event, see events/roles.py
+                'events.context_processors.event_roles',
             ],
         },
     },
@@ -88,6 +90,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory is fine for development. In production point this at a shared
+# backend (Memcached/Redis) so every worker sees the same cached pages.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'campusinnovate',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -127,3 +142,13 @@ AUTH_USER_MODEL = 'accounts.User'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'home'
+
+# Account Activation
+# Base URL used when building links outside a request (emails, bulk imports)
+SITE_URL = 'http://127.0.0.1:8000'
+ACCOUNT_ACTIVATION_MAX_AGE = 60 * 60 * 24 * 7 # Activation links are valid for a week
+
+# Email
+# Prints emails to the console during development; configure SMTP for production.
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'CampusInnovate <no-reply@campusinnovate.local>'
@@ -0,0 +1,25 @@
+"""
+Helpers for streaming large downloads with StreamingHttpResponse.
+"""
+
+STREAM_BUFFER_SIZE = 64 * 1024  # bytes handed to the server at a time
+
+
+class Echo:
+    """A file-like object whose write() hands the line back, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def buffered(lines, size=STREAM_BUFFER_SIZE):
+    """Joins lines into blocks of about `size` bytes instead of one write per line."""
+    block, length = [], 0
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(block)
+            block, length = [], 0
+    if block:
+        yield ''.join(block)
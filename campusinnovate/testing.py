@@ -0,0 +1,13 @@
+"""Fixtures shared by the apps' test modules."""
+from django.utils import timezone
+
+from events.models import Event
+
+
+def make_event(**fields):
+    """Creates an event running now; `fields` override the defaults."""
+    now = timezone.now()
+    defaults = dict(event_name='Hackathon', title='t', about_event='a', registration_start=now,
+                    registration_end=now, event_start=now, event_end=now, event_mode='physical')
+    defaults.update(fields)
+    return Event.objects.create(**defaults)
@@ -6,6 +6,7 @@ from .models import (
 )
 # We import Announcement to inline it here for easy management
 from communications.models import Announcement
+from submissions.models import RubricCriterion
 
 # --- Inlines for the EventAdmin ---
 # These allow managing all related data from the main Event page.
@@ -35,6 +36,10 @@ class AnnouncementInline(admin.TabularInline):
     extra = 1
     fields = ('title', 'message')
 
+class RubricCriterionInline(admin.TabularInline):
+    model = RubricCriterion
+    extra = 0
+
 class EligibilityInline(admin.StackedInline):
     model = Eligibility
     extra = 0
@@ -51,6 +56,7 @@ class EventAdmin(admin.ModelAdmin):
         EventMediaInline,
         EventStaffInline,
         ProblemStatementInline,
+        RubricCriterionInline,
         ScheduleInline,
         AnnouncementInline,
         FAQInline,
@@ -0,0 +1,79 @@
+"""
+Resolves everything the participant and judge views need to know about the current
+user's relationship to one event, in a single query, and remembers it for the rest
+of the request. Staff roles come from the cached role map in events/roles.py.
+"""
+from django.db.models import FilteredRelation, Q, Subquery
+from django.http import Http404
+
+from .models import Event
+from .roles import get_role_map
+
+
+class EventContext:
+    def __init__(self, event, user, registration=None, team=None):
+        self.event = event
+        self.user = user
+        self.registration = registration  # The user's EventRegistration, whatever its status
+        self.team = team                  # The team the user belongs to for this event
+
+    @property
+    def staff_roles(self):
+        """Normalized EventStaff roles, e.g. {'judge'}."""
+        return get_role_map(self.user).roles_for(self.event.pk)
+
+    @property
+    def is_registered(self):
+        return self.registration is not None
+
+    @property
+    def is_team_leader(self):
+        return self.team is not None and self.team.leader_id == self.user.pk
+
+    @property
+    def is_judge(self):
+        return 'judge' in self.staff_roles
+
+
+def _load_event_context(event_id, user):
+    if not user.is_authenticated:
+        try:
+            return EventContext(Event.objects.get(pk=event_id), user)
+        except (Event.DoesNotExist, ValueError):
+            raise Http404("No Event matches the given query.")
+
+    # Imported here because both apps import events.models.
+    from teams.models import TeamMember
+
+    team_pk = TeamMember.objects.filter(team__event_id=event_id, participant=user).values('team_id')[:1]
+    event = (
+        Event.objects.filter(pk=event_id)
+        .annotate(
+            my_registration=FilteredRelation('registrations', condition=Q(registrations__participant=user)),
+            my_team=FilteredRelation('teams', condition=Q(teams__pk=Subquery(team_pk))),
+        )
+        .select_related('my_registration', 'my_team')
+        .first()
+    )
+    if event is None:
+        raise Http404("No Event matches the given query.")
+
+    # select_related leaves the attribute unset when the LEFT JOIN found nothing.
+    registration, team = getattr(event, 'my_registration', None), getattr(event, 'my_team', None)
+    if registration is not None:
+        registration.event = event
+    if team is not None:
+        team.event = event
+    return EventContext(event, user, registration, team)
+
+
+def get_event_context(request, event_id):
+    """
+    Returns the EventContext for `request.user` and `event_id`, raising Http404 if
+    the event does not exist. Repeated calls during the same request are free.
+    """
+    cache = request.__dict__.setdefault('_event_contexts', {})
+    key = str(event_id)
+    if key not in cache:
+        cache[key] = _load_event_context(event_id, request.user)
+    return cache[key]
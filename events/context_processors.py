@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .roles import get_role_map
+
+
+def event_roles(request):
+    """
+    Exposes the user's cached EventRoleMap as `event_roles`, e.g.
+    `{% if event.pk in event_roles.judge %}`. Loaded only if a template uses it.
+    """
+    return {'event_roles': SimpleLazyObject(lambda: get_role_map(request.user))}
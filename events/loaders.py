@@ -0,0 +1,97 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Event, Schedule, EventStaff
+
+# How long a rendered event page fragment is kept. Edits bump the version,
+# so this only bounds how long an orphaned fragment lingers in the cache.
+EVENT_PAGE_CACHE_TIMEOUT = 60 * 60
+EVENT_PAGE_TEMPLATE = 'events/_event_detail_sections.html'
+
+
+def event_page_queryset():
+    """
+    Returns an Event queryset that loads everything the public detail page
+    renders in a fixed number of queries (one for the event and its media,
+    plus one per related table), no matter how many days or staff it has.
+    """
+    return Event.objects.select_related('media').prefetch_related(
+        'announcements',
+        Prefetch('schedules', queryset=Schedule.objects.prefetch_related('sub_schedules')),
+        'problem_statements',
+        Prefetch('staff', queryset=EventStaff.objects.select_related('user')),
+    )
+
+
+def load_event_page(event_id):
+    """Fetches the full event graph for the detail page, or raises Http404."""
+    return get_object_or_404(event_page_queryset(), pk=event_id)
+
+
+# --- Versioned fragment cache ---
+
+def _version_key(event_id):
+    return f'event_page:{event_id}:version'
+
+
+def _get_version(key):
+    """
+    Returns the cache version stored under `key`. A missing version is seeded
+    from the clock so entries from before an eviction never match.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Nothing cached yet (or evicted); the next read seeds a fresh version.
+        pass
+
+
+def get_event_page_version(event_id):
+    """Returns the current cache version for an event's page."""
+    return _get_version(_version_key(event_id))
+
+
+def bump_event_page_version(event_id):
+    """Invalidates every cached fragment of an event's page."""
+    _bump_version(_version_key(event_id))
+
+
+EVENT_LIST_VERSION_KEY = 'event_list:version'
+
+
+def get_event_list_version():
+    """Returns the current cache version for the homepage's cached first pages."""
+    return _get_version(EVENT_LIST_VERSION_KEY)
+
+
+def bump_event_list_version():
+    """Invalidates the cached first page of every homepage filter combination."""
+    _bump_version(EVENT_LIST_VERSION_KEY)
+
+
+def render_event_page(event_id):
+    """
+    Returns the rendered event sections, served from the cache when the
+    event has not changed since they were last rendered.
+    """
+    key = f'event_page:{event_id}:v{get_event_page_version(event_id)}'
+    html = cache.get(key)
+    if html is None:
+        event = load_event_page(event_id)
+        html = render_to_string(EVENT_PAGE_TEMPLATE, {'event': event})
+        cache.set(key, str(html), EVENT_PAGE_CACHE_TIMEOUT)
+    return mark_safe(html)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from events.stats import rebuild_event_stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes the materialized EventStats rows from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='*', type=int, help="Only rebuild these events (default: all).")
+
+    def handle(self, *args, **options):
+        count = rebuild_event_stats(options['event_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} event(s)."))
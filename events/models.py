@@ -1,3 +1,4 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.conf import settings
 
@@ -29,13 +30,25 @@ class Event(models.Model):
     # Configuration
     event_mode = models.CharField(max_length=10, choices=MODE_CHOICES)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
+    reviewers_per_submission = models.PositiveSmallIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1)],
+        help_text="Judges assigned to each submission; set when judges are first assigned.",
+    )
 
     # Venue (for physical/hybrid events)
     venue_name = models.CharField(max_length=255, blank=True, null=True)
     venue_google_map_link = models.URLField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            # Backs the homepage listing: published events by start date.
+            # InnoDB appends the primary key, so this also covers the
+            # (event_start, id) keyset used for pagination.
+            models.Index(fields=['status', 'event_start'], name='event_status_start_idx'),
+        ]
+
     def __str__(self):
         return self.event_name
 
@@ -86,6 +99,8 @@ class EventStaff(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='staff')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='event_roles')
     role = models.CharField(max_length=50, help_text="e.g., Lead Organizer, Judge, Mentor, Volunteer")
+    review_capacity = models.PositiveIntegerField(null=True, blank=True,
+                                                  help_text="Judges only: most submissions to assign. Blank means no limit.")
     
     class Meta:
         unique_together = ('event', 'user', 'role')
@@ -114,3 +129,37 @@ class EventResource(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='resources')
     title = models.CharField(max_length=100)
     file = models.FileField(upload_to='event_resources/')
+
+# Materialized per-event numbers for the staff dashboard.
+# Kept current by the signal handlers in events/signals.py (using the
+# update helpers in events/stats.py) and fully
+# rebuildable with `python manage.py rebuild_event_stats`. The counters are
+# signed so that drift below zero never fails the write that caused it.
+class EventStats(models.Model):
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+
+    registrations_registered = models.IntegerField(default=0)
+    registrations_cancelled = models.IntegerField(default=0)
+    teams = models.IntegerField(default=0)
+    team_members = models.IntegerField(default=0)
+    submissions = models.IntegerField(default=0)
+    submissions_judged = models.IntegerField(default=0, help_text="Submissions scored by every judge of the event")
+    attendance_present = models.IntegerField(default=0)
+    feedback_count = models.IntegerField(default=0)
+    feedback_rating_total = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Event stats"
+
+    @property
+    def average_team_size(self):
+        return self.team_members / self.teams if self.teams else 0
+
+    @property
+    def mean_feedback_rating(self):
+        return self.feedback_rating_total / self.feedback_count if self.feedback_count else None
+
+    def __str__(self):
+        return f"Stats for {self.event.event_name}"
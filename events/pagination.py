@@ -0,0 +1,118 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision, which DjangoJSONEncoder rounds to milliseconds."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """Packs the sort-key values of a row into an opaque, URL-safe token."""
+    raw = json.dumps(list(values), cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Unpacks a cursor token. Returns None if it is missing or malformed."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def _ordering_field(queryset, name):
+    """The model field or annotation output field that `name` sorts on."""
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    try:
+        return queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return queryset.model._meta.pk if name == 'pk' else None
+
+
+def _coerce_cursor(queryset, ordering, values):
+    """
+    Converts decoded cursor values to the types of their ordering fields.
+    Returns None if any of them doesn't fit, so a tampered cursor falls back
+    to the first page instead of reaching the database.
+    """
+    coerced = []
+    for field, value in zip(ordering, values):
+        if value is None:  # Ordering fields are never null
+            return None
+        model_field = _ordering_field(queryset, field.lstrip('-'))
+        try:
+            coerced.append(model_field.to_python(value) if model_field is not None else value)
+        except (ValidationError, ValueError, TypeError):
+            return None
+    return coerced
+
+
+def _after(ordering, values):
+    """
+    Builds the filter for rows that sort strictly after `values`, i.e. the
+    expanded form of the row comparison (a, b) > (x, y) for mixed directions.
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=12):
+    """
+    Returns the page of `queryset` that follows `cursor`, sorted by `ordering`.
+    Unlike OFFSET pagination every page is a bounded index range scan, so deep
+    pages cost the same as the first. The last field in `ordering` must be
+    unique (normally the primary key) to make the order total. A cursor whose
+    values don't fit the ordering fields is ignored and the first page returned.
+    """
+    ordering = tuple(ordering)
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor, len(ordering))
+    if values is not None:
+        values = _coerce_cursor(queryset, ordering, values)
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, f.lstrip('-')) for f in ordering)
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,115 @@
+"""
+Per-user map of the staff roles held on each event.
+
+`EventStaff.role` is free text ("Lead Organizer", "Head Judge", ...). The map
+normalizes each role to a key such as 'judge' or 'manager' once, caches the
+whole map per user, and is invalidated by the EventStaff signals in
+events/signals.py. Views check roles with `has_event_role` or the
+`event_role_required` decorator; templates get the map as `event_roles`.
+"""
+from functools import wraps
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.shortcuts import redirect
+
+from .models import EventStaff
+
+# (substring of the role text, normalized role); first match wins.
+ROLE_KEYWORDS = (
+    ('judge', 'judge'),
+    ('manager', 'manager'),
+    ('organizer', 'manager'),
+    ('organiser', 'manager'),
+    ('volunteer', 'volunteer'),
+    ('mentor', 'mentor'),
+)
+ROLE_MAP_TIMEOUT = 60 * 60
+
+
+def normalize_role(role):
+    """Maps free-text role names to a known role key, or to their lower-cased text."""
+    role = ' '.join((role or '').split()).lower()
+    for keyword, key in ROLE_KEYWORDS:
+        if keyword in role:
+            return key
+    return role
+
+
+class EventRoleMap:
+    """
+    {event_id: frozenset of normalized roles} for one user. In templates,
+    `event_roles.judge` is the set of event ids the user judges.
+    """
+
+    def __init__(self, roles_by_event=None):
+        self.by_event = roles_by_event or {}
+
+    def roles_for(self, event_id):
+        try:
+            return self.by_event.get(int(event_id), frozenset())
+        except (TypeError, ValueError):
+            return frozenset()
+
+    def has_role(self, event_id, *roles):
+        """True if the user holds any of `roles` (or any role at all) on the event."""
+        held = self.roles_for(event_id)
+        return bool(held & set(roles)) if roles else bool(held)
+
+    def __getitem__(self, role):
+        return frozenset(event_id for event_id, roles in self.by_event.items() if role in roles)
+
+    def __bool__(self):
+        return bool(self.by_event)
+
+
+def role_map_cache_key(user_id):
+    return f'event_roles:user:{user_id}'
+
+
+def invalidate_role_map(user_id):
+    cache.delete(role_map_cache_key(user_id))
+
+
+def get_role_map(user):
+    """
+    Returns the EventRoleMap for `user`, from the cache when possible. The map is
+    also kept on the user object, so repeat checks in one request are free.
+    """
+    if not user.is_authenticated:
+        return EventRoleMap()
+    role_map = getattr(user, '_event_role_map', None)
+    if role_map is not None:
+        return role_map
+
+    key = role_map_cache_key(user.pk)
+    roles_by_event = cache.get(key)
+    if roles_by_event is None:
+        roles_by_event = {}
+        for event_id, role in EventStaff.objects.filter(user_id=user.pk).values_list('event_id', 'role'):
+            roles_by_event.setdefault(event_id, set()).add(normalize_role(role))
+        roles_by_event = {event_id: frozenset(roles) for event_id, roles in roles_by_event.items()}
+        cache.set(key, roles_by_event, ROLE_MAP_TIMEOUT)
+    role_map = user._event_role_map = EventRoleMap(roles_by_event)
+    return role_map
+
+
+def has_event_role(user, event_id, *roles):
+    return get_role_map(user).has_role(event_id, *roles)
+
+
+def event_role_required(*roles, event_kwarg='event_id', redirect_to='event_manager_dashboard',
+                        message="You are not authorized to access this event."):
+    """
+    View decorator: lets the request through only if the user holds one of `roles`
+    on the event named by the `event_kwarg` URL argument. Use under @login_required.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not has_event_role(request.user, kwargs.get(event_kwarg), *roles):
+                messages.error(request, message)
+                return redirect(redirect_to)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
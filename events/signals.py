@@ -0,0 +1,217 @@
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import EventRegistration
+from communications.models import Announcement
+from submissions.models import Submission, Judging
+from teams.models import Team, TeamMember
+from tracking.models import Attendance, Feedback
+from .loaders import bump_event_list_version, bump_event_page_version
+from .roles import invalidate_role_map
+from .models import Event, ProblemStatement, Schedule, SubSchedule, EventMedia, EventStaff, EventStats
+from .stats import bump_event_stats, refresh_judged_count
+
+# --- Event page cache ---
+
+# Any change to an event or one of the subtables shown on its public page
+# invalidates that page's cached fragment.
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_page(sender, instance, **kwargs):
+    bump_event_page_version(instance.pk)
+
+@receiver(post_save, sender=ProblemStatement)
+@receiver(post_delete, sender=ProblemStatement)
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+@receiver(post_save, sender=EventMedia)
+@receiver(post_delete, sender=EventMedia)
+@receiver(post_save, sender=EventStaff)
+@receiver(post_delete, sender=EventStaff)
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def invalidate_event_page_for_subtable(sender, instance, **kwargs):
+    bump_event_page_version(instance.event_id)
+
+@receiver(post_save, sender=SubSchedule)
+@receiver(post_delete, sender=SubSchedule)
+def invalidate_event_page_for_sub_schedule(sender, instance, **kwargs):
+    event_id = Schedule.objects.filter(pk=instance.schedule_id).values_list('event_id', flat=True).first()
+    if event_id is not None:
+        bump_event_page_version(event_id)
+
+# The homepage caches its first page; events and their banners appear on it.
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=EventMedia)
+@receiver(post_delete, sender=EventMedia)
+def invalidate_event_list(sender, instance, **kwargs):
+    bump_event_list_version()
+
+
+# --- Event stats ---
+# Each handler applies a small delta (or an event-scoped recount) to the
+# event's EventStats row; bulk writers bump it themselves (see bump_event_stats).
+
+REGISTRATION_STATUS_FIELDS = {
+    'registered': 'registrations_registered',
+    'cancelled': 'registrations_cancelled',
+}
+
+# The field whose old value each model's receivers need on an update.
+TRACKED_FIELDS = {
+    EventRegistration: 'status',
+    Attendance: 'is_present',
+    Feedback: 'rating',
+    EventStaff: 'user_id',
+}
+
+@receiver(post_init, sender=EventRegistration)
+@receiver(post_init, sender=Attendance)
+@receiver(post_init, sender=Feedback)
+@receiver(post_init, sender=EventStaff)
+@receiver(post_save, sender=EventRegistration)
+@receiver(post_save, sender=Attendance)
+@receiver(post_save, sender=Feedback)
+@receiver(post_save, sender=EventStaff)
+def snapshot_tracked_field(sender, instance, **kwargs):
+    """Keeps the tracked field's value as loaded (or last saved) on the instance."""
+    field = TRACKED_FIELDS[sender]
+    if field in instance.__dict__:  # Not deferred
+        setattr(instance, f'_loaded_{field}', instance.__dict__[field])
+
+def _remember_previous(instance, field):
+    """
+    Stores the value `field` had in the database before this save: the
+    snapshot taken when the instance was loaded, or a query if it was deferred.
+    """
+    previous = None
+    if not instance._state.adding and instance.pk is not None:
+        try:
+            previous = getattr(instance, f'_loaded_{field}')
+        except AttributeError:
+            previous = type(instance).objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    setattr(instance, f'_previous_{field}', previous)
+
+def _team_event_id(team_id):
+    return Team.objects.filter(pk=team_id).values_list('event_id', flat=True).first()
+
+def _submission_event_id(submission_id):
+    return Submission.objects.filter(pk=submission_id).values_list('team__event_id', flat=True).first()
+
+@receiver(post_save, sender=Event)
+def create_event_stats(sender, instance, created, **kwargs):
+    if created:
+        EventStats.objects.get_or_create(event=instance)
+
+@receiver(pre_save, sender=EventRegistration)
+def remember_registration_status(sender, instance, **kwargs):
+    _remember_previous(instance, 'status')
+
+@receiver(post_save, sender=EventRegistration)
+def count_registration(sender, instance, created, **kwargs):
+    deltas = {}
+    previous = None if created else instance._previous_status
+    if previous == instance.status:
+        return
+    if previous in REGISTRATION_STATUS_FIELDS:
+        deltas[REGISTRATION_STATUS_FIELDS[previous]] = -1
+    if instance.status in REGISTRATION_STATUS_FIELDS:
+        deltas[REGISTRATION_STATUS_FIELDS[instance.status]] = 1
+    bump_event_stats(instance.event_id, **deltas)
+
+@receiver(post_delete, sender=EventRegistration)
+def uncount_registration(sender, instance, **kwargs):
+    if instance.status in REGISTRATION_STATUS_FIELDS:
+        bump_event_stats(instance.event_id, **{REGISTRATION_STATUS_FIELDS[instance.status]: -1})
+
+@receiver(post_save, sender=Team)
+def count_team(sender, instance, created, **kwargs):
+    if created:
+        bump_event_stats(instance.event_id, teams=1)
+
+@receiver(post_delete, sender=Team)
+def uncount_team(sender, instance, **kwargs):
+    bump_event_stats(instance.event_id, teams=-1)
+
+@receiver(post_save, sender=TeamMember)
+def count_team_member(sender, instance, created, **kwargs):
+    if created:
+        bump_event_stats(_team_event_id(instance.team_id), team_members=1)
+
+@receiver(post_delete, sender=TeamMember)
+def uncount_team_member(sender, instance, **kwargs):
+    bump_event_stats(_team_event_id(instance.team_id), team_members=-1)
+
+@receiver(post_save, sender=Submission)
+def count_submission(sender, instance, created, **kwargs):
+    if created:
+        bump_event_stats(_team_event_id(instance.team_id), submissions=1)
+
+@receiver(post_delete, sender=Submission)
+def uncount_submission(sender, instance, **kwargs):
+    event_id = _team_event_id(instance.team_id)
+    bump_event_stats(event_id, submissions=-1)
+    refresh_judged_count(event_id)
+
+@receiver(post_save, sender=Judging)
+def recount_judged_for_new_score(sender, instance, created, **kwargs):
+    if created:
+        refresh_judged_count(_submission_event_id(instance.submission_id))
+
+@receiver(post_delete, sender=Judging)
+def recount_judged_for_removed_score(sender, instance, **kwargs):
+    refresh_judged_count(_submission_event_id(instance.submission_id))
+
+@receiver(post_save, sender=EventStaff)
+@receiver(post_delete, sender=EventStaff)
+def recount_judged_for_staff(sender, instance, **kwargs):
+    refresh_judged_count(instance.event_id)
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance(sender, instance, **kwargs):
+    _remember_previous(instance, 'is_present')
+
+@receiver(post_save, sender=Attendance)
+def count_attendance(sender, instance, created, **kwargs):
+    previous = False if created else bool(instance._previous_is_present)
+    bump_event_stats(instance.event_id, attendance_present=int(instance.is_present) - int(previous))
+
+@receiver(post_delete, sender=Attendance)
+def uncount_attendance(sender, instance, **kwargs):
+    if instance.is_present:
+        bump_event_stats(instance.event_id, attendance_present=-1)
+
+@receiver(pre_save, sender=Feedback)
+def remember_feedback_rating(sender, instance, **kwargs):
+    _remember_previous(instance, 'rating')
+
+@receiver(post_save, sender=Feedback)
+def count_feedback(sender, instance, created, **kwargs):
+    if created:
+        bump_event_stats(instance.event_id, feedback_count=1, feedback_rating_total=instance.rating)
+    else:
+        bump_event_stats(instance.event_id, feedback_rating_total=instance.rating - (instance._previous_rating or 0))
+
+@receiver(post_delete, sender=Feedback)
+def uncount_feedback(sender, instance, **kwargs):
+    bump_event_stats(instance.event_id, feedback_count=-1, feedback_rating_total=-instance.rating)
+
+
+# --- Staff role maps ---
+# Each user's cached role map (events.roles) is dropped whenever one of their
+# EventStaff rows changes, including when a row is moved to another user.
+
+@receiver(pre_save, sender=EventStaff)
+def remember_staff_user(sender, instance, **kwargs):
+    _remember_previous(instance, 'user_id')
+
+@receiver(post_save, sender=EventStaff)
+@receiver(post_delete, sender=EventStaff)
+def invalidate_staff_role_map(sender, instance, **kwargs):
+    invalidate_role_map(instance.user_id)
+    previous = getattr(instance, '_previous_user_id', None)
+    if previous is not None and previous != instance.user_id:
+        invalidate_role_map(previous)
@@ -0,0 +1,109 @@
+from collections import defaultdict
+
+from django.apps import apps
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import EventStats, EventStaff
+
+COUNTER_FIELDS = (
+    'registrations_registered', 'registrations_cancelled', 'teams', 'team_members',
+    'submissions', 'submissions_judged', 'attendance_present',
+    'feedback_count', 'feedback_rating_total',
+)
+
+
+def bump_event_stats(event_id, **deltas):
+    """
+    Applies counter deltas to an event's stats row in one UPDATE.
+    Events without a row are left alone; `rebuild_event_stats` creates it.
+
+    The receivers in events/signals.py call this for every save and delete
+    of a counted row. bulk_create, bulk_update and QuerySet.update() send no
+    signals, so code that writes counted rows that way must call this itself
+    with the net change. Counters are signed: a missed delta shows up as
+    drift for `rebuild_event_stats` to repair, never as a failed write.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if event_id is None or not deltas:
+        return
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    EventStats.objects.filter(event_id=event_id).update(updated_at=timezone.now(), **updates)
+
+
+def _judge_counts(event_ids=None):
+    """Returns {event_id: number of distinct judges}."""
+    # Same rule as events.roles.normalize_role: any role mentioning 'judge'.
+    judges = EventStaff.objects.filter(role__icontains='judge')
+    if event_ids is not None:
+        judges = judges.filter(event_id__in=event_ids)
+    rows = judges.values('event_id').annotate(n=Count('user', distinct=True))
+    return {row['event_id']: row['n'] for row in rows}
+
+
+def _judged_counts(event_ids=None):
+    """Returns {event_id: submissions scored by every judge of their event}."""
+    Submission = apps.get_model('submissions', 'Submission')
+    judge_counts = _judge_counts(event_ids)
+    submissions = Submission.objects.filter(team__event_id__in=list(judge_counts))
+    rows = submissions.values('pk', 'team__event_id').annotate(scored_by=Count('scores__judge', distinct=True))
+    judged = defaultdict(int)
+    for _, event_id, scored_by in rows.values_list('pk', 'team__event_id', 'scored_by').iterator():
+        if scored_by >= judge_counts[event_id]:
+            judged[event_id] += 1
+    return judged
+
+
+def refresh_judged_count(event_id):
+    """Recounts fully judged submissions for one event (scoped to that event's rows)."""
+    if event_id is None:
+        return
+    judged = _judged_counts([event_id]).get(event_id, 0)
+    EventStats.objects.filter(event_id=event_id).update(submissions_judged=judged, updated_at=timezone.now())
+
+
+def rebuild_event_stats(event_ids=None):
+    """
+    Recomputes stats from scratch with one grouped query per metric and
+    writes them back in bulk. Limits the work to `event_ids` if given.
+    Returns the number of events rebuilt.
+    """
+    Event = apps.get_model('events', 'Event')
+    EventRegistration = apps.get_model('accounts', 'EventRegistration')
+    Team = apps.get_model('teams', 'Team')
+    TeamMember = apps.get_model('teams', 'TeamMember')
+    Submission = apps.get_model('submissions', 'Submission')
+    Attendance = apps.get_model('tracking', 'Attendance')
+    Feedback = apps.get_model('tracking', 'Feedback')
+
+    events = Event.objects.all()
+    if event_ids is not None:
+        events = events.filter(pk__in=event_ids)
+    ids = list(events.values_list('pk', flat=True))
+    stats = {event_id: {field: 0 for field in COUNTER_FIELDS} for event_id in ids}
+
+    def collect(queryset, event_field, target):
+        rows = queryset.filter(**{f'{event_field}__in': ids}).values(event_field).annotate(n=Count('pk'))
+        for row in rows:
+            stats[row[event_field]][target] = row['n']
+
+    for status, target in (('registered', 'registrations_registered'), ('cancelled', 'registrations_cancelled')):
+        collect(EventRegistration.objects.filter(status=status), 'event_id', target)
+    collect(Team.objects, 'event_id', 'teams')
+    collect(TeamMember.objects, 'team__event_id', 'team_members')
+    collect(Submission.objects, 'team__event_id', 'submissions')
+    collect(Attendance.objects.filter(is_present=True), 'event_id', 'attendance_present')
+    collect(Feedback.objects, 'event_id', 'feedback_count')
+    rows = Feedback.objects.filter(event_id__in=ids).values('event_id').annotate(total=Sum('rating'))
+    for row in rows:
+        stats[row['event_id']]['feedback_rating_total'] = row['total'] or 0
+    for event_id, judged in _judged_counts(ids).items():
+        stats[event_id]['submissions_judged'] = judged
+
+    existing = set(EventStats.objects.filter(event_id__in=ids).values_list('event_id', flat=True))
+    now = timezone.now()
+    to_update = [EventStats(event_id=i, updated_at=now, **stats[i]) for i in ids if i in existing]
+    to_create = [EventStats(event_id=i, **stats[i]) for i in ids if i not in existing]
+    EventStats.objects.bulk_update(to_update, list(COUNTER_FIELDS) + ['updated_at'], batch_size=500)
+    EventStats.objects.bulk_create(to_create, batch_size=500)
+    return len(ids)
@@ -1,3 +1,390 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import EventRegistration, User
+from campusinnovate.testing import make_event
+from communications.models import Announcement
+from submissions.models import Judging, Submission
+from teams.models import Team, TeamMember
+from tracking.models import Attendance, Feedback
+from .context import get_event_context
+from .loaders import get_event_page_version, render_event_page
+from .pagination import encode_cursor, keyset_paginate
+from .roles import EventRoleMap, get_role_map, has_event_role, normalize_role
+from .models import Event, EventMedia, EventStaff, EventStats, ProblemStatement, Schedule, SubSchedule
+from .stats import COUNTER_FIELDS, rebuild_event_stats
+from .views import EventListView
+
+
+
+class EventContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        self.user = User.objects.create(username='leader')
+        self.factory = RequestFactory()
+
+    def request(self, user=None):
+        request = self.factory.get('/')
+        request.user = user or self.user
+        return request
+
+    def test_resolves_everything_in_one_query_and_memoizes(self):
+        EventRegistration.objects.create(event=self.event, participant=self.user)
+        team = Team.objects.create(event=self.event, team_name='A', leader=self.user)
+        TeamMember.objects.create(team=team, participant=self.user)
+        EventStaff.objects.create(event=self.event, user=self.user, role=' Judge ')
+        EventStaff.objects.create(event=self.event, user=self.user, role='Mentor')
+        request = self.request()
+
+        with self.assertNumQueries(1):
+            access = get_event_context(request, self.event.pk)
+            self.assertIs(get_event_context(request, str(self.event.pk)), access)
+            self.assertEqual(access.event, self.event)
+            self.assertEqual(access.team, team)
+            self.assertEqual(access.team.event.event_name, 'Hackathon')
+            self.assertTrue(access.is_registered)
+            self.assertTrue(access.is_team_leader)
+        self.assertTrue(access.is_judge)
+        self.assertEqual(access.staff_roles, {'judge', 'mentor'})
+
+    def test_other_events_and_users_do_not_leak_in(self):
+        other_event = make_event(event_name='Other')
+        other_user = User.objects.create(username='other')
+        EventRegistration.objects.create(event=other_event, participant=self.user)
+        EventRegistration.objects.create(event=self.event, participant=other_user)
+        team = Team.objects.create(event=other_event, team_name='A', leader=self.user)
+        TeamMember.objects.create(team=team, participant=self.user)
+        EventStaff.objects.create(event=self.event, user=other_user, role='judge')
+
+        access = get_event_context(self.request(), self.event.pk)
+        self.assertFalse(access.is_registered)
+        self.assertIsNone(access.team)
+        self.assertFalse(access.is_team_leader)
+        self.assertEqual(access.staff_roles, frozenset())
+
+    def test_member_who_is_not_leader(self):
+        leader = User.objects.create(username='boss')
+        team = Team.objects.create(event=self.event, team_name='A', leader=leader)
+        TeamMember.objects.create(team=team, participant=self.user)
+        access = get_event_context(self.request(), self.event.pk)
+        self.assertEqual(access.team, team)
+        self.assertFalse(access.is_team_leader)
+
+
+class EventContextQueryBudgetTests(TestCase):
+    """
+    Per-view query budgets, including the session and user lookups every logged-in
+    request makes. The counts before the shared resolver are noted alongside.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.event = make_event(event_end=timezone.now() - timezone.timedelta(days=1))
+        self.user = User.objects.create(username='leader', is_staff=True)
+        EventRegistration.objects.create(event=self.event, participant=self.user)
+        self.client.force_login(self.user)
+
+    def make_team(self):
+        team = Team.objects.create(event=self.event, team_name='A', leader=self.user)
+        TeamMember.objects.create(team=team, participant=self.user)
+        return team
+
+    def assertRedirectsWithin(self, queries, url):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        return response
+
+    def test_team_create_when_already_in_a_team(self):
+        team = self.make_team()
+        # Was 7: event, registration exists, membership exists, membership get, team.
+        response = self.assertRedirectsWithin(3, reverse('team_create', args=[self.event.pk]))
+        self.assertEqual(response.url, reverse('team_detail', args=[team.pk]))
+
+    def test_team_join_when_already_in_a_team(self):
+        self.make_team()
+        # Was 7, as above.
+        self.assertRedirectsWithin(3, reverse('team_join', args=[self.event.pk]))
+
+    def test_submission_page_for_non_leader(self):
+        team = self.make_team()
+        Team.objects.filter(pk=team.pk).update(leader=None)
+        # Used to look the team up with members=<user>, which compared TeamMember ids to the user id.
+        self.assertRedirectsWithin(3, reverse('submission_create_edit', args=[self.event.pk]))
+
+    def test_feedback_already_given(self):
+        self.event.feedback.create(participant=self.user, rating=5)
+        # Was 5: event, registration exists, existing feedback.
+        response = self.assertRedirectsWithin(4, reverse('submit_feedback', args=[self.event.pk]))
+        self.assertIn("already submitted", str(list(get_messages(response.wsgi_request))[0]))
+
+    def test_scoring_by_non_judge(self):
+        team = self.make_team()
+        submission = Submission.objects.create(team=team, project_title='P', project_description='d')
+        # Was 6: submission, team, event, judge exists.
+        self.assertRedirectsWithin(4, reverse('submission_score', args=[submission.pk]))
+        self.assertFalse(Judging.objects.exists())
+
+
+class EventRoleMapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        self.user = User.objects.create(username='staff', is_staff=True)
+
+    def fresh_user(self):
+        # A new object, as on the next request, so only the cache is shared.
+        return User.objects.get(pk=self.user.pk)
+
+    def test_normalize_role(self):
+        self.assertEqual(normalize_role(' Head  Judge '), 'judge')
+        self.assertEqual(normalize_role('Lead Organizer'), 'manager')
+        self.assertEqual(normalize_role('Photographer'), 'photographer')
+
+    def test_map_is_cached_across_requests(self):
+        EventStaff.objects.create(event=self.event, user=self.user, role='Judge')
+        EventStaff.objects.create(event=self.event, user=self.user, role='Event Manager')
+        self.assertEqual(get_role_map(self.fresh_user()).roles_for(self.event.pk), {'judge', 'manager'})
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(has_event_role(user, self.event.pk, 'judge'))
+            self.assertTrue(has_event_role(user, str(self.event.pk)))
+            self.assertFalse(has_event_role(user, self.event.pk, 'volunteer'))
+            self.assertFalse(has_event_role(user, 'not-an-id', 'judge'))
+            self.assertEqual(get_role_map(user)['judge'], {self.event.pk})
+
+    def test_staff_changes_invalidate_the_map(self):
+        staff = EventStaff.objects.create(event=self.event, user=self.user, role='Volunteer')
+        self.assertTrue(has_event_role(self.fresh_user(), self.event.pk, 'volunteer'))
+        staff.role = 'Judge'
+        staff.save()
+        self.assertTrue(has_event_role(self.fresh_user(), self.event.pk, 'judge'))
+
+        other = User.objects.create(username='other', is_staff=True)
+        self.assertFalse(get_role_map(other))
+        staff.user = other
+        staff.save()
+        self.assertFalse(get_role_map(self.fresh_user()))
+        self.assertTrue(has_event_role(User.objects.get(pk=other.pk), self.event.pk, 'judge'))
+
+        staff.delete()
+        self.assertFalse(get_role_map(User.objects.get(pk=other.pk)))
+
+    def test_empty_map_for_anonymous_users(self):
+        from django.contrib.auth.models import AnonymousUser
+        self.assertIsInstance(get_role_map(AnonymousUser()), EventRoleMap)
+        self.assertFalse(has_event_role(AnonymousUser(), self.event.pk))
+
+    def test_judging_dashboard_decorator(self):
+        self.client.force_login(self.user)
+        url = reverse('judging_dashboard', args=[self.event.pk])
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse('event_manager_dashboard'), fetch_redirect_response=False)
+        EventStaff.objects.create(event=self.event, user=self.user, role='Head Judge')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_manager_dashboard_shows_each_event_once_with_role_actions(self):
+        EventStaff.objects.create(event=self.event, user=self.user, role='Judge')
+        EventStaff.objects.create(event=self.event, user=self.user, role='Lead Organizer')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('event_manager_dashboard'))
+        content = response.content.decode()
+        self.assertEqual(content.count('<h3 class="text-2xl font-bold text-gray-800">Hackathon</h3>'), 1)
+        self.assertIn('Open Judging Portal', content)
+        self.assertIn('Manage Participants', content)
+        self.assertNotIn('View My Schedule', content)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.events = [make_event(event_name=f'E{i}', status='published', event_start=now + timedelta(days=i)) for i in range(3)]
+        self.ordering = ('-event_start', '-id')
+
+    def test_pages_follow_the_cursor(self):
+        first = keyset_paginate(Event.objects.all(), self.ordering, per_page=2)
+        self.assertEqual(first.object_list, self.events[:0:-1])
+        second = keyset_paginate(Event.objects.all(), self.ordering, first.next_cursor, per_page=2)
+        self.assertEqual((second.object_list, second.has_next), ([self.events[0]], False))
+
+    def test_malformed_cursors_fall_back_to_the_first_page(self):
+        for values in (['not-a-date', 'x'], [None, 1], [[1], {}], ['2026-01-01T00:00:00+00:00', 'x']):
+            page = keyset_paginate(Event.objects.all(), self.ordering, encode_cursor(values), per_page=2)
+            self.assertEqual(page.object_list, self.events[:0:-1])
+        response = self.client.get(reverse('home'), {'after': encode_cursor(['not-a-date', 'x'])})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'E2')
+
+
+
+class EventListViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        day = timedelta(days=1)
+        self.past = make_event(event_name='Past', status='published', event_start=now - 3 * day, event_end=now - 2 * day)
+        self.ongoing = make_event(event_name='Ongoing', status='published', event_mode='virtual',
+                                  event_start=now - day, event_end=now + day)
+        self.upcoming = make_event(event_name='Upcoming', status='published', event_start=now + 2 * day, event_end=now + 3 * day,
+                                   registration_start=now - day, registration_end=now + day)
+        make_event(event_name='Draft')
+
+    def names(self, **params):
+        return [event.event_name for event in self.client.get(reverse('home'), params).context['events']]
+
+    def test_filters(self):
+        self.assertEqual(self.names(), ['Upcoming', 'Ongoing', 'Past'])
+        self.assertEqual(self.names(mode='virtual'), ['Ongoing'])
+        self.assertEqual(self.names(when='upcoming'), ['Upcoming'])
+        self.assertEqual(self.names(when='ongoing'), ['Ongoing'])
+        self.assertEqual(self.names(when='past'), ['Past'])
+        self.assertEqual(self.names(registration='open'), ['Upcoming'])
+        self.assertEqual(self.names(mode='bogus', when='someday'), ['Upcoming', 'Ongoing', 'Past'])
+
+    @mock.patch.object(EventListView, 'paginate_by', 2)
+    def test_later_pages_follow_the_cursor(self):
+        response = self.client.get(reverse('home'), {'mode': 'physical'})
+        self.assertEqual([event.event_name for event in response.context['events']], ['Upcoming', 'Past'])
+        self.assertFalse(response.context['page'].has_next)
+        page = self.client.get(reverse('home')).context['page']
+        self.assertEqual(self.names(after=page.next_cursor), ['Past'])
+
+    def test_first_page_is_cached_until_an_event_changes(self):
+        self.names()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Upcoming', 'Ongoing', 'Past'])
+        Event.objects.filter(event_name='Draft').update(status='published')  # no signal: stays cached
+        self.assertEqual(self.names(), ['Upcoming', 'Ongoing', 'Past'])
+
+        draft = Event.objects.get(event_name='Draft')
+        draft.save()
+        self.assertEqual(self.names(), ['Upcoming', 'Draft', 'Ongoing', 'Past'])
+
+
+class EventPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event(status='published')
+        EventMedia.objects.create(event=self.event, banner_image='event_banners/banner.png')
+        Announcement.objects.create(event=self.event, title='Doors open', message='m')
+        for day in range(3):
+            schedule = Schedule.objects.create(event=self.event, day_number=day + 1, date=timezone.localdate())
+            SubSchedule.objects.create(schedule=schedule, time_start='09:00', time_end='10:00', activity_description=f'Talk {day}')
+        ProblemStatement.objects.create(event=self.event, title='Water', description='d')
+        for i in range(3):
+            EventStaff.objects.create(event=self.event, user=User.objects.create(username=f'staff{i}'), role='Mentor')
+        self.url = reverse('event-detail', args=[self.event.pk])
+
+    def test_cold_render_is_a_fixed_number_of_queries_and_warm_renders_none(self):
+        # event + media, announcements, schedules, sub-schedules, problem statements, staff + users
+        with self.assertNumQueries(6):
+            html = render_event_page(self.event.pk)
+        self.assertIn('Talk 2', html)
+        with self.assertNumQueries(0):
+            self.assertEqual(render_event_page(self.event.pk), html)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Doors open')
+
+    def test_every_subtable_change_invalidates_the_page(self):
+        schedule = Schedule.objects.first()
+        changes = {
+            'event': lambda: Event.objects.get(pk=self.event.pk).save(),
+            'media': lambda: EventMedia.objects.get(event=self.event).save(),
+            'announcement': lambda: Announcement.objects.create(event=self.event, title='t', message='m'),
+            'schedule': lambda: schedule.save(),
+            'sub-schedule': lambda: SubSchedule.objects.filter(schedule=schedule).delete(),
+            'problem statement': lambda: ProblemStatement.objects.create(event=self.event, title='Air', description='d'),
+            'staff': lambda: EventStaff.objects.filter(event=self.event).first().delete(),
+        }
+        for name, change in changes.items():
+            with self.subTest(name):
+                render_event_page(self.event.pk)
+                version = get_event_page_version(self.event.pk)
+                change()
+                self.assertNotEqual(get_event_page_version(self.event.pk), version)
+                with self.assertNumQueries(6):
+                    render_event_page(self.event.pk)
+
+    def test_other_events_keep_their_cache(self):
+        other = make_event(event_name='Other')
+        render_event_page(other.pk)
+        ProblemStatement.objects.create(event=self.event, title='Air', description='d')
+        with self.assertNumQueries(0):
+            render_event_page(other.pk)
+
+
+class EventStatsTests(TestCase):
+    def setUp(self):
+        self.event = make_event()
+        self.users = [User.objects.create(username=f'user{i}') for i in range(4)]
+
+    def counters(self):
+        return EventStats.objects.filter(event=self.event).values(*COUNTER_FIELDS).get()
+
+    def test_signals_apply_deltas(self):
+        registrations = [EventRegistration.objects.create(event=self.event, participant=user) for user in self.users]
+        team = Team.objects.create(event=self.event, team_name='A')
+        TeamMember.objects.create(team=team, participant=self.users[0])
+        member = TeamMember.objects.create(team=team, participant=self.users[1])
+        Submission.objects.create(team=team, project_title='p', project_description='d')
+        attendance = Attendance.objects.create(event=self.event, participant=self.users[0], is_present=True)
+        feedback = Feedback.objects.create(event=self.event, participant=self.users[0], rating=4)
+
+        registration = EventRegistration.objects.get(pk=registrations[0].pk)
+        registration.status = 'cancelled'
+        with self.assertNumQueries(2):  # The registration and the stats row; the old status is already known
+            registration.save()
+        registration.status = 'registered'
+        registration.save()
+        registration.status = 'cancelled'
+        registration.save()
+        registrations[1].delete()
+        member.delete()
+        attendance = Attendance.objects.get(pk=attendance.pk)
+        attendance.is_present = False
+        attendance.save()
+        feedback = Feedback.objects.get(pk=feedback.pk)
+        feedback.rating = 2
+        feedback.save()
+
+        self.assertEqual(self.counters(), {
+            'registrations_registered': 2, 'registrations_cancelled': 1, 'teams': 1, 'team_members': 1,
+            'submissions': 1, 'submissions_judged': 0, 'attendance_present': 0, 'feedback_count': 1,
+            'feedback_rating_total': 2,
+        })
+
+    def test_deferred_fields_fall_back_to_a_query(self):
+        EventRegistration.objects.create(event=self.event, participant=self.users[0])
+        registration = EventRegistration.objects.defer('status').get()
+        registration.status = 'cancelled'
+        registration.save()
+        counters = self.counters()
+        self.assertEqual((counters['registrations_registered'], counters['registrations_cancelled']), (0, 1))
+
+    def test_rebuild_matches_the_live_counters(self):
+        judge = User.objects.create(username='judge')
+        EventStaff.objects.create(event=self.event, user=judge, role='Judge')
+        for i, user in enumerate(self.users):
+            EventRegistration.objects.create(event=self.event, participant=user, status='cancelled' if i == 3 else 'registered')
+            team = Team.objects.create(event=self.event, team_name=f'T{i}')
+            TeamMember.objects.create(team=team, participant=user)
+            submission = Submission.objects.create(team=team, project_title='p', project_description='d')
+            if i % 2:
+                Judging.objects.create(judge=judge, submission=submission, score=50)
+            Attendance.objects.create(event=self.event, participant=user, is_present=i < 3)
+            Feedback.objects.create(event=self.event, participant=user, rating=i + 1)
+        live = self.counters()
+
+        EventStats.objects.filter(event=self.event).update(teams=-5, feedback_count=0)  # drift, even below zero
+        rebuild_event_stats([self.event.pk])
+        self.assertEqual(self.counters(), live)
+        self.assertEqual((live['submissions_judged'], live['feedback_rating_total']), (2, 10))
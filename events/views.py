@@ -1,29 +1,103 @@
+from urllib.parse import urlencode
+
+from django.core.cache import cache
 from django.shortcuts import render
-from django.views.generic import ListView, DetailView
+from django.utils import timezone
+from django.views.generic import View
 from django.contrib.auth.decorators import login_required, user_passes_test
-from .models import Event, EventStaff
+from tracking.occupancy import OCCUPANCY_MODES
+from .models import Event
+from .roles import get_role_map
+from .loaders import get_event_list_version, render_event_page
+from .pagination import keyset_paginate
 
 # --- Public-Facing Views ---
 
-class EventListView(ListView):
+class EventListView(View):
     """
     Displays a list of all published events. This serves as the homepage.
+    Results are keyset-paginated on (event_start, id) and can be filtered by
+    mode, timing (upcoming/ongoing/past) and open registration.
+
+    The first page of each filter combination is cached. Saving or deleting
+    an event (or its banner) invalidates it at once; the timing and
+    registration filters move with the clock and may lag it by up to
+    first_page_cache_timeout seconds.
     """
-    model = Event
     template_name = 'events/event_list.html'
-    context_object_name = 'events'
-    
+    paginate_by = 12
+    ordering = ('-event_start', '-id')
+    first_page_cache_timeout = 60
+
+    WHEN_CHOICES = ('upcoming', 'ongoing', 'past')
+
+    def get_filters(self):
+        """Returns the recognised filter values from the query string."""
+        params = self.request.GET
+        filters = {}
+        if params.get('mode') in dict(Event.MODE_CHOICES):
+            filters['mode'] = params['mode']
+        if params.get('when') in self.WHEN_CHOICES:
+            filters['when'] = params['when']
+        if params.get('registration') == 'open':
+            filters['registration'] = 'open'
+        return filters
+
     # We only want to show events that are ready for the public
     def get_queryset(self):
-        return Event.objects.filter(status='published').order_by('-event_start').select_related('media')
+        queryset = Event.objects.filter(status='published').select_related('media')
+        filters = self.get_filters()
+        now = timezone.now()
 
-class EventDetailView(DetailView):
+        if 'mode' in filters:
+            queryset = queryset.filter(event_mode=filters['mode'])
+        if filters.get('when') == 'upcoming':
+            queryset = queryset.filter(event_start__gt=now)
+        elif filters.get('when') == 'ongoing':
+            queryset = queryset.filter(event_start__lte=now, event_end__gte=now)
+        elif filters.get('when') == 'past':
+            queryset = queryset.filter(event_end__lt=now)
+        if 'registration' in filters:
+            queryset = queryset.filter(registration_start__lte=now, registration_end__gte=now)
+        return queryset
+
+    def get_page(self):
+        cursor = self.request.GET.get('after')
+        if cursor:
+            return keyset_paginate(self.get_queryset(), self.ordering, cursor, self.paginate_by)
+
+        # The first page is what almost every visitor sees, so it is cached
+        # briefly per filter combination.
+        filters = self.get_filters()
+        cache_key = f'event_list:v{get_event_list_version()}:first:' + urlencode(sorted(filters.items()))
+        page = cache.get(cache_key)
+        if page is None:
+            page = keyset_paginate(self.get_queryset(), self.ordering, None, self.paginate_by)
+            cache.set(cache_key, page, self.first_page_cache_timeout)
+        return page
+
+    def get(self, request, *args, **kwargs):
+        page = self.get_page()
+        filters = self.get_filters()
+        context = {
+            'events': page.object_list,
+            'page': page,
+            'filters': filters,
+            'mode_choices': Event.MODE_CHOICES,
+            'next_query': urlencode({**filters, 'after': page.next_cursor}) if page.has_next else '',
+        }
+        return render(request, self.template_name, context)
+
+class EventDetailView(View):
     """
     Displays the full details for a single event.
+    The event sections are rendered once per change and served from the cache.
     """
-    model = Event
     template_name = 'events/event_detail.html'
-    context_object_name = 'event'
+
+    def get(self, request, pk):
+        context = {'event_page': render_event_page(pk)}
+        return render(request, self.template_name, context)
 
 # --- Staff-Only Dashboard View ---
 
@@ -36,11 +110,16 @@ def is_staff_user(user):
 def event_manager_dashboard_view(request):
     """
     Serves as the main dashboard for all staff roles.
-    It shows events the user is specifically assigned to.
+    It shows each event the user is assigned to once, with their roles from the
+    cached role map and the event's materialized stats, in a single query.
     """
-    managed_events_qs = EventStaff.objects.filter(user=request.user).select_related('event')
+    role_map = get_role_map(request.user)
+    managed_events = list(Event.objects.filter(pk__in=list(role_map.by_event)).select_related('stats').order_by('-event_start'))
+    for event in managed_events:
+        event.my_roles = sorted(role_map.roles_for(event.pk))
+        event.shows_occupancy = event.event_mode in OCCUPANCY_MODES and role_map.has_role(event.pk, 'manager', 'volunteer')
     
     context = {
-        'managed_events': managed_events_qs,
+        'managed_events': managed_events,
     }
     return render(request, 'events/event_manager_dashboard.html', context)
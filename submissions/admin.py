@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Submission, Judging
+from .models import Submission, Judging, JudgeAssignment, RubricCriterion, DuplicateCandidate
 
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
@@ -15,3 +15,29 @@ class JudgingAdmin(admin.ModelAdmin):
     list_filter = ('submission__team__event', 'judge')
     search_fields = ('submission__project_title', 'judge__username')
     autocomplete_fields = ['submission', 'judge']
+
+@admin.register(JudgeAssignment)
+class JudgeAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('submission', 'judge', 'assigned_at')
+    list_filter = ('submission__team__event', 'judge')
+    search_fields = ('submission__project_title', 'judge__username')
+    autocomplete_fields = ['submission', 'judge']
+
+@admin.register(RubricCriterion)
+class RubricCriterionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'event', 'weight', 'max_score', 'order')
+    list_filter = ('event',)
+    search_fields = ('name', 'event__event_name')
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ('submission', 'other', 'similarity', 'same_repo', 'dismissed', 'detected_at')
+    list_filter = ('dismissed', 'same_repo', 'submission__team__event')
+    search_fields = ('submission__project_title', 'other__project_title')
+    autocomplete_fields = ['submission', 'other']
+    actions = ['dismiss']
+
+    @admin.action(description="Mark selected pairs as not duplicates")
+    def dismiss(self, request, queryset):
+        updated = queryset.update(dismissed=True)
+        self.message_user(request, f"Dismissed {updated} pair(s).")
@@ -0,0 +1,166 @@
+"""
+Judge assignment: gives every submission of an event a fixed number of
+reviewers instead of letting every judge see everything.
+
+Each submission gets `reviewers` distinct judges. The scheduler:
+- respects each judge's EventStaff.review_capacity;
+- never assigns a team's mentors or members to it;
+- balances load, so every new assignment goes to the least-loaded eligible
+  judge, preferring one who has seen the fewest submissions for the same
+  problem statement.
+
+Submissions with the fewest eligible judges are placed first.
+
+Re-running is incremental. Assignments that are still valid are kept, and
+those of judges who dropped out, or who now conflict, are removed. Only the
+missing seats are filled, so late submissions and staff changes just top up
+the plan (see submissions/signals.py). The target is stored on the event
+(Event.reviewers_per_submission), so seats left empty by a judge who dropped
+out are filled again once a replacement joins.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from events.models import Event, EventStaff
+from teams.models import Team, TeamMember
+from .models import JudgeAssignment, Judging, Submission
+
+DEFAULT_REVIEWERS = 3
+
+
+class AssignmentResult:
+    def __init__(self):
+        self.created = []    # (submission_id, judge_id) pairs added
+        self.removed = []    # (submission_id, judge_id) pairs dropped
+        self.shortfall = {}  # submission_id -> reviewers still missing
+        self.reviewers = DEFAULT_REVIEWERS
+
+
+def event_judges(event_id, default_cap=None):
+    """{judge user id: review cap or None} for everyone judging the event."""
+    capacities = {}
+    rows = EventStaff.objects.filter(event_id=event_id, role__icontains='judge').values_list('user_id', 'review_capacity')
+    for user_id, capacity in rows:
+        caps = capacities.setdefault(user_id, [])
+        if capacity is not None:
+            caps.append(capacity)
+    # A judge listed twice with different capacities gets the smaller one.
+    return {user_id: min(caps) if caps else default_cap for user_id, caps in capacities.items()}
+
+
+def event_conflicts(event_id):
+    """(user id, team id) pairs that must not be assigned: mentors and members."""
+    mentors = Team.mentors.through.objects.filter(team__event_id=event_id).values_list('user_id', 'team_id')
+    members = TeamMember.objects.filter(team__event_id=event_id).values_list('participant_id', 'team_id')
+    return set(mentors) | set(members)
+
+
+def plan_assignments(submissions, judges, existing, conflicts, reviewers):
+    """
+    Pure planning step. `submissions` is a list of (submission id, team id,
+    problem statement id); `judges` maps judge id to cap (None = unlimited);
+    `existing` maps submission id to the judge ids it already has.
+    Returns (new (submission_id, judge_id) pairs, {submission_id: missing seats}).
+    """
+    load = Counter()
+    problem_load = defaultdict(Counter)
+    problems = {submission_id: problem_id for submission_id, _, problem_id in submissions}
+    for submission_id, judge_ids in existing.items():
+        for judge_id in judge_ids:
+            load[judge_id] += 1
+            problem_load[judge_id][problems.get(submission_id)] += 1
+
+    def eligible(submission_id, team_id, assigned):
+        return [
+            judge_id for judge_id, cap in judges.items()
+            if judge_id not in assigned and (judge_id, team_id) not in conflicts
+            and (cap is None or load[judge_id] < cap)
+        ]
+
+    pending = []
+    for submission_id, team_id, problem_id in submissions:
+        assigned = existing.get(submission_id, set())
+        missing = reviewers - len(assigned)
+        if missing > 0:
+            pending.append((len(eligible(submission_id, team_id, assigned)), submission_id, team_id, problem_id, missing))
+    pending.sort()
+
+    created, shortfall = [], {}
+    for _, submission_id, team_id, problem_id, missing in pending:
+        assigned = set(existing.get(submission_id, ()))
+        for _ in range(missing):
+            candidates = eligible(submission_id, team_id, assigned)
+            if not candidates:
+                shortfall[submission_id] = reviewers - len(assigned)
+                break
+            judge_id = min(candidates, key=lambda j: (load[j], problem_load[j][problem_id], j))
+            assigned.add(judge_id)
+            load[judge_id] += 1
+            problem_load[judge_id][problem_id] += 1
+            created.append((submission_id, judge_id))
+    return created, shortfall
+
+
+def assign_judges(event_id, reviewers=None, default_cap=None, dry_run=False):
+    """
+    Brings the event's judge assignments up to date and returns an
+    AssignmentResult. `reviewers` defaults to the number the event was last
+    planned with, or DEFAULT_REVIEWERS; a new target is saved on the event.
+    """
+    result = AssignmentResult()
+    with transaction.atomic():
+        # Runs for concurrent late submissions and staff changes are serialized on the event row.
+        planned = Event.objects.select_for_update().filter(pk=event_id).values_list('reviewers_per_submission', flat=True).first()
+        judges = event_judges(event_id, default_cap)
+        conflicts = event_conflicts(event_id)
+        submissions = list(Submission.objects.filter(team__event_id=event_id).values_list('pk', 'team_id', 'problem_statement_id'))
+        teams = {submission_id: team_id for submission_id, team_id, _ in submissions}
+        rows = list(JudgeAssignment.objects.filter(submission__team__event_id=event_id).values_list('pk', 'submission_id', 'judge_id'))
+        scored = set(Judging.objects.filter(submission__team__event_id=event_id).values_list('submission_id', 'judge_id'))
+
+        existing, stale = defaultdict(set), []
+        for pk, submission_id, judge_id in rows:
+            if judge_id not in judges or (judge_id, teams[submission_id]) in conflicts:
+                stale.append((pk, submission_id, judge_id))
+            else:
+                existing[submission_id].add(judge_id)
+        pks = {(submission_id, judge_id): pk for pk, submission_id, judge_id in rows}
+
+        if reviewers is None:
+            # Events planned before the target was stored fall back to the most reviewers any submission has.
+            reviewers = planned or max((len(judge_ids) for judge_ids in existing.values()), default=DEFAULT_REVIEWERS)
+        result.reviewers = reviewers
+
+        # If the target went down, drop surplus reviewers who haven't scored yet.
+        load = Counter(judge_id for judge_ids in existing.values() for judge_id in judge_ids)
+        for submission_id, judge_ids in existing.items():
+            surplus = len(judge_ids) - reviewers
+            for judge_id in sorted((j for j in judge_ids if (submission_id, j) not in scored), key=lambda j: -load[j]):
+                if surplus <= 0:
+                    break
+                judge_ids.discard(judge_id)
+                load[judge_id] -= 1
+                stale.append((pks[submission_id, judge_id], submission_id, judge_id))
+                surplus -= 1
+
+        result.created, result.shortfall = plan_assignments(submissions, judges, existing, conflicts, reviewers)
+        result.removed = [(submission_id, judge_id) for _, submission_id, judge_id in stale]
+        if dry_run:
+            return result
+
+        if reviewers != planned:
+            Event.objects.filter(pk=event_id).update(reviewers_per_submission=reviewers)
+        if stale:
+            JudgeAssignment.objects.filter(pk__in=[pk for pk, _, _ in stale]).delete()
+        JudgeAssignment.objects.bulk_create(
+            [JudgeAssignment(submission_id=submission_id, judge_id=judge_id) for submission_id, judge_id in result.created],
+            batch_size=1000, ignore_conflicts=True,
+        )
+    return result
+
+
+def rebalance_if_assigned(event_id):
+    """Tops up an event's assignments, if the organizers have started using them."""
+    if JudgeAssignment.objects.filter(submission__team__event_id=event_id).exists():
+        assign_judges(event_id)
@@ -0,0 +1,63 @@
+"""
+Batch scoring: a judge scores a whole page of their queue in one form.
+
+Nothing is written when the page is opened. On submit, the rows the judge
+changed are saved with one upserting bulk_create inside a transaction, and
+the cached leaderboard is patched once for the whole batch. bulk_create
+sends no post_save signals, so the leaderboard update and the event's
+judged-submission count are done here.
+"""
+from django.db import connection, transaction
+
+from events.stats import refresh_judged_count
+from .forms import JudgingForm
+from .leaderboard import apply_score_changes
+from .models import Judging
+
+BATCH_PAGE_SIZE = 20
+
+
+def batch_scoring_forms(submissions, judge, rubric, data=None):
+    """
+    One JudgingForm per submission, prefilled with the judge's existing score.
+    Rows left untouched are skipped by validation and saving.
+    """
+    existing = {
+        judging.submission_id: judging
+        for judging in Judging.objects.filter(judge=judge, submission__in=[s.pk for s in submissions])
+    }
+    rows = []
+    for submission in submissions:
+        instance = existing.get(submission.pk) or Judging(judge=judge, submission_id=submission.pk)
+        form = JudgingForm(
+            data, instance=instance, rubric=rubric, prefix=f'submission-{submission.pk}',
+            empty_permitted=True, use_required_attribute=False,
+        )
+        rows.append((submission, form))
+    return rows
+
+
+def save_batch_scores(event_id, forms):
+    """
+    Saves the changed rows of a validated batch and returns how many there were.
+    """
+    # Fresh rows without a pk, so existing scores conflict on (judge, submission) and are updated.
+    changed = [
+        Judging(judge_id=form.instance.judge_id, submission_id=form.instance.submission_id, score=form.instance.score,
+                feedback=form.instance.feedback, criterion_scores=form.instance.criterion_scores)
+        for form in forms if form.has_changed()
+    ]
+    if not changed:
+        return 0
+    update_fields = ['score', 'feedback', 'criterion_scores']
+    # MySQL upserts on any unique key and rejects an explicit target.
+    unique_fields = ['judge', 'submission'] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        Judging.objects.bulk_create(changed, update_conflicts=True, update_fields=update_fields, unique_fields=unique_fields)
+        scores = [(judging.judge_id, judging.submission_id, judging.score) for judging in changed]
+
+        def after_commit():
+            apply_score_changes(event_id, scores)
+            refresh_judged_count(event_id)
+        transaction.on_commit(after_commit)
+    return len(changed)
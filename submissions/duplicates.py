@@ -0,0 +1,240 @@
+"""
+Near-duplicate submission detection across all events.
+
+Each submission's title and description are split into overlapping 3-word
+shingles, and the shingle set is reduced to a MinHash signature of
+NUM_PERM values. Two signatures agree in about the same fraction of
+positions as the Jaccard similarity of the shingle sets.
+
+Rather than comparing every pair, signatures are cut into BANDS bands of
+ROWS values. Only submissions that share a band hash (an LSH bucket) are
+compared. With 32 bands of 4 rows, pairs at 0.5 similarity become
+candidates about 87% of the time, and pairs at 0.7 about 99.9% of the time.
+Submissions with the same repository link are always flagged.
+
+Saving a submission re-indexes just that submission (see signals.py).
+`index_all_submissions` rebuilds everything in bulk; see the
+index_duplicates management command.
+"""
+import re
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+from itertools import combinations
+from urllib.parse import urlsplit
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .models import DuplicateCandidate, LSHBucket, Submission, SubmissionFingerprint
+
+NUM_PERM = 128
+BANDS, ROWS = 32, 4
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.5
+
+_rng = np.random.default_rng(20250101)  # fixed: stored signatures must stay comparable
+# x -> a*x + b (mod 2**32) with odd a is a permutation of the 32-bit values,
+# and uint32 arithmetic wraps for free.
+_PERM_A = _rng.integers(0, 2**32, size=NUM_PERM, dtype=np.uint32) | np.uint32(1)
+_PERM_B = _rng.integers(0, 2**32, size=NUM_PERM, dtype=np.uint32)
+_SHINGLE_MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)
+_BAND_MIX = np.uint64(0x100000001B3)
+_WORD = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=100_000)
+def _word_hash(word):
+    return zlib.crc32(word.encode())
+
+
+def shingle_hashes(*texts):
+    """The distinct 32-bit hashes of the text's 3-word shingles (fewer words: the words)."""
+    words = np.fromiter((_word_hash(w) for text in texts for w in _WORD.findall((text or '').lower())), dtype=np.uint64)
+    if len(words) >= SHINGLE_SIZE:
+        n = len(words) - SHINGLE_SIZE + 1
+        words = sum(words[i:i + n] * _SHINGLE_MIX[i] for i in range(SHINGLE_SIZE)) >> np.uint64(32)
+    return np.unique(words).astype(np.uint32)
+
+
+def minhash(hashes):
+    """NUM_PERM uint32 MinHash values of a shingle hash set, or None if it is empty."""
+    if not len(hashes):
+        return None
+    return (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]).min(axis=1)
+
+
+def minhash_many(hash_sets, chunk=4096):
+    """
+    minhash for many shingle hash sets at once, as an (n, NUM_PERM) array.
+    Sets must be non-empty. Shingles of consecutive sets are hashed together
+    in cache-sized chunks of about `chunk` and reduced per set.
+    """
+    signatures = np.empty((len(hash_sets), NUM_PERM), dtype=np.uint32)
+    start = 0
+    while start < len(hash_sets):
+        end, size = start, 0
+        while end < len(hash_sets) and (size == 0 or size + len(hash_sets[end]) <= chunk):
+            size += len(hash_sets[end])
+            end += 1
+        hashes = np.concatenate(hash_sets[start:end])
+        offsets = np.cumsum([0] + [len(h) for h in hash_sets[start:end - 1]])
+        values = _PERM_A[:, None] * hashes[None, :]
+        values += _PERM_B[:, None]
+        signatures[start:end] = np.minimum.reduceat(values, offsets, axis=1).T
+        start = end
+    return signatures
+
+
+def band_hashes(signatures):
+    """(n, BANDS) signed 64-bit LSH bucket ids for (n, NUM_PERM) signatures."""
+    bands = signatures.astype(np.uint64).reshape(len(signatures), BANDS, ROWS)
+    hashed = np.broadcast_to(np.arange(BANDS, dtype=np.uint64), (len(signatures), BANDS)).copy()
+    for row in range(ROWS):
+        hashed = hashed * _BAND_MIX ^ bands[:, :, row]
+    return hashed.view(np.int64)
+
+
+def repo_key(url):
+    """'https://www.GitHub.com/Org/Repo.git/' -> 'github.com/org/repo'."""
+    if not url:
+        return ''
+    parts = urlsplit(url.strip() if '//' in url else f'//{url.strip()}')
+    host = parts.netloc.lower().removeprefix('www.')
+    path = parts.path.lower().strip('/').removesuffix('.git')
+    return f'{host}/{path}'[:255] if host and path else ''
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures (None = no text)."""
+    if a is None or b is None:
+        return 0.0
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _signature(blob):
+    return np.frombuffer(bytes(blob), dtype='<u4') if blob else None
+
+
+def _blob(signature):
+    return signature.astype('<u4').tobytes() if signature is not None else b''
+
+
+def _fingerprint(title, description, repo_link):
+    signature = minhash(shingle_hashes(title, description))
+    return signature, repo_key(repo_link)
+
+
+def _candidate(first, second, score, same_repo):
+    first, second = sorted((first, second))
+    return DuplicateCandidate(submission_id=first, other_id=second, similarity=score, same_repo=same_repo)
+
+
+def _replace_candidates(candidates, submission_ids=None):
+    """
+    Swaps in freshly detected pairs. Pairs an organizer dismissed stay
+    dismissed (ignore_conflicts keeps the old row).
+    """
+    stale = DuplicateCandidate.objects.filter(dismissed=False)
+    if submission_ids is not None:
+        stale = stale.filter(Q(submission_id__in=submission_ids) | Q(other_id__in=submission_ids))
+    stale.delete()
+    DuplicateCandidate.objects.bulk_create(candidates, batch_size=1000, ignore_conflicts=True)
+
+
+def index_submission(submission_id, threshold=DUPLICATE_THRESHOLD):
+    """
+    Re-fingerprints one submission and re-checks it against the index. Costs a
+    handful of queries however many submissions are indexed. Returns the
+    DuplicateCandidates found.
+    """
+    row = Submission.objects.filter(pk=submission_id).values_list('project_title', 'project_description', 'repo_link').first()
+    if row is None:
+        return []
+    signature, repo = _fingerprint(*row)
+    buckets = band_hashes(signature[None, :])[0].tolist() if signature is not None else []
+
+    with transaction.atomic():
+        SubmissionFingerprint.objects.update_or_create(
+            submission_id=submission_id,
+            defaults={'signature': _blob(signature), 'repo_key': repo},
+        )
+        LSHBucket.objects.filter(submission_id=submission_id).delete()
+        LSHBucket.objects.bulk_create([LSHBucket(submission_id=submission_id, bucket=bucket) for bucket in buckets])
+
+        matches = Q(submission_id__in=set(LSHBucket.objects.filter(bucket__in=buckets).values_list('submission_id', flat=True)))
+        if repo:
+            matches |= Q(repo_key=repo)
+        others = (
+            SubmissionFingerprint.objects.filter(matches).exclude(submission_id=submission_id)
+            .values_list('submission_id', 'signature', 'repo_key')
+        )
+        candidates = []
+        for other_id, blob, other_repo in others:
+            score, same_repo = similarity(signature, _signature(blob)), bool(repo) and repo == other_repo
+            if score >= threshold or same_repo:
+                candidates.append(_candidate(submission_id, other_id, score, same_repo))
+        _replace_candidates(candidates, [submission_id])
+    return candidates
+
+
+def _lsh_pairs(buckets):
+    """Row index pairs sharing at least one bucket, from an (n, BANDS) array."""
+    pairs = set()
+    for band in buckets.T:
+        order = np.argsort(band, kind='stable')
+        sorted_band = band[order]
+        # Start and end of each run of equal bucket ids longer than one.
+        edges = np.flatnonzero(np.diff(sorted_band)) + 1
+        starts, ends = np.r_[0, edges], np.r_[edges, len(band)]
+        for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+            pairs.update(combinations(order[start:end].tolist(), 2))
+    return pairs
+
+
+def index_all_submissions(threshold=DUPLICATE_THRESHOLD):
+    """
+    Re-checks every submission against every other with numpy-side LSH and
+    replaces the candidate pairs. Only fingerprints whose text or repository
+    changed are rewritten. Returns the number of candidate pairs.
+    """
+    rows = list(Submission.objects.values_list('pk', 'project_title', 'project_description', 'repo_link'))
+    stored = {pk: (bytes(blob), repo) for pk, blob, repo in SubmissionFingerprint.objects.values_list('submission_id', 'signature', 'repo_key')}
+
+    hash_sets = [shingle_hashes(title, description) for _, title, description, _ in rows]
+    ids = [pk for (pk, *_), hashes in zip(rows, hash_sets) if len(hashes)]
+    signatures = minhash_many([hashes for hashes in hash_sets if len(hashes)])
+    buckets = band_hashes(signatures)
+    by_id = dict(zip(ids, signatures))
+    row_of = {pk: i for i, pk in enumerate(ids)}
+
+    repos, fingerprints, bucket_rows = defaultdict(list), [], []
+    for pk, _, _, repo_link in rows:
+        repo = repo_key(repo_link)
+        if repo:
+            repos[repo].append(pk)
+        blob = _blob(by_id.get(pk))
+        if stored.get(pk) != (blob, repo):
+            fingerprints.append(SubmissionFingerprint(submission_id=pk, signature=blob, repo_key=repo))
+            if pk in row_of:
+                bucket_rows.extend(LSHBucket(submission_id=pk, bucket=bucket) for bucket in buckets[row_of[pk]].tolist())
+
+    candidates = {}
+    pairs = np.array(sorted(_lsh_pairs(buckets)), dtype=np.int64).reshape(-1, 2)
+    scores = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    keep = scores >= threshold
+    for (i, j), score in zip(pairs[keep].tolist(), scores[keep].tolist()):
+        candidates[ids[i], ids[j]] = (score, False)
+    for same_repo_ids in repos.values():
+        for first, second in combinations(same_repo_ids, 2):
+            candidates[first, second] = (similarity(by_id.get(first), by_id.get(second)), True)
+
+    changed = [fingerprint.submission_id for fingerprint in fingerprints]
+    with transaction.atomic():
+        SubmissionFingerprint.objects.filter(submission_id__in=changed).delete()
+        LSHBucket.objects.filter(submission_id__in=changed).delete()
+        SubmissionFingerprint.objects.bulk_create(fingerprints, batch_size=1000)
+        LSHBucket.objects.bulk_create(bucket_rows, batch_size=5000)
+        _replace_candidates([_candidate(a, b, score, same_repo) for (a, b), (score, same_repo) in candidates.items()])
+    return len(candidates)
@@ -0,0 +1,110 @@
+"""
+Streaming per-event results export as CSV or JSON Lines.
+
+Submissions are read with `iterator(chunk_size=...)`. Each chunk brings its
+teams, members, problem statements, judges and scores along in a fixed
+number of queries, and each row is written out as soon as it is built.
+Memory stays flat however large the event is, and the first rows go out
+before the last chunk has been read.
+"""
+import csv
+import json
+
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+
+from campusinnovate.streaming import Echo, buffered
+from teams.models import TeamMember
+from .leaderboard import get_leaderboard
+from .models import Judging, Submission
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/jsonl',
+}
+SUBMISSION_COLUMNS = (
+    'rank', 'normalized_mean', 'raw_mean', 'submission_id', 'project_title', 'team', 'team_code', 'members',
+    'problem_statement', 'repo_link', 'demo_link', 'submitted_at',
+)
+SCORE_COLUMNS = ('judge', 'score', 'criterion_scores', 'feedback')
+
+
+def export_queryset(event_id):
+    return (
+        Submission.objects.filter(team__event_id=event_id)
+        .select_related('team', 'problem_statement')
+        .prefetch_related(
+            Prefetch(
+                'team__members',
+                queryset=TeamMember.objects.select_related('participant').only('team_id', 'participant__username').order_by('pk'),
+            ),
+            Prefetch(
+                'scores',
+                queryset=Judging.objects.select_related('judge')
+                .only('submission_id', 'score', 'criterion_scores', 'feedback', 'judge__username').order_by('pk'),
+            ),
+        )
+        .order_by('pk')
+    )
+
+
+def export_records(event_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yields one dict per submission, with its members and every judge's score."""
+    ranks = {row.submission_id: row for row in get_leaderboard(event_id).rows()}
+    for submission in export_queryset(event_id).iterator(chunk_size=chunk_size):
+        ranked = ranks.get(submission.pk)
+        problem = submission.problem_statement
+        yield {
+            'rank': ranked.rank if ranked else None,
+            'normalized_mean': ranked.normalized_mean if ranked else None,
+            'raw_mean': ranked.raw_mean if ranked else None,
+            'submission_id': submission.pk,
+            'project_title': submission.project_title,
+            'team': submission.team.team_name,
+            'team_code': submission.team.team_code,
+            'members': [member.participant.username for member in submission.team.members.all()],
+            'problem_statement': problem.title if problem else None,
+            'repo_link': submission.repo_link,
+            'demo_link': submission.demo_link,
+            'submitted_at': submission.submitted_at.isoformat(),
+            'scores': [
+                {
+                    'judge': judging.judge.username,
+                    'score': judging.score,
+                    'criterion_scores': judging.criterion_scores,
+                    'feedback': judging.feedback,
+                }
+                for judging in submission.scores.all()
+            ],
+        }
+
+
+def csv_lines(records):
+    """One CSV line per judge score; unscored submissions get a line of their own."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(SUBMISSION_COLUMNS + SCORE_COLUMNS)
+    for record in records:
+        submission = [record[column] for column in SUBMISSION_COLUMNS]
+        submission[SUBMISSION_COLUMNS.index('members')] = '; '.join(record['members'])
+        for judging in record['scores'] or [{}]:
+            criterion_scores = judging.get('criterion_scores')
+            yield writer.writerow(submission + [
+                judging.get('judge'),
+                judging.get('score'),
+                json.dumps(criterion_scores) if criterion_scores else None,
+                judging.get('feedback'),
+            ])
+
+
+def jsonl_lines(records):
+    """One JSON object per submission and line."""
+    for record in records:
+        yield json.dumps(record) + '\n'
+
+
+def results_export_response(event, fmt):
+    lines = csv_lines if fmt == 'csv' else jsonl_lines
+    response = StreamingHttpResponse(buffered(lines(export_records(event.pk))), content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="event-{event.pk}-results.{fmt}"'
+    return response
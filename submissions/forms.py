@@ -58,3 +58,33 @@ class JudgingForm(forms.ModelForm):
         model = Judging
         fields = ['score', 'feedback']
 
+    def __init__(self, *args, **kwargs):
+        # With a rubric (see rubric.py), the single score is replaced by one field per criterion.
+        self.rubric = kwargs.pop('rubric', None)
+        super().__init__(*args, **kwargs)
+        if self.rubric is None or self.rubric.is_single_score:
+            return
+        del self.fields['score']
+        saved = self.instance.criterion_scores or {}
+        for criterion in self.rubric.criteria:
+            self.fields[f'criterion_{criterion.pk}'] = forms.FloatField(
+                label=f"{criterion.name} (0-{criterion.max_score})",
+                min_value=0,
+                max_value=criterion.max_score,
+                initial=saved.get(str(criterion.pk)),
+                widget=forms.NumberInput(attrs={'class': 'w-full p-2 border rounded-md'}),
+                help_text=criterion.description,
+            )
+
+    def criterion_fields(self):
+        return [field for field in self if field.name.startswith('criterion_')]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.rubric is not None and not self.rubric.is_single_score:
+            scores = {str(criterion.pk): cleaned_data.get(f'criterion_{criterion.pk}') for criterion in self.rubric.criteria}
+            if None not in scores.values():
+                self.instance.criterion_scores = scores
+                self.instance.score = self.rubric.total(scores)
+        return cleaned_data
+
@@ -0,0 +1,186 @@
+"""
+Event leaderboards with per-judge score normalization.
+
+Judges score on their own scale: a harsh judge's 60 can mean what a lenient
+judge's 85 means. Besides the raw mean, every score is turned into a z-score
+against the judge's own scores (how far above or below their usual score it
+is), and submissions are ranked by the mean of those z-scores.
+
+The judge x submission matrix is loaded in one query and kept in the cache per
+event. When a single Judging row changes, only that judge's row of z-scores is
+recomputed (see `Leaderboard.set_score`), so scoring never triggers a full
+rebuild. If two updates race, the cached board is dropped and rebuilt lazily.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import Judging
+
+LEADERBOARD_TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 5
+
+LeaderboardRow = namedtuple('LeaderboardRow', 'rank submission_id raw_mean normalized_mean judge_count')
+
+
+def _z_scores(row):
+    """
+    z-scores for one judge's row of scores (NaN where they gave none). A judge
+    with fewer than two scores, or who gave everyone the same score, says
+    nothing about relative quality, so their scores count as 0.
+    """
+    scored = ~np.isnan(row)
+    z = np.where(scored, 0.0, np.nan)
+    if scored.sum() >= 2:
+        values = row[scored]
+        std = values.std()
+        if std > 0:
+            z[scored] = (values - values.mean()) / std
+    return z
+
+
+class Leaderboard:
+    def __init__(self, judge_ids, submission_ids, scores):
+        self.judge_index = {judge_id: i for i, judge_id in enumerate(judge_ids)}
+        self.submission_index = {submission_id: i for i, submission_id in enumerate(submission_ids)}
+        self.judge_ids = list(judge_ids)
+        self.submission_ids = np.asarray(submission_ids, dtype=np.int64)
+        self.scores = scores  # float64, judges x submissions, NaN = not scored
+        scored = ~np.isnan(scores)
+        self.counts = scored.sum(axis=0)
+        self.raw_sums = np.where(scored, scores, 0.0).sum(axis=0)
+        z = np.vstack([_z_scores(row) for row in scores]) if len(scores) else np.zeros_like(scores)
+        self.z_sums = np.nan_to_num(z).sum(axis=0)
+
+    @classmethod
+    def from_triples(cls, triples):
+        """Builds a board from (judge_id, submission_id, score) rows."""
+        triples = list(triples)
+        judge_ids = sorted({judge_id for judge_id, _, _ in triples})
+        submission_ids = sorted({submission_id for _, submission_id, _ in triples})
+        board = cls.__new__(cls)
+        board.judge_index = {judge_id: i for i, judge_id in enumerate(judge_ids)}
+        board.submission_index = {submission_id: i for i, submission_id in enumerate(submission_ids)}
+        scores = np.full((len(judge_ids), len(submission_ids)), np.nan)
+        if triples:
+            judges, submissions, values = zip(*triples)
+            rows = np.fromiter((board.judge_index[j] for j in judges), dtype=np.int64, count=len(triples))
+            cols = np.fromiter((board.submission_index[s] for s in submissions), dtype=np.int64, count=len(triples))
+            scores[rows, cols] = np.asarray(values, dtype=np.float64)
+        board.__init__(judge_ids, submission_ids, scores)
+        return board
+
+    def _grow(self, judge_id, submission_id):
+        if judge_id not in self.judge_index:
+            self.judge_index[judge_id] = len(self.judge_ids)
+            self.judge_ids.append(judge_id)
+            self.scores = np.vstack([self.scores, np.full((1, self.scores.shape[1]), np.nan)])
+        if submission_id not in self.submission_index:
+            self.submission_index[submission_id] = len(self.submission_ids)
+            self.submission_ids = np.append(self.submission_ids, submission_id)
+            self.scores = np.hstack([self.scores, np.full((self.scores.shape[0], 1), np.nan)])
+            self.counts = np.append(self.counts, 0)
+            self.raw_sums = np.append(self.raw_sums, 0.0)
+            self.z_sums = np.append(self.z_sums, 0.0)
+
+    def set_score(self, judge_id, submission_id, score):
+        """
+        Applies one Judging change (`score` None means deleted). Costs one pass
+        over the judge's row instead of the whole matrix.
+        """
+        if score is None and (judge_id not in self.judge_index or submission_id not in self.submission_index):
+            return
+        self._grow(judge_id, submission_id)
+        j, s = self.judge_index[judge_id], self.submission_index[submission_id]
+        row = self.scores[j]
+        old = row[s]
+        new = np.nan if score is None else float(score)
+
+        old_z = np.nan_to_num(_z_scores(row))
+        if not np.isnan(old):
+            self.counts[s] -= 1
+            self.raw_sums[s] -= old
+        if not np.isnan(new):
+            self.counts[s] += 1
+            self.raw_sums[s] += new
+        row[s] = new
+        self.z_sums += np.nan_to_num(_z_scores(row)) - old_z
+
+    def rows(self):
+        """Ranked LeaderboardRows for every submission with at least one score."""
+        scored = self.counts > 0
+        counts = self.counts[scored]
+        raw = self.raw_sums[scored] / counts
+        normalized = self.z_sums[scored] / counts
+        ids = self.submission_ids[scored]
+        # Best normalized mean first, then best raw mean, then oldest submission.
+        order = np.lexsort((ids, -raw, -normalized))
+
+        result, rank, previous = [], 0, None
+        for position, i in enumerate(order, start=1):
+            key = (round(float(normalized[i]), 9), round(float(raw[i]), 9))
+            if key != previous:
+                rank, previous = position, key
+            result.append(LeaderboardRow(rank, int(ids[i]), float(raw[i]), float(normalized[i]), int(counts[i])))
+        return result
+
+
+def leaderboard_cache_key(event_id):
+    return f'leaderboard:event:{event_id}'
+
+
+def build_leaderboard(event_id):
+    """Loads every score for the event in one query and computes the board."""
+    triples = Judging.objects.filter(submission__team__event_id=event_id).values_list('judge_id', 'submission_id', 'score')
+    return Leaderboard.from_triples(triples)
+
+
+def _store(key, board):
+    """
+    Caches `board` unless a score changed while it was being built or updated
+    (see apply_score_change); then the board may be missing that change.
+    """
+    cache.set(key, board, LEADERBOARD_TIMEOUT)
+    if cache.get(f'{key}:stale'):
+        cache.delete_many([key, f'{key}:stale'])
+
+
+def get_leaderboard(event_id):
+    key = leaderboard_cache_key(event_id)
+    board = cache.get(key)
+    if board is None:
+        board = build_leaderboard(event_id)
+        _store(key, board)
+    return board
+
+
+def apply_score_change(event_id, judge_id, submission_id, score):
+    """
+    Updates the cached board for one changed (or deleted, score=None) Judging
+    row. Boards that aren't cached are left to be built on the next read.
+    """
+    apply_score_changes(event_id, [(judge_id, submission_id, score)])
+
+
+def apply_score_changes(event_id, changes):
+    """apply_score_change for many (judge_id, submission_id, score) rows at once."""
+    key = leaderboard_cache_key(event_id)
+    lock, stale = f'{key}:lock', f'{key}:stale'
+    if not cache.add(lock, 1, LOCK_TIMEOUT):
+        # Another update is in flight. Drop the board rather than lose this change,
+        # and flag it so the other update doesn't write its copy back afterwards.
+        cache.set(stale, 1, LOCK_TIMEOUT)
+        cache.delete(key)
+        return
+    try:
+        board = cache.get(key)
+        if board is None:
+            # A rebuild may be reading the scores right now, before this change.
+            cache.set(stale, 1, LOCK_TIMEOUT)
+        else:
+            for judge_id, submission_id, score in changes:
+                board.set_score(judge_id, submission_id, score)
+            _store(key, board)
+    finally:
+        cache.delete(lock)
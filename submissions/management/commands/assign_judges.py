@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event
+from submissions.assignment import assign_judges
+
+
+class Command(BaseCommand):
+    help = "Assigns a fixed number of judges to every submission of an event, balancing each judge's load."
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument('--reviewers', type=int, help="Judges per submission (default: as last planned, or 3).")
+        parser.add_argument('--cap', type=int, help="Review cap for judges without their own review capacity.")
+        parser.add_argument('--dry-run', action='store_true', help="Print the changes without saving them.")
+
+    def handle(self, *args, **options):
+        if not Event.objects.filter(pk=options['event_id']).exists():
+            raise CommandError(f"Event {options['event_id']} does not exist.")
+        if options['reviewers'] is not None and options['reviewers'] < 1:
+            raise CommandError("--reviewers must be at least 1.")
+        if options['cap'] is not None and options['cap'] < 0:
+            raise CommandError("--cap cannot be negative.")
+
+        started = time.perf_counter()
+        result = assign_judges(
+            options['event_id'], reviewers=options['reviewers'], default_cap=options['cap'], dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+
+        add, remove = ("Would add", "remove") if options['dry_run'] else ("Added", "removed")
+        self.stdout.write(self.style.SUCCESS(
+            f"{add} {len(result.created)} and {remove} {len(result.removed)} assignment(s) "
+            f"for {result.reviewers} judge(s) per submission in {elapsed:.2f}s."
+        ))
+        if result.shortfall:
+            self.stdout.write(self.style.WARNING(
+                f"{len(result.shortfall)} submission(s) are short of judges; add judges or raise their review capacity."
+            ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from submissions.duplicates import DUPLICATE_THRESHOLD, index_all_submissions
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the near-duplicate index of every submission and flags likely copies for organizers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD,
+                            help="Minimum estimated text similarity (0-1) to flag a pair.")
+
+    def handle(self, *args, **options):
+        if not 0 < options['threshold'] <= 1:
+            raise CommandError("--threshold must be between 0 and 1.")
+
+        started = time.perf_counter()
+        pairs = index_all_submissions(threshold=options['threshold'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Indexed all submissions and found {pairs} candidate pair(s) in {elapsed:.2f}s."))
@@ -1,7 +1,8 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.conf import settings
 from teams.models import Team
-from events.models import ProblemStatement
+from events.models import Event, ProblemStatement
 
 class Submission(models.Model):
     """
@@ -42,7 +43,12 @@ class Judging(models.Model):
     judge = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='judging_scores')
     submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='scores')
     
-    score = models.FloatField(help_text="Score, e.g., out of 100.")
+    score = models.FloatField(help_text="Score, e.g., out of 100. With a rubric, the weighted total of the criterion scores.")
+    criterion_scores = models.JSONField(
+        blank=True,
+        null=True,
+        help_text="With a rubric: {criterion id: score}, see submissions/rubric.py."
+    )
     feedback = models.TextField(blank=True, null=True, help_text="Constructive feedback for the team.")
 
     class Meta:
@@ -52,3 +58,75 @@ class Judging(models.Model):
 
     def __str__(self):
         return f"Score for {self.submission.project_title} by {self.judge.username}"
+
+class RubricCriterion(models.Model):
+    """
+    One weighted criterion of an event's judging rubric. Events without criteria
+    are judged on a single 0-100 score.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='rubric_criteria')
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True, help_text="What judges should look for.")
+    weight = models.FloatField(default=1, help_text="Relative weight in the total score.")
+    max_score = models.PositiveIntegerField(default=10, validators=[MinValueValidator(1)], help_text="Judges score this criterion from 0 to this value.")
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['order', 'id']
+        unique_together = ('event', 'name')
+        verbose_name_plural = "Rubric Criteria"
+
+    def __str__(self):
+        return f"{self.name} ({self.event.event_name})"
+
+class JudgeAssignment(models.Model):
+    """
+    A submission a judge is asked to review, created by submissions/assignment.py.
+    Judges only see their assigned submissions once an event has assignments.
+    """
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='assignments')
+    judge = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='judging_assignments')
+    assigned_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('submission', 'judge')
+
+    def __str__(self):
+        return f"{self.judge.username} reviews {self.submission.project_title}"
+
+class SubmissionFingerprint(models.Model):
+    """
+    MinHash signature of a submission's title and description, kept up to date
+    by submissions/duplicates.py for near-duplicate detection across events.
+    """
+    submission = models.OneToOneField(Submission, on_delete=models.CASCADE, related_name='fingerprint')
+    signature = models.BinaryField(help_text="MinHash values as little-endian uint32s; empty when there is no text.")
+    repo_key = models.CharField(max_length=255, blank=True, db_index=True, help_text="Normalized repository URL.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Fingerprint of submission {self.submission_id}"
+
+class LSHBucket(models.Model):
+    """One LSH band hash of a submission's signature; submissions sharing a bucket are compared."""
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='lsh_buckets')
+    bucket = models.BigIntegerField(db_index=True)
+
+class DuplicateCandidate(models.Model):
+    """
+    A pair of submissions that look like copies of each other, for organizers
+    to review. `submission` is always the older of the two (lower id).
+    """
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='duplicate_candidates')
+    other = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField(help_text="Estimated Jaccard similarity of the two texts, 0-1.")
+    same_repo = models.BooleanField(default=False)
+    dismissed = models.BooleanField(default=False, help_text="Reviewed by an organizer and not a duplicate.")
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('submission', 'other')
+        ordering = ['-similarity']
+
+    def __str__(self):
+        return f"Submissions {self.submission_id} and {self.other_id} ({self.similarity:.0%} similar)"
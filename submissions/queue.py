@@ -0,0 +1,96 @@
+"""
+The judge's submission queue: one annotated query per page instead of a team
+lookup per row and a Python scan of the judge's scores per row. Once an
+event has judge assignments (see assignment.py), each judge only sees the
+submissions assigned to them.
+"""
+from urllib.parse import urlencode
+
+from django.db.models import Avg, Count, Exists, F, OuterRef
+
+from events.pagination import keyset_paginate
+from .models import JudgeAssignment, Judging, Submission
+
+QUEUE_ORDERINGS = {
+    # Submissions this judge hasn't scored yet come first, oldest first.
+    'unscored': ('my_scored', 'submitted_at', 'id'),
+    # Fewest scores first, to spread the judging evenly.
+    'least_judged': ('judge_count', 'id'),
+    'newest': ('-submitted_at', '-id'),
+}
+QUEUE_STATUSES = ('scored', 'unscored')
+QUEUE_PAGE_SIZE = 25
+
+
+def reviewable_by(event, judge):
+    """
+    Filter for the submissions `judge` may score: those assigned to them, or
+    every submission while the event doesn't use judge assignments.
+    """
+    return (
+        Exists(JudgeAssignment.objects.filter(submission=OuterRef('pk'), judge=judge))
+        | ~Exists(JudgeAssignment.objects.filter(submission__team__event=event))
+    )
+
+
+def judge_queue_queryset(event, judge, filters=None):
+    """
+    Submissions for `event` annotated with `team_name`, `my_scored` (has `judge`
+    scored it), `judge_count` (distinct judges who scored it) and `mean_score`.
+    If the event uses judge assignments, only `judge`'s assigned rows are included.
+    """
+    filters = filters or {}
+    queryset = (
+        Submission.objects.filter(team__event=event)
+        .annotate(
+            team_name=F('team__team_name'),
+            problem_title=F('problem_statement__title'),
+            my_scored=Exists(Judging.objects.filter(submission=OuterRef('pk'), judge=judge)),
+            judge_count=Count('scores__judge', distinct=True),
+            mean_score=Avg('scores__score'),
+        )
+        .only('id', 'project_title', 'submitted_at', 'team_id', 'problem_statement_id')
+    )
+    queryset = queryset.filter(reviewable_by(event, judge))
+    if filters.get('status') == 'scored':
+        queryset = queryset.filter(my_scored=True)
+    elif filters.get('status') == 'unscored':
+        queryset = queryset.filter(my_scored=False)
+    if 'problem' in filters:
+        queryset = queryset.filter(problem_statement_id=filters['problem'])
+    return queryset
+
+
+def queue_filters(params, problem_ids):
+    """Returns the recognised queue filters from a query string."""
+    filters = {}
+    if params.get('status') in QUEUE_STATUSES:
+        filters['status'] = params['status']
+    if params.get('order') in QUEUE_ORDERINGS:
+        filters['order'] = params['order']
+    problem = params.get('problem', '')
+    if problem.isdigit() and int(problem) in problem_ids:
+        filters['problem'] = int(problem)
+    return filters
+
+
+def judge_queue_page(event, judge, filters, cursor=None, per_page=QUEUE_PAGE_SIZE):
+    """Returns one KeysetPage of the judge queue."""
+    ordering = QUEUE_ORDERINGS[filters.get('order', 'unscored')]
+    return keyset_paginate(judge_queue_queryset(event, judge, filters), ordering, cursor, per_page)
+
+
+def judge_queue_context(request, event, per_page=QUEUE_PAGE_SIZE):
+    """Template context for the judging dashboard of `event`."""
+    problem_statements = list(event.problem_statements.only('id', 'event_id', 'title'))
+    filters = queue_filters(request.GET, {problem.pk for problem in problem_statements})
+    page = judge_queue_page(event, request.user, filters, request.GET.get('after'), per_page)
+    return {
+        'event': event,
+        'submissions': page.object_list,
+        'page': page,
+        'filters': filters,
+        'problem_statements': problem_statements,
+        'orderings': QUEUE_ORDERINGS,
+        'next_query': urlencode({**filters, 'after': page.next_cursor}) if page.has_next else '',
+    }
@@ -0,0 +1,187 @@
+"""
+Rubric scoring: judges score each of an event's weighted criteria, and
+Judging.score holds the weighted total on a 0-100 scale. Leaderboards, the
+judge queue and anything else reading a single score keep working unchanged.
+Events without criteria use a one-criterion rubric: the plain 0-100 score.
+
+Per-criterion scores are stored on the Judging row itself (criterion_scores),
+so an event's full judge x submission x criterion tensor loads in one query.
+Totals, per-criterion rankings and score distributions are then numpy
+reductions over that tensor.
+
+When a criterion's weight or max score changes, or it is deleted, the
+stored totals of the event are recomputed (see submissions/signals.py), so
+the leaderboard and results agree with the current rubric.
+"""
+import numpy as np
+
+from .models import Judging, RubricCriterion
+
+# The implicit criterion of events without a rubric.
+SINGLE_SCORE_CRITERION = RubricCriterion(name='Score', weight=1, max_score=100)
+
+
+class Rubric:
+    def __init__(self, criteria=()):
+        self.criteria = list(criteria) or [SINGLE_SCORE_CRITERION]
+        self.weights = np.array([criterion.weight for criterion in self.criteria], dtype=np.float64)
+        self.max_scores = np.array([criterion.max_score for criterion in self.criteria], dtype=np.float64)
+        self.index = {criterion.pk: i for i, criterion in enumerate(self.criteria)}
+
+    @classmethod
+    def for_event(cls, event_id):
+        return cls(RubricCriterion.objects.filter(event_id=event_id))
+
+    @property
+    def is_single_score(self):
+        return self.criteria[0] is SINGLE_SCORE_CRITERION
+
+    def vector(self, score, criterion_scores):
+        """One Judging row as a vector over the criteria (NaN where not scored)."""
+        values = np.full(len(self.criteria), np.nan)
+        if self.is_single_score:
+            values[0] = score
+        else:
+            for criterion_id, value in (criterion_scores or {}).items():
+                i = self.index.get(int(criterion_id))
+                if i is not None and value is not None:
+                    values[i] = value
+        return values
+
+    def totals(self, values):
+        """
+        Weighted totals (0-100) over the last axis of `values`. Criteria that
+        weren't scored are left out of the weighting; with none scored, NaN.
+        """
+        scored = ~np.isnan(values)
+        weighted = np.where(scored, values / self.max_scores * self.weights, 0.0).sum(axis=-1)
+        weight = (scored * self.weights).sum(axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(weight > 0, 100 * weighted / weight, np.nan)
+
+    def total(self, criterion_scores):
+        """The weighted total for one judge's {criterion id: score} dict."""
+        return float(self.totals(self.vector(None, criterion_scores)))
+
+
+def recompute_event_totals(event_id):
+    """
+    Rewrites the event's stored Judging.score totals under its current rubric
+    and returns the changed rows as (judge_id, submission_id, score). Scores
+    with none of the current criteria keep their stored total.
+    """
+    rubric = Rubric.for_event(event_id)
+    if rubric.is_single_score:
+        return []
+    judgings = list(
+        Judging.objects.filter(submission__team__event_id=event_id, criterion_scores__isnull=False)
+        .only('pk', 'judge_id', 'submission_id', 'score', 'criterion_scores')
+    )
+    if not judgings:
+        return []
+    totals = rubric.totals(np.array([rubric.vector(None, judging.criterion_scores) for judging in judgings]))
+    changed = []
+    for judging, total in zip(judgings, totals.tolist()):
+        if not np.isnan(total) and not np.isclose(total, judging.score):
+            judging.score = total
+            changed.append(judging)
+    Judging.objects.bulk_update(changed, ['score'], batch_size=1000)
+    return [(judging.judge_id, judging.submission_id, judging.score) for judging in changed]
+
+
+def _nanmean(values, axis):
+    counts = (~np.isnan(values)).sum(axis=axis)
+    sums = np.nansum(values, axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+class ScoreTensor:
+    """
+    An event's scores as a judges x submissions x criteria array (NaN = not
+    scored), with the stored Judging.score of each pair alongside.
+    """
+
+    def __init__(self, rubric, judge_ids, submission_ids, scores, stored_totals):
+        self.rubric = rubric
+        self.judge_ids = judge_ids
+        self.submission_ids = np.asarray(submission_ids, dtype=np.int64)
+        self.scores = scores
+        self.stored_totals = stored_totals
+
+    @classmethod
+    def for_event(cls, event_id, rubric=None):
+        """Loads every score of the event in one query (plus one for the rubric)."""
+        rubric = rubric or Rubric.for_event(event_id)
+        rows = list(
+            Judging.objects.filter(submission__team__event_id=event_id)
+            .values_list('judge_id', 'submission_id', 'score', 'criterion_scores')
+        )
+        judge_ids = sorted({row[0] for row in rows})
+        submission_ids = sorted({row[1] for row in rows})
+        judge_index = {judge_id: i for i, judge_id in enumerate(judge_ids)}
+        submission_index = {submission_id: i for i, submission_id in enumerate(submission_ids)}
+
+        scores = np.full((len(judge_ids), len(submission_ids), len(rubric.criteria)), np.nan)
+        stored_totals = np.full((len(judge_ids), len(submission_ids)), np.nan)
+        cells, values = [], []
+        for judge_id, submission_id, score, criterion_scores in rows:
+            j, s = judge_index[judge_id], submission_index[submission_id]
+            stored_totals[j, s] = score
+            if rubric.is_single_score:
+                cells.append((j, s, 0))
+                values.append(score)
+                continue
+            for criterion_id, value in (criterion_scores or {}).items():
+                c = rubric.index.get(int(criterion_id))
+                if c is not None and value is not None:
+                    cells.append((j, s, c))
+                    values.append(value)
+        if cells:
+            scores[tuple(np.array(cells).T)] = values
+        return cls(rubric, judge_ids, submission_ids, scores, stored_totals)
+
+    def judge_totals(self):
+        """
+        judges x submissions weighted totals under the current weights. Scores
+        given before the event had a rubric keep their stored total.
+        """
+        totals = self.rubric.totals(self.scores)
+        return np.where(np.isnan(totals), self.stored_totals, totals)
+
+    def weighted_totals(self):
+        """Mean weighted total per submission, in submission_ids order."""
+        return _nanmean(self.judge_totals(), axis=0)
+
+    def criterion_means(self):
+        """submissions x criteria mean scores."""
+        return _nanmean(self.scores, axis=0)
+
+    def criterion_rankings(self):
+        """
+        [(criterion, [(rank, submission_id, mean), ...]), ...], best first, leaving
+        out submissions nobody scored on that criterion. Ties share a rank.
+        """
+        means = self.criterion_means()
+        order = np.argsort(-means, axis=0, kind='stable')  # NaN sorts last
+        rankings = []
+        for c, criterion in enumerate(self.rubric.criteria):
+            column = means[order[:, c], c]
+            column = column[~np.isnan(column)]
+            ids = self.submission_ids[order[:len(column), c]]
+            # Rank = 1 + number of strictly better means.
+            ranks = np.searchsorted(-column, -column, side='left') + 1
+            rankings.append((criterion, [(int(rank), int(sid), float(mean)) for rank, sid, mean in zip(ranks, ids, column)]))
+        return rankings
+
+    def distributions(self, bins=10):
+        """
+        criteria x bins counts of individual scores, each criterion split into
+        `bins` equal ranges from 0 to its max score.
+        """
+        criteria = len(self.rubric.criteria)
+        normalized = self.scores / self.rubric.max_scores
+        scored = ~np.isnan(normalized)
+        buckets = np.clip(np.floor(normalized[scored] * bins), 0, bins - 1).astype(np.int64)
+        criterion = np.broadcast_to(np.arange(criteria), normalized.shape)[scored]
+        return np.bincount(criterion * bins + buckets, minlength=criteria * bins).reshape(criteria, bins)
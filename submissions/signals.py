@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from events.models import EventStaff
+from teams.models import Team
+from .assignment import rebalance_if_assigned
+from .duplicates import index_submission
+from .leaderboard import apply_score_change, apply_score_changes
+from .models import Judging, RubricCriterion, Submission
+from .rubric import recompute_event_totals
+
+
+def _event_id(submission_id):
+    return Submission.objects.filter(pk=submission_id).values_list('team__event_id', flat=True).first()
+
+
+# Cached leaderboards are patched one score at a time once the change commits.
+
+@receiver(post_save, sender=Judging)
+def update_leaderboard_for_score(sender, instance, **kwargs):
+    event_id = _event_id(instance.submission_id)
+    if event_id is not None:
+        transaction.on_commit(lambda: apply_score_change(event_id, instance.judge_id, instance.submission_id, instance.score))
+
+@receiver(post_delete, sender=Judging)
+def update_leaderboard_for_removed_score(sender, instance, **kwargs):
+    event_id = _event_id(instance.submission_id)
+    if event_id is not None:
+        transaction.on_commit(lambda: apply_score_change(event_id, instance.judge_id, instance.submission_id, None))
+
+
+# Rubric edits re-total the event's stored scores; bulk_update sends no
+# Judging signals, so the cached leaderboard is patched here.
+
+@receiver(post_save, sender=RubricCriterion)
+@receiver(post_delete, sender=RubricCriterion)
+def retotal_scores_for_rubric_change(sender, instance, created=False, **kwargs):
+    if created:
+        return  # Nobody has scored a new criterion yet
+    event_id = instance.event_id
+    changes = recompute_event_totals(event_id)
+    if changes:
+        transaction.on_commit(lambda: apply_score_changes(event_id, changes))
+
+
+# Late submissions and judges leaving top up the event's judge assignments,
+# once the organizers have started using them (see assignment.py).
+
+@receiver(post_save, sender=Submission)
+def assign_judges_to_late_submission(sender, instance, created, **kwargs):
+    event_id = _event_id(instance.pk) if created else None
+    if event_id is not None:
+        transaction.on_commit(lambda: rebalance_if_assigned(event_id))
+
+@receiver(post_save, sender=EventStaff)
+@receiver(post_delete, sender=EventStaff)
+def rebalance_judges_for_staff_change(sender, instance, **kwargs):
+    event_id = instance.event_id
+    transaction.on_commit(lambda: rebalance_if_assigned(event_id))
+
+# A new mentor can't judge their team, so their assignment to it moves to
+# another judge. Removing a mentor creates no conflict and changes nothing.
+
+@receiver(m2m_changed, sender=Team.mentors.through)
+def rebalance_judges_for_new_mentor(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != 'post_add':
+        return
+    if reverse:  # Teams added to a user's mentored_teams
+        event_ids = set(Team.objects.filter(pk__in=pk_set).values_list('event_id', flat=True))
+    else:
+        event_ids = {instance.event_id}
+    for event_id in event_ids:
+        transaction.on_commit(lambda event_id=event_id: rebalance_if_assigned(event_id))
+
+
+# Every saved submission is re-checked for near-duplicates (see duplicates.py).
+
+@receiver(post_save, sender=Submission)
+def index_submission_for_duplicates(sender, instance, **kwargs):
+    submission_id = instance.pk
+    transaction.on_commit(lambda: index_submission(submission_id))
@@ -1,3 +1,812 @@
+import csv
+import json
+import os
+import resource
+import time
+import unittest
+from collections import Counter
+from io import StringIO
+
+import numpy as np
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from campusinnovate.testing import make_event
+from events.models import Event, EventStaff, EventStats, ProblemStatement
+from events.pagination import encode_cursor
+from teams.codes import allocate_team_codes
+from teams.models import Team, TeamMember
+from .assignment import assign_judges, plan_assignments
+from .duplicates import index_all_submissions, minhash, repo_key, shingle_hashes, similarity
+from .models import DuplicateCandidate, JudgeAssignment, Judging, RubricCriterion, Submission
+from .leaderboard import Leaderboard, build_leaderboard, get_leaderboard, leaderboard_cache_key
+from .queue import judge_queue_page, judge_queue_queryset
+from .rubric import Rubric, ScoreTensor
+
+RUN_BENCHMARKS = os.environ.get('CAMPUSINNOVATE_BENCHMARKS')
+
+
+
+def make_submissions(event, count, start=0):
+    codes = allocate_team_codes(count)
+    Team.objects.bulk_create([Team(event=event, team_name=f'T{start + i}', team_code=codes[i]) for i in range(count)])
+    teams = Team.objects.filter(team_code__in=codes).order_by('pk')
+    Submission.objects.bulk_create([
+        Submission(team=team, project_title=f'Project {start + i}', project_description='d')
+        for i, team in enumerate(teams)
+    ])
+
+
+class JudgeQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        self.judge = User.objects.create(username='judge', is_staff=True)
+        self.other_judge = User.objects.create(username='judge2', is_staff=True)
+        EventStaff.objects.create(event=self.event, user=self.judge, role='Judge')
+        self.problem = ProblemStatement.objects.create(event=self.event, title='Water', description='d')
+        make_submissions(self.event, 6)
+        self.submissions = list(Submission.objects.order_by('pk'))
+        Submission.objects.filter(pk__in=[s.pk for s in self.submissions[:2]]).update(problem_statement=self.problem)
+        Judging.objects.create(judge=self.judge, submission=self.submissions[0], score=80)
+        Judging.objects.create(judge=self.other_judge, submission=self.submissions[0], score=60)
+        Judging.objects.create(judge=self.other_judge, submission=self.submissions[1], score=50)
+
+    def walk(self, filters, per_page=2):
+        rows, cursor = [], None
+        while True:
+            page = judge_queue_page(self.event, self.judge, filters, cursor, per_page)
+            rows.extend(page.object_list)
+            if not page.has_next:
+                return rows
+            cursor = page.next_cursor
+
+    def test_annotations(self):
+        rows = {row.pk: row for row in judge_queue_queryset(self.event, self.judge)}
+        first, second = rows[self.submissions[0].pk], rows[self.submissions[1].pk]
+        self.assertEqual((first.team_name, first.my_scored, first.judge_count, first.mean_score), ('T0', True, 2, 70))
+        self.assertEqual((second.my_scored, second.judge_count, second.mean_score), (False, 1, 50))
+        self.assertEqual(first.problem_title, 'Water')
+
+    def test_unscored_first_pages_through_everything_once(self):
+        rows = self.walk({})
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(len({row.pk for row in rows}), 6)
+        self.assertEqual(rows[-1].pk, self.submissions[0].pk)
+        self.assertFalse(any(row.my_scored for row in rows[:-1]))
+
+    def test_least_judged_order_pages_on_an_aggregate(self):
+        rows = self.walk({'order': 'least_judged'})
+        self.assertEqual([row.judge_count for row in rows], [0, 0, 0, 0, 1, 2])
+
+    def test_tampered_cursor_restarts_the_queue(self):
+        for order, values in (('unscored', ['yes', 'soon', 1]), ('least_judged', ['many', 1])):
+            page = judge_queue_page(self.event, self.judge, {'order': order}, encode_cursor(values), per_page=2)
+            self.assertEqual(len(page.object_list), 2)
+
+    def test_filters(self):
+        self.assertEqual([r.pk for r in self.walk({'status': 'scored'})], [self.submissions[0].pk])
+        self.assertEqual(len(self.walk({'status': 'unscored'})), 5)
+        self.assertEqual([r.pk for r in self.walk({'problem': self.problem.pk, 'status': 'unscored'})],
+                         [self.submissions[1].pk])
+
+    def test_dashboard_query_count_does_not_grow_with_submissions(self):
+        self.client.force_login(self.judge)
+        url = reverse('judging_dashboard', args=[self.event.pk])
+        # session, user, role map, event, problem statements, queue page, notification count
+        with self.assertNumQueries(7):
+            response = self.client.get(url, {'status': 'unscored', 'problem': self.problem.pk})
+        self.assertContains(response, 'Project 1')
+        self.assertNotContains(response, 'Project 0')
+        make_submissions(self.event, 40, start=6)
+        with self.assertNumQueries(6):  # The role map is now cached
+            response = self.client.get(url)
+        self.assertContains(response, 'Next Submissions')
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class JudgeQueueBenchmark(TestCase):
+    def test_queue_page_with_800_submissions(self):
+        event = make_event()
+        judges = User.objects.bulk_create([User(username=f'j{i}') for i in range(5)])
+        judges = list(User.objects.filter(username__startswith='j'))
+        make_submissions(event, 800)
+        submissions = list(Submission.objects.all())
+        Judging.objects.bulk_create([
+            Judging(judge=judge, submission=submission, score=50)
+            for i, submission in enumerate(submissions) for judge in judges[:i % 4]
+        ])
+        started = time.perf_counter()
+        cursor, pages = None, 0
+        while True:
+            page = judge_queue_page(event, judges[0], {}, cursor)
+            pages += 1
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        elapsed = time.perf_counter() - started
+        print(f"\njudge queue: {pages} pages over 800 submissions in {elapsed * 1000:.0f}ms ({elapsed / pages * 1000:.1f}ms/page)")
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        make_submissions(self.event, 3)
+        self.submissions = list(Submission.objects.order_by('pk'))
+        self.harsh, self.lenient = User.objects.create(username='harsh'), User.objects.create(username='lenient')
+
+    def score(self, judge, submission, value):
+        Judging.objects.update_or_create(judge=judge, submission=submission, defaults={'score': value})
+
+    def test_normalization_cancels_out_judge_severity(self):
+        make_submissions(self.event, 1, start=3)
+        a, b, c, d = Submission.objects.order_by('pk')
+        # Each judge saw two projects and preferred one; only their scales differ.
+        self.score(self.harsh, a, 40)
+        self.score(self.harsh, b, 20)
+        self.score(self.lenient, c, 95)
+        self.score(self.lenient, d, 85)
+        rows = {row.submission_id: row for row in build_leaderboard(self.event.pk).rows()}
+        self.assertEqual(rows[c.pk].raw_mean, 95)
+        self.assertEqual(rows[a.pk].raw_mean, 40)
+        self.assertAlmostEqual(rows[a.pk].normalized_mean, 1)
+        self.assertAlmostEqual(rows[c.pk].normalized_mean, 1)
+        self.assertAlmostEqual(rows[b.pk].normalized_mean, -1)
+        # a and c share the top spot on normalized score; the raw mean breaks the tie.
+        self.assertEqual([rows[x.pk].rank for x in (c, a, d, b)], [1, 2, 3, 4])
+
+    def test_single_judge_and_flat_scores_count_as_zero(self):
+        a, b, _ = self.submissions
+        self.score(self.harsh, a, 70)
+        self.score(self.lenient, a, 50)
+        self.score(self.lenient, b, 50)
+        rows = {row.submission_id: row for row in build_leaderboard(self.event.pk).rows()}
+        self.assertEqual(rows[a.pk].normalized_mean, 0)
+        self.assertEqual((rows[a.pk].judge_count, rows[b.pk].judge_count), (2, 1))
+        self.assertEqual(len(rows), 2)
+
+    def test_incremental_updates_match_a_full_rebuild(self):
+        rng = np.random.default_rng(7)
+        judges = [self.harsh, self.lenient] + [User.objects.create(username=f'j{i}') for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            get_leaderboard(self.event.pk)
+        for _ in range(40):
+            judge = judges[rng.integers(len(judges))]
+            submission = self.submissions[rng.integers(len(self.submissions))]
+            with self.captureOnCommitCallbacks(execute=True):
+                if rng.random() < 0.2:
+                    Judging.objects.filter(judge=judge, submission=submission).delete()
+                else:
+                    self.score(judge, submission, float(rng.integers(0, 101)))
+            cached = cache.get(leaderboard_cache_key(self.event.pk)) or get_leaderboard(self.event.pk)
+            expected = build_leaderboard(self.event.pk).rows()
+            actual = cached.rows()
+            self.assertEqual([(r.rank, r.submission_id, r.judge_count) for r in actual],
+                             [(r.rank, r.submission_id, r.judge_count) for r in expected])
+            for got, want in zip(actual, expected):
+                self.assertAlmostEqual(got.raw_mean, want.raw_mean)
+                self.assertAlmostEqual(got.normalized_mean, want.normalized_mean)
+
+    def test_results_page_for_organizers(self):
+        manager = User.objects.create(username='manager', is_staff=True)
+        EventStaff.objects.create(event=self.event, user=manager, role='Lead Organizer')
+        self.score(self.harsh, self.submissions[0], 50)
+        self.client.force_login(manager)
+        response = self.client.get(reverse('event_results', args=[self.event.pk]))
+        self.assertContains(response, 'Project 0')
+        self.assertNotContains(response, 'Project 1')
+
+    def test_scoring_a_submission_creates_the_judging_row(self):
+        judge = User.objects.create(username='judge', is_staff=True)
+        EventStaff.objects.create(event=self.event, user=judge, role='Judge')
+        self.client.force_login(judge)
+        url = reverse('submission_score', args=[self.submissions[0].pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertFalse(Judging.objects.exists())
+        self.client.post(url, {'score': 77, 'feedback': ''})
+        self.assertEqual(Judging.objects.get().score, 77)
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class LeaderboardBenchmark(TestCase):
+    def test_50_judges_by_2000_submissions(self):
+        rng = np.random.default_rng(1)
+        judge_ids, submission_ids = list(range(1, 51)), list(range(1, 2001))
+        severity = rng.normal(0, 10, size=50)
+        triples = [(j, s, float(np.clip(60 + severity[j - 1] + rng.normal(0, 12), 0, 100)))
+                   for j in judge_ids for s in submission_ids]
+
+        started = time.perf_counter()
+        board = Leaderboard.from_triples(triples)
+        board.rows()
+        full = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(200):
+            board.set_score(judge_ids[i % 50], submission_ids[(i * 37) % 2000], float(i % 100))
+        incremental = (time.perf_counter() - started) / 200
+
+        started = time.perf_counter()
+        board.rows()
+        ranking = time.perf_counter() - started
+        print(f"\nleaderboard 50x2000: full build {full * 1000:.0f}ms, "
+              f"one score update {incremental * 1000:.2f}ms, ranking {ranking * 1000:.1f}ms")
+
+
+class JudgeAssignmentTests(TestCase):
+    def setUp(self):
+        self.event = make_event()
+        self.judges = [User.objects.create(username=f'judge{i}', is_staff=True) for i in range(6)]
+        for judge in self.judges:
+            EventStaff.objects.create(event=self.event, user=judge, role='Judge')
+        make_submissions(self.event, 12)
+        self.submissions = list(Submission.objects.order_by('pk'))
+
+    def assignments(self):
+        return list(JudgeAssignment.objects.values_list('submission_id', 'judge_id'))
+
+    def test_every_submission_gets_k_distinct_judges_with_balanced_load(self):
+        result = assign_judges(self.event.pk, reviewers=3)
+        self.assertEqual((len(result.created), result.shortfall), (36, {}))
+        pairs = self.assignments()
+        self.assertEqual(len(set(pairs)), 36)
+        self.assertEqual(set(Counter(s for s, _ in pairs).values()), {3})
+        self.assertEqual(set(Counter(j for _, j in pairs).values()), {6})
+
+    def test_caps_and_conflicts(self):
+        EventStaff.objects.filter(user=self.judges[0]).update(review_capacity=1)
+        team = self.submissions[0].team
+        team.mentors.add(self.judges[1])
+        TeamMember.objects.create(team=team, participant=self.judges[2])
+        assign_judges(self.event.pk, reviewers=3)
+        pairs = self.assignments()
+        self.assertEqual(sum(1 for _, j in pairs if j == self.judges[0].pk), 1)
+        judges_of_first = {j for s, j in pairs if s == self.submissions[0].pk}
+        self.assertEqual(len(judges_of_first), 3)
+        self.assertFalse(judges_of_first & {self.judges[1].pk, self.judges[2].pk})
+
+    def test_shortfall_when_too_few_judges(self):
+        result = assign_judges(self.event.pk, reviewers=7)
+        self.assertEqual(set(result.shortfall.values()), {1})
+        self.assertEqual(len(result.shortfall), 12)
+
+    def test_spreads_each_judge_across_problem_statements(self):
+        submissions = [(1, 1, 'a'), (2, 2, 'b'), (3, 3, 'a'), (4, 4, 'b')]
+        created, _ = plan_assignments(submissions, {1: None, 2: None}, {}, set(), 1)
+        problems = {s: p for s, _, p in submissions}
+        by_judge = {j: sorted(problems[s] for s, jj in created if jj == j) for j in (1, 2)}
+        self.assertEqual(by_judge, {1: ['a', 'b'], 2: ['a', 'b']})
+
+    def test_late_submission_and_judge_dropout_are_incremental(self):
+        assign_judges(self.event.pk, reviewers=3)
+        before = set(self.assignments())
+        with self.captureOnCommitCallbacks(execute=True):
+            late = Submission.objects.create(team=Team.objects.create(event=self.event, team_name='Late'),
+                                             project_title='Late', project_description='d')
+        after = set(self.assignments())
+        self.assertTrue(before < after)
+        self.assertEqual(len({j for s, j in after - before}), 3)
+        self.assertEqual({s for s, _ in after - before}, {late.pk})
+
+        dropped = self.judges[0].pk
+        with self.captureOnCommitCallbacks(execute=True):
+            EventStaff.objects.filter(user_id=dropped).delete()
+        final = set(self.assignments())
+        self.assertFalse(any(j == dropped for _, j in final))
+        self.assertEqual(set(Counter(s for s, _ in final).values()), {3})
+        self.assertTrue({pair for pair in after if pair[1] != dropped} <= final)
+
+    def test_replacement_judge_fills_the_seats_of_one_who_dropped_out(self):
+        EventStaff.objects.filter(user__in=self.judges[2:]).delete()
+        assign_judges(self.event.pk, reviewers=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            EventStaff.objects.filter(user=self.judges[1]).delete()
+        self.assertEqual(set(Counter(s for s, _ in self.assignments()).values()), {1})
+        with self.captureOnCommitCallbacks(execute=True):
+            EventStaff.objects.create(event=self.event, user=self.judges[2], role='Judge')
+        self.assertEqual(set(Counter(s for s, _ in self.assignments()).values()), {2})
+        self.assertEqual(Event.objects.get(pk=self.event.pk).reviewers_per_submission, 2)
+
+    def test_new_mentor_loses_their_assignment_to_the_team(self):
+        assign_judges(self.event.pk, reviewers=2)
+        submission_id, judge_id = JudgeAssignment.objects.values_list('submission_id', 'judge_id').first()
+        submission = Submission.objects.select_related('team').get(pk=submission_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=judge_id).mentored_teams.add(submission.team)
+        judges = {j for s, j in self.assignments() if s == submission_id}
+        self.assertNotIn(judge_id, judges)
+        self.assertEqual(len(judges), 2)
+
+    def test_unassigned_judges_cannot_score_by_url(self):
+        assign_judges(self.event.pk, reviewers=1)
+        submission_id, judge_id = JudgeAssignment.objects.values_list('submission_id', 'judge_id').first()
+        other = next(judge for judge in self.judges if judge.pk != judge_id)
+        url = reverse('submission_score', args=[submission_id])
+        self.client.force_login(other)
+        self.assertRedirects(self.client.get(url), reverse('judging_dashboard', args=[self.event.pk]), fetch_redirect_response=False)
+        self.client.post(url, {'score': 50})
+        self.assertFalse(Judging.objects.exists())
+        self.client.force_login(User.objects.get(pk=judge_id))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_rerun_changes_nothing(self):
+        assign_judges(self.event.pk, reviewers=3)
+        result = assign_judges(self.event.pk)
+        self.assertEqual((result.reviewers, result.created, result.removed), (3, [], []))
+
+    def test_queue_only_shows_assigned_submissions(self):
+        judge = self.judges[0]
+        self.assertEqual(judge_queue_queryset(self.event, judge).count(), 12)
+        assign_judges(self.event.pk, reviewers=2)
+        assigned = set(JudgeAssignment.objects.filter(judge=judge).values_list('submission_id', flat=True))
+        self.assertEqual(len(assigned), 4)
+        self.assertEqual({row.pk for row in judge_queue_queryset(self.event, judge)}, assigned)
+
+    def test_command_dry_run_saves_nothing(self):
+        out = StringIO()
+        call_command('assign_judges', self.event.pk, '--reviewers', '2', '--dry-run', stdout=out)
+        self.assertIn('Would add 24', out.getvalue())
+        self.assertFalse(JudgeAssignment.objects.exists())
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class JudgeAssignmentBenchmark(TestCase):
+    def test_50_judges_by_2000_submissions(self):
+        event = make_event()
+        User.objects.bulk_create([User(username=f'j{i}') for i in range(50)])
+        EventStaff.objects.bulk_create([
+            EventStaff(event=event, user=user, role='Judge', review_capacity=150 if user.pk % 5 == 0 else None)
+            for user in User.objects.filter(username__startswith='j')
+        ])
+        make_submissions(event, 2000)
+
+        started = time.perf_counter()
+        result = assign_judges(event.pk, reviewers=3)
+        full = time.perf_counter() - started
+        loads = Counter(JudgeAssignment.objects.values_list('judge_id', flat=True))
+
+        make_submissions(event, 20, start=2000)
+        started = time.perf_counter()
+        top_up = assign_judges(event.pk)
+        incremental = time.perf_counter() - started
+        self.assertEqual((len(result.created), len(top_up.created), result.shortfall), (6000, 60, {}))
+        print(f"\njudge assignment 50x2000: full plan {full * 1000:.0f}ms "
+              f"(load {min(loads.values())}-{max(loads.values())}), top-up of 20 late submissions {incremental * 1000:.0f}ms")
+
+
+class RubricTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        make_submissions(self.event, 3)
+        self.submissions = list(Submission.objects.order_by('pk'))
+        self.judges = [User.objects.create(username=f'judge{i}', is_staff=True) for i in range(3)]
+        self.idea = RubricCriterion.objects.create(event=self.event, name='Idea', weight=2, max_score=10, order=1)
+        self.demo = RubricCriterion.objects.create(event=self.event, name='Demo', weight=1, max_score=5, order=2)
+
+    def score(self, judge, submission, idea, demo):
+        scores = {str(self.idea.pk): idea, str(self.demo.pk): demo}
+        total = Rubric.for_event(self.event.pk).total(scores)
+        Judging.objects.create(judge=judge, submission=submission, score=total, criterion_scores=scores)
+
+    def test_weighted_total(self):
+        rubric = Rubric.for_event(self.event.pk)
+        self.assertEqual([c.name for c in rubric.criteria], ['Idea', 'Demo'])
+        self.assertAlmostEqual(rubric.total({str(self.idea.pk): 10, str(self.demo.pk): 0}), 200 / 3)
+        self.assertAlmostEqual(rubric.total({str(self.idea.pk): 5}), 50)
+
+    def test_score_tensor_aggregates(self):
+        a, b, c = self.submissions
+        self.score(self.judges[0], a, 10, 5)
+        self.score(self.judges[1], a, 6, 5)
+        self.score(self.judges[0], b, 8, 1)
+        self.score(self.judges[1], c, 8, 5)
+        with self.assertNumQueries(2):
+            tensor = ScoreTensor.for_event(self.event.pk)
+        self.assertEqual(tensor.scores.shape, (2, 3, 2))
+        np.testing.assert_allclose(tensor.criterion_means(), [[8, 5], [8, 1], [8, 5]])
+        np.testing.assert_allclose(tensor.weighted_totals(), [(100 + 220 / 3) / 2, (200 * 0.8 + 20) / 3, 100 * 2.6 / 3])
+
+        (idea, idea_ranking), (demo, demo_ranking) = tensor.criterion_rankings()
+        self.assertEqual(idea.name, 'Idea')
+        self.assertEqual([rank for rank, _, _ in idea_ranking], [1, 1, 1])
+        self.assertEqual([(rank, sid) for rank, sid, _ in demo_ranking], [(1, a.pk), (1, c.pk), (3, b.pk)])
+
+        distributions = tensor.distributions(bins=5)
+        self.assertEqual(distributions[0].tolist(), [0, 0, 0, 1, 3])  # 6, 8, 8 and 10 out of 10
+        self.assertEqual(distributions[1].tolist(), [0, 1, 0, 0, 3])  # 1 and three 5s out of 5
+
+    def test_single_score_events_are_a_one_criterion_rubric(self):
+        RubricCriterion.objects.all().delete()
+        Judging.objects.create(judge=self.judges[0], submission=self.submissions[0], score=70)
+        Judging.objects.create(judge=self.judges[1], submission=self.submissions[0], score=90)
+        tensor = ScoreTensor.for_event(self.event.pk)
+        self.assertTrue(tensor.rubric.is_single_score)
+        np.testing.assert_allclose(tensor.weighted_totals(), [80])
+        self.assertEqual(tensor.criterion_rankings()[0][1], [(1, self.submissions[0].pk, 80.0)])
+
+    def test_scores_from_before_the_rubric_keep_their_total(self):
+        Judging.objects.create(judge=self.judges[0], submission=self.submissions[0], score=70)
+        self.score(self.judges[1], self.submissions[0], 10, 5)
+        np.testing.assert_allclose(ScoreTensor.for_event(self.event.pk).weighted_totals(), [85])
+
+    def test_rubric_edits_retotal_stored_scores_and_the_leaderboard(self):
+        a, b = self.submissions[:2]
+        self.score(self.judges[0], a, 10, 0)
+        self.score(self.judges[0], b, 0, 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            get_leaderboard(self.event.pk)
+        self.assertEqual([row.submission_id for row in get_leaderboard(self.event.pk).rows()], [a.pk, b.pk])
+
+        self.demo.weight = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            self.demo.save()
+        stored = dict(Judging.objects.values_list('submission_id', 'score'))
+        self.assertAlmostEqual(stored[a.pk], 100 * 2 / 6)
+        self.assertAlmostEqual(stored[b.pk], 100 * 4 / 6)
+        np.testing.assert_allclose(ScoreTensor.for_event(self.event.pk).weighted_totals(), [stored[a.pk], stored[b.pk]])
+        self.assertEqual([row.submission_id for row in get_leaderboard(self.event.pk).rows()], [b.pk, a.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.idea.delete()
+        self.assertEqual(dict(Judging.objects.values_list('submission_id', 'score')), {a.pk: 0, b.pk: 100})
+
+    def test_max_score_must_be_positive(self):
+        self.demo.max_score = 0
+        with self.assertRaises(ValidationError):
+            self.demo.full_clean()
+
+    def test_judging_form_scores_each_criterion(self):
+        judge = self.judges[0]
+        EventStaff.objects.create(event=self.event, user=judge, role='Judge')
+        self.client.force_login(judge)
+        url = reverse('submission_score', args=[self.submissions[0].pk])
+        self.assertContains(self.client.get(url), 'Demo (0-5)')
+        response = self.client.post(url, {f'criterion_{self.idea.pk}': 11, f'criterion_{self.demo.pk}': 5})
+        self.assertEqual(response.status_code, 200)  # Idea is out of 10
+        self.client.post(url, {f'criterion_{self.idea.pk}': 7, f'criterion_{self.demo.pk}': 5, 'feedback': ''})
+        judging = Judging.objects.get()
+        self.assertEqual(judging.criterion_scores, {str(self.idea.pk): 7, str(self.demo.pk): 5})
+        self.assertAlmostEqual(judging.score, 80)
+
+    def test_results_page_shows_criteria(self):
+        manager = User.objects.create(username='manager', is_staff=True)
+        EventStaff.objects.create(event=self.event, user=manager, role='Organizer')
+        self.score(self.judges[0], self.submissions[0], 9, 4)
+        self.client.force_login(manager)
+        response = self.client.get(reverse('event_results', args=[self.event.pk]))
+        self.assertContains(response, 'Score Distribution by Criterion')
+        self.assertContains(response, 'Demo (weight 1.0)')
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class RubricBenchmark(TestCase):
+    def test_50_judges_by_2000_submissions_by_5_criteria(self):
+        event = make_event()
+        criteria = [RubricCriterion.objects.create(event=event, name=f'C{i}', weight=i + 1) for i in range(5)]
+        User.objects.bulk_create([User(username=f'j{i}') for i in range(50)])
+        judges = list(User.objects.filter(username__startswith='j'))
+        make_submissions(event, 2000)
+        rng = np.random.default_rng(3)
+        rubric = Rubric(criteria)
+        rows = []
+        for submission_id in Submission.objects.values_list('pk', flat=True):
+            for judge in judges:
+                scores = {str(c.pk): int(v) for c, v in zip(criteria, rng.integers(0, 11, size=5))}
+                rows.append(Judging(judge=judge, submission_id=submission_id, score=rubric.total(scores), criterion_scores=scores))
+        Judging.objects.bulk_create(rows, batch_size=5000)
+
+        started = time.perf_counter()
+        tensor = ScoreTensor.for_event(event.pk)
+        loaded = time.perf_counter() - started
+        started = time.perf_counter()
+        tensor.weighted_totals()
+        tensor.criterion_rankings()
+        tensor.distributions()
+        aggregated = time.perf_counter() - started
+        print(f"\nrubric 50x2000x5: load {loaded * 1000:.0f}ms, totals + rankings + distributions {aggregated * 1000:.0f}ms")
+
+
+class BatchScoringTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        self.judge = User.objects.create(username='judge', is_staff=True)
+        EventStaff.objects.create(event=self.event, user=self.judge, role='Judge')
+        make_submissions(self.event, 5)
+        self.submissions = list(Submission.objects.order_by('pk'))
+        self.url = reverse('batch_scoring', args=[self.event.pk])
+        self.client.force_login(self.judge)
+
+    def post(self, scores, feedback=None, submissions=None):
+        data = {'submission': [s.pk for s in submissions or self.submissions]}
+        for submission, score in scores.items():
+            data[f'submission-{submission.pk}-score'] = score
+        for submission, text in (feedback or {}).items():
+            data[f'submission-{submission.pk}-feedback'] = text
+        return self.client.post(self.url, data)
+
+    def test_opening_the_page_writes_nothing(self):
+        self.client.get(self.url)  # warm the role map cache
+        make_submissions(self.event, 10, start=5)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Project 14')
+        self.assertFalse(Judging.objects.exists())
+        self.assertFalse([q for q in queries.captured_queries if not q['sql'].startswith('SELECT')])
+        # session, user, event, rubric, problem statements, queue page, existing scores, notification count
+        self.assertEqual(len(queries), 8)
+
+    def test_changed_rows_are_upserted_in_one_statement(self):
+        a, b, c = self.submissions[:3]
+        Judging.objects.create(judge=self.judge, submission=a, score=10)
+        Judging.objects.create(judge=self.judge, submission=b, score=20, feedback='ok')
+        with self.captureOnCommitCallbacks(execute=True):
+            get_leaderboard(self.event.pk)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.post({a: 15, b: 20, c: 30}, feedback={b: 'ok'})
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        writes = [q['sql'] for q in queries.captured_queries if not q['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE'))]
+        # The score upsert, then the judged-submission recount on commit.
+        self.assertEqual(len(writes), 2)
+        self.assertTrue(writes[0].startswith('INSERT'))
+        self.assertIn('events_eventstats', writes[1])
+        self.assertEqual(dict(Judging.objects.values_list('submission_id', 'score')), {a.pk: 15, b.pk: 20, c.pk: 30})
+        cached = {row.submission_id: row.raw_mean for row in cache.get(leaderboard_cache_key(self.event.pk)).rows()}
+        self.assertEqual(cached, {a.pk: 15, b.pk: 20, c.pk: 30})
+
+    def test_batch_keeps_judged_count_current(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post({submission: 60 for submission in self.submissions[:3]})
+        self.assertEqual(EventStats.objects.get(event=self.event).submissions_judged, 3)
+
+    def test_an_invalid_row_saves_nothing(self):
+        a, b = self.submissions[:2]
+        response = self.post({a: 50, b: 150})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Please correct the highlighted rows')
+        self.assertFalse(Judging.objects.exists())
+
+    def test_only_submissions_in_the_judges_queue_are_saved(self):
+        other_event = make_event()
+        make_submissions(other_event, 1, start=5)
+        foreign = Submission.objects.get(team__event=other_event)
+        self.post({self.submissions[0]: 60, foreign: 90}, submissions=[self.submissions[0], foreign])
+        self.assertEqual(list(Judging.objects.values_list('submission_id', flat=True)), [self.submissions[0].pk])
+
+    def test_rubric_rows(self):
+        idea = RubricCriterion.objects.create(event=self.event, name='Idea', max_score=10)
+        a = self.submissions[0]
+        self.assertContains(self.client.get(self.url), 'Idea (0-10)')
+        self.client.post(self.url, {'submission': [a.pk], f'submission-{a.pk}-criterion_{idea.pk}': 7})
+        judging = Judging.objects.get()
+        self.assertEqual((judging.score, judging.criterion_scores), (70, {str(idea.pk): 7}))
+
+
+def random_text(rng, vocabulary, words=80):
+    return ' '.join(vocabulary[i] for i in rng.integers(len(vocabulary), size=words))
+
+
+def reword(rng, text, vocabulary, fraction=0.05):
+    words = text.split()
+    for i in rng.choice(len(words), size=max(1, int(len(words) * fraction)), replace=False):
+        words[i] = vocabulary[rng.integers(len(vocabulary))]
+    return ' '.join(words)
+
+
+class DuplicateDetectionTests(TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(11)
+        self.vocabulary = [f'word{i}' for i in range(3000)]
+        self.events = [make_event(), make_event()]
+
+    def submit(self, event, title, description, repo_link=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Submission.objects.create(team=Team.objects.create(event=event, team_name=title), project_title=title,
+                                             project_description=description, repo_link=repo_link)
+
+    def pairs(self):
+        return set(DuplicateCandidate.objects.values_list('submission_id', 'other_id'))
+
+    def test_repo_key(self):
+        self.assertEqual(repo_key('https://www.GitHub.com/Org/Repo.git/'), 'github.com/org/repo')
+        self.assertEqual(repo_key('github.com/org/repo'), 'github.com/org/repo')
+        self.assertEqual(repo_key('https://github.com/'), '')
+        self.assertEqual(repo_key(None), '')
+
+    def test_signature_estimates_jaccard(self):
+        a = random_text(self.rng, self.vocabulary, 200)
+        b = reword(self.rng, a, self.vocabulary, 0.1)
+        sa, sb = shingle_hashes(a), shingle_hashes(b)
+        jaccard = len(np.intersect1d(sa, sb)) / len(np.union1d(sa, sb))
+        self.assertAlmostEqual(similarity(minhash(sa), minhash(sb)), jaccard, delta=0.12)
+        self.assertIsNone(minhash(shingle_hashes('')))
+
+    def test_reworded_resubmission_in_another_event_is_flagged_on_save(self):
+        text = random_text(self.rng, self.vocabulary)
+        original = self.submit(self.events[0], 'Smart Bins', text)
+        unrelated = self.submit(self.events[0], 'Solar Map', random_text(self.rng, self.vocabulary))
+        copy = self.submit(self.events[1], 'Clever Bins', reword(self.rng, text, self.vocabulary))
+        self.assertEqual(self.pairs(), {(original.pk, copy.pk)})
+        self.assertGreater(DuplicateCandidate.objects.get().similarity, 0.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            copy.project_description = random_text(self.rng, self.vocabulary)
+            copy.save()
+        self.assertEqual(self.pairs(), set())
+        self.assertFalse(DuplicateCandidate.objects.filter(other=unrelated).exists())
+
+    def test_same_repository_is_flagged_whatever_the_text(self):
+        a = self.submit(self.events[0], 'A', random_text(self.rng, self.vocabulary), 'https://github.com/org/app')
+        b = self.submit(self.events[1], 'B', random_text(self.rng, self.vocabulary), 'http://www.github.com/Org/app.git')
+        candidate = DuplicateCandidate.objects.get()
+        self.assertEqual((candidate.submission_id, candidate.other_id, candidate.same_repo), (a.pk, b.pk, True))
+
+    def test_dismissed_pairs_stay_dismissed(self):
+        text = random_text(self.rng, self.vocabulary)
+        self.submit(self.events[0], 'A', text)
+        copy = self.submit(self.events[1], 'B', text)
+        DuplicateCandidate.objects.update(dismissed=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            copy.save()
+        self.assertTrue(DuplicateCandidate.objects.get().dismissed)
+        index_all_submissions()
+        self.assertTrue(DuplicateCandidate.objects.get().dismissed)
+
+    def test_full_rebuild_matches_incremental_index(self):
+        texts = [random_text(self.rng, self.vocabulary) for _ in range(6)]
+        for i, text in enumerate(texts + [reword(self.rng, t, self.vocabulary) for t in texts[:3]]):
+            self.submit(self.events[i % 2], f'P{i}', text)
+        incremental = self.pairs()
+        self.assertEqual(len(incremental), 3)
+        self.assertEqual(index_all_submissions(), 3)
+        self.assertEqual(self.pairs(), incremental)
+
+    def test_organizers_see_pairs_touching_their_event(self):
+        text = random_text(self.rng, self.vocabulary)
+        self.submit(self.events[0], 'Original Bins', text)
+        self.submit(self.events[1], 'Copied Bins', text)
+        manager = User.objects.create(username='manager', is_staff=True)
+        EventStaff.objects.create(event=self.events[1], user=manager, role='Event Manager')
+        self.client.force_login(manager)
+        response = self.client.get(reverse('duplicate_submissions', args=[self.events[1].pk]))
+        self.assertContains(response, 'Original Bins')
+        self.assertContains(response, 'Copied Bins')
+
+    def test_command(self):
+        out = StringIO()
+        call_command('index_duplicates', stdout=out)
+        self.assertIn('found 0 candidate pair(s)', out.getvalue())
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class DuplicateDetectionBenchmark(TestCase):
+    def test_20000_submissions(self):
+        rng = np.random.default_rng(5)
+        vocabulary = [f'word{i}' for i in range(20000)]
+        event = make_event()
+        make_submissions(event, 20000)
+        ids = list(Submission.objects.order_by('pk').values_list('pk', flat=True))
+        texts = [random_text(rng, vocabulary, 120) for _ in range(19800)]
+        texts += [reword(rng, texts[i], vocabulary) for i in range(200)]
+        submissions = [Submission(pk=pk, project_title='p', project_description=text) for pk, text in zip(ids, texts)]
+        Submission.objects.bulk_update(submissions, ['project_description'], batch_size=2000)
+
+        started = time.perf_counter()
+        index_all_submissions()
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        found = index_all_submissions()
+        checked = time.perf_counter() - started
+        planted = {(ids[i], ids[19800 + i]) for i in range(200)}
+        recall = len(planted & set(DuplicateCandidate.objects.values_list('submission_id', 'other_id'))) / len(planted)
+        self.assertGreater(recall, 0.95)
+        print(f"\nduplicate index: 20000 submissions built in {built:.2f}s, re-checked in {checked:.2f}s, "
+              f"{found} candidate pairs, recall {recall:.1%}")
+
+
+class ResultsExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        self.manager = User.objects.create(username='manager', is_staff=True)
+        EventStaff.objects.create(event=self.event, user=self.manager, role='Organizer')
+        self.judges = [User.objects.create(username=f'judge{i}') for i in range(2)]
+        make_submissions(self.event, 2)
+        self.first, self.second = Submission.objects.order_by('pk')
+        TeamMember.objects.create(team=self.first.team, participant=User.objects.create(username='ada'))
+        TeamMember.objects.create(team=self.first.team, participant=User.objects.create(username='alan'))
+        Judging.objects.create(judge=self.judges[0], submission=self.first, score=80, feedback='Neat, "polished"')
+        Judging.objects.create(judge=self.judges[1], submission=self.first, score=60)
+        self.client.force_login(self.manager)
+
+    def export(self, fmt):
+        response = self.client.get(reverse('event_results_export', args=[self.event.pk, fmt]))
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_has_a_line_per_score(self):
+        response, body = self.export('csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn(f'event-{self.event.pk}-results.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(body.splitlines()))
+        self.assertEqual([(r['project_title'], r['judge'], r['score']) for r in rows],
+                         [('Project 0', 'judge0', '80.0'), ('Project 0', 'judge1', '60.0'), ('Project 1', '', '')])
+        self.assertEqual(rows[0]['members'], 'ada; alan')
+        self.assertEqual(rows[0]['feedback'], 'Neat, "polished"')
+        self.assertEqual((rows[0]['rank'], rows[2]['rank']), ('1', ''))
+
+    def test_jsonl_has_a_line_per_submission(self):
+        _, body = self.export('jsonl')
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r['submission_id'] for r in records], [self.first.pk, self.second.pk])
+        self.assertEqual([s['score'] for s in records[0]['scores']], [80, 60])
+        self.assertEqual(records[0]['raw_mean'], 70)
+        self.assertEqual(records[1]['scores'], [])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def count():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.export('csv')
+            return len(queries)
+
+        before = count()
+        make_submissions(self.event, 30, start=2)
+        self.assertEqual(count(), before)
+
+    def test_only_organizers_and_known_formats(self):
+        self.assertEqual(self.client.get(reverse('event_results_export', args=[self.event.pk, 'xlsx'])).status_code, 404)
+        self.client.force_login(self.judges[0])
+        response = self.client.get(reverse('event_results_export', args=[self.event.pk, 'csv']))
+        self.assertEqual(response.status_code, 302)
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class ResultsExportBenchmark(TestCase):
+    def test_100k_judging_rows(self):
+        event = make_event()
+        User.objects.bulk_create([User(username=f'j{i}') for i in range(20)])
+        judges = list(User.objects.filter(username__startswith='j'))
+        make_submissions(event, 5000)
+        Judging.objects.bulk_create(
+            [Judging(judge=judge, submission_id=pk, score=50, feedback='Good work on the prototype.')
+             for pk in Submission.objects.values_list('pk', flat=True) for judge in judges],
+            batch_size=5000,
+        )
+        manager = User.objects.create(username='manager', is_staff=True)
+        EventStaff.objects.create(event=event, user=manager, role='Organizer')
+        self.client.force_login(manager)
+
+        def rss_mib():
+            # The current RSS on Linux; elsewhere the process peak (ru_maxrss, KiB on Linux).
+            try:
+                with open('/proc/self/statm') as statm:
+                    return int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+            except OSError:
+                return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
-# Create your tests here.
+        for fmt in ('csv', 'jsonl'):
+            cache.clear()
+            rss_before = rss_peak = rss_mib()
+            started = time.perf_counter()
+            content = self.client.get(reverse('event_results_export', args=[event.pk, fmt])).streaming_content
+            block = next(content)
+            first = time.perf_counter() - started
+            size, lines = len(block), block.count(b'\n')
+            for block in content:
+                size += len(block)
+                lines += block.count(b'\n')
+                rss_peak = max(rss_peak, rss_mib())
+            elapsed = time.perf_counter() - started
+            print(f"\nresults export ({fmt}): {lines} lines, {size / 2**20:.1f} MiB in {elapsed:.2f}s "
+                  f"({lines / elapsed:.0f} lines/s), first block after {first * 1000:.0f}ms, "
+                  f"RSS {rss_before:.0f} MiB -> peak {rss_peak:.0f} MiB")
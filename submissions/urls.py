@@ -10,8 +10,24 @@ urlpatterns = [
     # e.g., /submissions/judging/event/1/
     path('judging/event/<int:event_id>/', views.judging_dashboard_view, name='judging_dashboard'),
     
+    # URL for a judge to score a page of submissions at once
+    # e.g., /submissions/judging/event/1/batch/
+    path('judging/event/<int:event_id>/batch/', views.batch_scoring_view, name='batch_scoring'),
+
     # URL for a judge to score a specific submission
     # e.g., /submissions/judging/score/45/
     path('judging/score/<int:submission_id>/', views.submission_score_view, name='submission_score'),
+
+    # URL for organizers to see the ranked results of an event
+    # e.g., /submissions/results/event/1/
+    path('results/event/<int:event_id>/', views.event_results_view, name='event_results'),
+
+    # URL for organizers to download the full results as CSV or JSON Lines
+    # e.g., /submissions/results/event/1/export.csv
+    path('results/event/<int:event_id>/export.<str:fmt>', views.event_results_export_view, name='event_results_export'),
+
+    # URL for organizers to review likely duplicate submissions
+    # e.g., /submissions/results/event/1/duplicates/
+    path('results/event/<int:event_id>/duplicates/', views.duplicate_submissions_view, name='duplicate_submissions'),
 ]
 
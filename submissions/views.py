@@ -1,10 +1,19 @@
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from .models import Submission, Judging
-from events.models import Event, EventStaff
-from teams.models import Team 
+from django.db.models import Q
+from .models import DuplicateCandidate, Submission, Judging
+from events.context import get_event_context
+from events.models import Event
+from events.roles import event_role_required, has_event_role
+from events.views import is_staff_user
 from .forms import SubmissionForm, JudgingForm
+from .batch import BATCH_PAGE_SIZE, batch_scoring_forms, save_batch_scores
+from .queue import judge_queue_context, judge_queue_queryset, reviewable_by
+from .export import EXPORT_FORMATS, results_export_response
+from .leaderboard import get_leaderboard
+from .rubric import Rubric, ScoreTensor
 
 # --- Participant Views ---
 
@@ -13,17 +22,17 @@ def submission_create_edit_view(request, event_id):
     """
     Allows a team leader to create or edit their submission for a specific event.
     """
-    event = get_object_or_404(Event, pk=event_id)
+    access = get_event_context(request, event_id)
+    event = access.event
     
     # Security Check 1: Find the user's team for this event.
-    try:
-        team = Team.objects.get(event=event, members=request.user)
-    except Team.DoesNotExist:
+    team = access.team
+    if team is None:
         messages.error(request, "You are not part of a team for this event.")
         return redirect('event-detail', pk=event_id)
 
     # Security Check 2: Only the team leader can submit or edit.
-    if team.leader != request.user:
+    if not access.is_team_leader:
         messages.error(request, "Only the team leader can create or edit the submission.")
         return redirect('participant_dashboard')
         
@@ -52,47 +61,78 @@ def submission_create_edit_view(request, event_id):
 
 # --- Judge Views ---
 
-def is_judge_for_event(user, event):
-    """Checks if a user is assigned as a 'judge' for a specific event."""
-    return user.is_staff and EventStaff.objects.filter(user=user, event=event, role__iexact='judge').exists()
+def is_judge_for_event(user, event_id):
+    """Checks if a staff user is assigned as a 'judge' for a specific event (no query once cached)."""
+    return user.is_staff and has_event_role(user, event_id, 'judge')
 
 @login_required
+@user_passes_test(is_staff_user)
+@event_role_required('judge', message="You are not authorized to judge this event.")
 def judging_dashboard_view(request, event_id):
-    """Displays a dashboard for a judge listing all submissions for a specific event."""
+    """
+    Displays the judge's queue for a specific event: one annotated, keyset-paginated
+    query, filterable by scored/unscored and problem statement (see queue.py).
+    """
     event = get_object_or_404(Event, pk=event_id)
-    if not is_judge_for_event(request.user, event):
-        messages.error(request, "You are not authorized to judge this event.")
-        return redirect('event_manager_dashboard')
+    context = judge_queue_context(request, event)
+    return render(request, 'submissions/judging_dashboard.html', context)
 
-    submissions = Submission.objects.filter(team__event=event)
-    my_scored_submissions = Judging.objects.filter(judge=request.user, submission__in=submissions).values_list('submission_id', flat=True)
+@login_required
+@user_passes_test(is_staff_user)
+@event_role_required('judge', message="You are not authorized to judge this event.")
+def batch_scoring_view(request, event_id):
+    """
+    Lets a judge score a whole page of their queue at once. Opening the page
+    writes nothing; submitting saves the changed rows in one upsert (see batch.py).
+    """
+    event = get_object_or_404(Event, pk=event_id)
+    rubric = Rubric.for_event(event.pk)
 
-    context = {
-        'event': event,
-        'submissions': submissions,
-        'my_scored_submissions': list(my_scored_submissions),
-    }
-    return render(request, 'submissions/judging_dashboard.html', context)
+    if request.method == 'POST':
+        # Only submissions still in this judge's queue can be scored.
+        ids = [int(pk) for pk in request.POST.getlist('submission') if pk.isdigit()]
+        position = {pk: i for i, pk in enumerate(ids)}
+        submissions = sorted(judge_queue_queryset(event, request.user).filter(pk__in=ids), key=lambda s: position[s.pk])
+        rows = batch_scoring_forms(submissions, request.user, rubric, request.POST)
+        if all([form.is_valid() for _, form in rows]):
+            saved = save_batch_scores(event.pk, [form for _, form in rows])
+            messages.success(request, f"Saved {saved} score(s).")
+            return redirect(request.get_full_path())
+        messages.error(request, "Some scores could not be saved. Please correct the highlighted rows.")
+        context = {'event': event}
+    else:
+        context = judge_queue_context(request, event, per_page=BATCH_PAGE_SIZE)
+        rows = batch_scoring_forms(context['submissions'], request.user, rubric)
+
+    context.update({'rows': rows, 'rubric': rubric})
+    return render(request, 'submissions/batch_scoring.html', context)
 
 @login_required
 def submission_score_view(request, submission_id):
     """Allows a judge to view a submission's details and submit or edit a score."""
-    submission = get_object_or_404(Submission, pk=submission_id)
+    submission = get_object_or_404(Submission.objects.select_related('team__event'), pk=submission_id)
     event = submission.team.event
-    if not is_judge_for_event(request.user, event):
+    if not is_judge_for_event(request.user, event.id):
         messages.error(request, "You are not authorized to score this submission.")
         return redirect('event_manager_dashboard')
-        
-    judging_instance, created = Judging.objects.get_or_create(judge=request.user, submission=submission)
+    if not Submission.objects.filter(reviewable_by(event, request.user), pk=submission.pk).exists():
+        messages.error(request, "This submission is assigned to other judges.")
+        return redirect('judging_dashboard', event_id=event.id)
+
+    judging_instance = Judging.objects.filter(judge=request.user, submission=submission).first()
+    if judging_instance is None:
+        # Not saved until the judge submits a score; Judging.score can't be empty.
+        judging_instance = Judging(judge=request.user, submission=submission)
 
+    rubric = Rubric.for_event(event.id)
     if request.method == 'POST':
-        form = JudgingForm(request.POST, instance=judging_instance)
+        form = JudgingForm(request.POST, instance=judging_instance, rubric=rubric)
         if form.is_valid():
             form.save()
             messages.success(request, f"Your score for '{submission.project_title}' has been saved.")
             return redirect('judging_dashboard', event_id=event.id)
     else:
-        form = JudgingForm(instance=judging_instance)
+        form = JudgingForm(instance=judging_instance, rubric=rubric)
 
     context = {
         'submission': submission,
@@ -100,3 +140,70 @@ def submission_score_view(request, submission_id):
     }
     return render(request, 'submissions/judging_form.html', context)
 
+# --- Organizer Views ---
+
+RESULT_DISTRIBUTION_BINS = 5
+
+@login_required
+@user_passes_test(is_staff_user)
+@event_role_required('manager', message="Only the event's organizers can view its results.")
+def event_results_view(request, event_id):
+    """
+    Ranks an event's submissions by their judge-normalized mean score, next to
+    the raw mean. The leaderboard itself is cached and patched as scores change.
+    """
+    event = get_object_or_404(Event, pk=event_id)
+    rows = get_leaderboard(event.pk).rows()
+    submissions = Submission.objects.select_related('team', 'problem_statement').in_bulk([row.submission_id for row in rows])
+
+    results = [(row, submissions[row.submission_id]) for row in rows if row.submission_id in submissions]
+
+    # With a rubric, add each submission's per-criterion means and the score distribution of each criterion.
+    rubric = Rubric.for_event(event.pk)
+    criteria, distributions = [], []
+    if not rubric.is_single_score:
+        tensor = ScoreTensor.for_event(event.pk, rubric)
+        means = dict(zip(tensor.submission_ids.tolist(), tensor.criterion_means().tolist()))
+        for row, submission in results:
+            submission.criterion_means = means.get(row.submission_id, [])
+        criteria = rubric.criteria
+        distributions = list(zip(criteria, tensor.distributions(bins=RESULT_DISTRIBUTION_BINS).tolist()))
+
+    context = {
+        'event': event,
+        'results': results,
+        'criteria': criteria,
+        'distributions': distributions,
+        'distribution_labels': [
+            f"{100 * i // RESULT_DISTRIBUTION_BINS}-{100 * (i + 1) // RESULT_DISTRIBUTION_BINS}%" for i in range(RESULT_DISTRIBUTION_BINS)
+        ],
+    }
+    return render(request, 'submissions/event_results.html', context)
+
+@login_required
+@user_passes_test(is_staff_user)
+@event_role_required('manager', message="Only the event's organizers can export its results.")
+def event_results_export_view(request, event_id, fmt):
+    """
+    Streams the event's full results (submissions, teams, members and every
+    judge's score and feedback) as CSV or JSON Lines; see export.py.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise Http404("Unknown export format.")
+    event = get_object_or_404(Event, pk=event_id)
+    return results_export_response(event, fmt)
+
+@login_required
+@user_passes_test(is_staff_user)
+@event_role_required('manager', message="Only the event's organizers can review its submissions.")
+def duplicate_submissions_view(request, event_id):
+    """
+    Lists pairs of submissions, at least one of them from this event, that look
+    like copies of each other (see duplicates.py). Dismissing happens in the admin.
+    """
+    event = get_object_or_404(Event, pk=event_id)
+    candidates = (
+        DuplicateCandidate.objects.filter(Q(submission__team__event=event) | Q(other__team__event=event), dismissed=False)
+        .select_related('submission__team__event', 'other__team__event')
+    )
+    return render(request, 'submissions/duplicate_submissions.html', {'event': event, 'candidates': candidates})
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Team, TeamMember
+from .codes import allocate_team_codes
 
 class TeamMemberInline(admin.TabularInline):
     model = TeamMember
@@ -9,11 +10,21 @@ class TeamMemberInline(admin.TabularInline):
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
-    list_display = ('team_name', 'event', 'leader', 'created_at')
+    list_display = ('team_name', 'event', 'leader', 'member_count', 'max_size', 'created_at')
     list_filter = ('event',)
     search_fields = ('team_name', 'leader__username')
     inlines = [TeamMemberInline]
-    autocomplete_fields = ['leader']
+    autocomplete_fields = ['leader', 'mentors']
+    readonly_fields = ('team_code', 'member_count')
+    actions = ['regenerate_team_codes']
+
+    @admin.action(description="Issue new invite codes for selected teams")
+    def regenerate_team_codes(self, request, queryset):
+        teams = list(queryset.only('pk'))
+        for team, code in zip(teams, allocate_team_codes(len(teams))):
+            team.team_code = code
+        Team.objects.bulk_update(teams, ['team_code'], batch_size=500)
+        self.message_user(request, f"Issued new codes for {len(teams)} team(s).")
 
 @admin.register(TeamMember)
 class TeamMemberAdmin(admin.ModelAdmin):
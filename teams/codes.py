@@ -0,0 +1,87 @@
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+# Crockford base32: no I, L, O or U, so codes survive being read aloud or retyped.
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+CODE_LENGTH = 8
+HALF_BITS = CODE_LENGTH * 5 // 2     # 8 chars x 5 bits = a 40-bit code, in two 20-bit halves
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+
+# Characters people commonly type for the ones missing from the alphabet.
+_LOOKALIKES = str.maketrans({'O': '0', 'I': '1', 'L': '1'})
+
+
+def _key():
+    # Pin TEAM_CODE_SECRET in settings if SECRET_KEY may ever be rotated:
+    # codes are only guaranteed distinct under a single key.
+    secret = getattr(settings, 'TEAM_CODE_SECRET', settings.SECRET_KEY)
+    return hashlib.sha256(f'teams.codes:{secret}'.encode()).digest()
+
+
+def _round(key, i, half):
+    digest = hashlib.blake2b(half.to_bytes(4, 'big'), key=key, person=b'team-code-%d' % i, digest_size=4).digest()
+    return int.from_bytes(digest, 'big') & HALF_MASK
+
+
+def permute(number, key=None):
+    """
+    Maps a sequence number in [0, 2**40) to a unique, unpredictable value in
+    the same range. A keyed Feistel network is a bijection, so distinct
+    sequence numbers can never produce the same code.
+    """
+    key = key or _key()
+    left, right = number >> HALF_BITS, number & HALF_MASK
+    for i in range(ROUNDS):
+        left, right = right, left ^ _round(key, i, right)
+    return (left << HALF_BITS) | right
+
+
+def encode(value):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def normalize_team_code(code):
+    """Upper-cases a typed code and maps look-alike characters onto the alphabet."""
+    return code.strip().upper().translate(_LOOKALIKES)
+
+
+def reserve_sequence(count):
+    """
+    Reserves `count` consecutive sequence numbers with one short row lock.
+    The lock is only short outside a transaction: inside one, the block below
+    is a savepoint and the sequence row stays locked until the caller
+    commits, queueing every other team creation behind it. Callers that
+    write in a transaction allocate their codes before opening it; a number
+    left unused when the write fails is simply skipped.
+    """
+    from .models import TeamCodeSequence
+
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                sequence, _ = TeamCodeSequence.objects.select_for_update().get_or_create(pk=1)
+                start = sequence.next_value
+                sequence.next_value = start + count
+                sequence.save(update_fields=['next_value'])
+            return range(start, start + count)
+        except IntegrityError:
+            # Two first-ever allocations raced to create the row; the loser retries.
+            continue
+    raise IntegrityError("Could not reserve team code sequence numbers.")
+
+
+def allocate_team_codes(count=1):
+    """
+    Returns `count` new team codes. Every code comes from its own sequence
+    number, so codes are collision-free by construction and thousands can be
+    allocated with a single database round trip.
+    """
+    key = _key()
+    return [encode(permute(number, key)) for number in reserve_sequence(count)]
@@ -0,0 +1,234 @@
+"""
+Automatic team formation for participants who registered but never joined a team.
+
+Each participant becomes a feature vector built from their profile: one column per
+skill mentioned in `skills`/`technical_skillset`, plus lighter one-hot columns for
+`branch` and `year_of_study`. Teams are then built so that members complement each
+other instead of duplicating the same skills:
+
+1. Participants are ordered along the main axis of variation in the feature matrix
+   (its first principal component) and dealt into strata, one member per team per
+   stratum, so every team gets people from different parts of the skill space.
+2. Within each stratum, candidates are matched to teams in blocks. A team scores a
+   candidate by the skills it would newly cover minus how similar the candidate is
+   to the members it already has. Scores for a whole block are one matrix product.
+
+Everything is written in one transaction with bulk inserts.
+"""
+import math
+import re
+
+import numpy as np
+from django.db import transaction
+
+from accounts.models import EventRegistration
+from events.stats import bump_event_stats
+from .codes import allocate_team_codes
+from .models import Team, TeamMember
+
+SKILL_SEPARATORS = re.compile(r'[,;/|\n]+')
+# How much branch and year count next to one skill when scoring similarity.
+BRANCH_WEIGHT = 0.5
+YEAR_WEIGHT = 0.25
+# Number of teams matched together; bounds each score matrix to BLOCK_SIZE**2.
+BLOCK_SIZE = 256
+
+
+def parse_skills(*texts):
+    """Splits free-text skill lists into a set of normalized skill names."""
+    skills = set()
+    for text in texts:
+        for skill in SKILL_SEPARATORS.split(text or ''):
+            skill = ' '.join(skill.split()).lower()
+            if skill:
+                skills.add(skill)
+    return skills
+
+
+def build_feature_matrix(profiles):
+    """
+    `profiles` is a list of (skills, branch, year) tuples. Returns an (n, d) float32
+    matrix: binary skill columns followed by weighted branch and year columns.
+    """
+    vocab, branches, years = {}, {}, {}
+    rows, cols, vals = [], [], []
+    parsed = []
+    for skills, branch, year in profiles:
+        parsed.append(([vocab.setdefault(s, len(vocab)) for s in sorted(skills)],
+                       branches.setdefault(branch, len(branches)) if branch else None,
+                       years.setdefault(year, len(years)) if year is not None else None))
+
+    branch_offset = len(vocab)
+    year_offset = branch_offset + len(branches)
+    for i, (skill_cols, branch_col, year_col) in enumerate(parsed):
+        rows.extend([i] * len(skill_cols))
+        cols.extend(skill_cols)
+        vals.extend([1.0] * len(skill_cols))
+        if branch_col is not None:
+            rows.append(i)
+            cols.append(branch_offset + branch_col)
+            vals.append(BRANCH_WEIGHT)
+        if year_col is not None:
+            rows.append(i)
+            cols.append(year_offset + year_col)
+            vals.append(YEAR_WEIGHT)
+
+    matrix = np.zeros((len(profiles), max(year_offset + len(years), 1)), dtype=np.float32)
+    matrix[rows, cols] = vals
+    return matrix, len(vocab)
+
+
+def _principal_order(features):
+    """Orders rows by their projection on the first principal component."""
+    centered = features - features.mean(axis=0)
+    # The d x d covariance is far smaller than the n x d matrix for any real event.
+    _, vectors = np.linalg.eigh(centered.T @ centered)
+    projection = centered @ vectors[:, -1]
+    return np.argsort(projection, kind='stable')
+
+
+def _greedy_match(scores):
+    """
+    Matches rows (teams) to columns (candidates) of a score matrix, best pairs first.
+    Each pass lets every free team propose to its best free candidate and every
+    candidate keep its best proposal, so a block usually settles in a few passes.
+    Returns `assignment` where assignment[team] is a column index or -1.
+    """
+    scores = scores.astype(np.float64, copy=True)
+    n_teams, n_candidates = scores.shape
+    assignment = np.full(n_teams, -1)
+    free_teams = np.ones(n_teams, dtype=bool)
+    for _ in range(min(n_teams, n_candidates)):
+        if not free_teams.any() or np.isneginf(scores).all():
+            break
+        proposals = np.where(free_teams, scores.argmax(axis=1), -1)
+        proposal_scores = np.where(free_teams, scores[np.arange(n_teams), np.maximum(proposals, 0)], -np.inf)
+        valid = np.isfinite(proposal_scores)
+        if not valid.any():
+            break
+        # For each proposed candidate, keep the team that values it most.
+        order = np.lexsort((-proposal_scores, proposals))
+        order = order[valid[order]]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = proposals[order][1:] != proposals[order][:-1]
+        winners = order[first]
+        assignment[winners] = proposals[winners]
+        free_teams[winners] = False
+        scores[winners, :] = -np.inf
+        scores[:, proposals[winners]] = -np.inf
+    return assignment
+
+
+def plan_teams(features, team_size, skill_columns=None):
+    """
+    Splits the rows of `features` into ceil(n / team_size) teams whose sizes differ
+    by at most one. Returns a list of teams, each a list of row indices; the first
+    index of each team is the member with the broadest skill set.
+    """
+    n = len(features)
+    if n == 0:
+        return []
+    if team_size < 1:
+        raise ValueError("Team size must be at least 1.")
+    skill_columns = features.shape[1] if skill_columns is None else skill_columns
+    n_teams = math.ceil(n / team_size)
+
+    order = _principal_order(features)
+    strata = [order[start:start + n_teams] for start in range(0, n, n_teams)]
+
+    # Seed every team with one member of the first stratum, broadest skills first.
+    breadth = features[:, :skill_columns].sum(axis=1)
+    first = strata[0][np.argsort(-breadth[strata[0]], kind='stable')]
+    members = [[int(i)] for i in first]
+    profile = features[first].copy()
+    norms = np.linalg.norm(features, axis=1)
+    norms[norms == 0] = 1.0
+    unit = features / norms[:, None]
+    centroid = unit[first].copy()
+
+    for stratum in strata[1:]:
+        for block_start in range(0, n_teams, BLOCK_SIZE):
+            teams = np.arange(block_start, min(block_start + BLOCK_SIZE, n_teams))
+            candidates = stratum[block_start:block_start + BLOCK_SIZE]
+            if len(candidates) == 0:
+                break
+            uncovered = (profile[teams, :skill_columns] == 0).astype(np.float32)
+            novelty = uncovered @ features[candidates, :skill_columns].T
+            centroid_norms = np.linalg.norm(centroid[teams], axis=1)
+            centroid_norms[centroid_norms == 0] = 1.0
+            similarity = (centroid[teams] / centroid_norms[:, None]) @ unit[candidates].T
+            assignment = _greedy_match(novelty - similarity)
+
+            matched = assignment >= 0
+            team_rows, picked = teams[matched], candidates[assignment[matched]]
+            for team, candidate in zip(team_rows, picked):
+                members[team].append(int(candidate))
+            profile[team_rows] += features[picked]
+            centroid[team_rows] += unit[picked]
+    return members
+
+
+class FormationResult:
+    def __init__(self, participants=0):
+        self.participants = participants
+        self.teams = []  # (team, [members]) for every team formed
+
+
+def unteamed_registrations(event):
+    """Active registrations of participants who are not on any team of `event`."""
+    teamed = TeamMember.objects.filter(team__event=event).values('participant_id')
+    return (
+        EventRegistration.objects.filter(event=event, status='registered')
+        .exclude(participant_id__in=teamed)
+        .select_related('participant__profile')
+        .order_by('participant_id')
+    )
+
+
+def form_teams(event, team_size=4, dry_run=False):
+    """
+    Groups every unteamed participant of `event` into new teams of `team_size`
+    (the last few teams may have one member fewer). The first member of each
+    team becomes its leader. With `dry_run` nothing is written and the returned
+    teams hold unsaved objects.
+    """
+    registrations = list(unteamed_registrations(event))
+    participants = [reg.participant for reg in registrations]
+    profiles = []
+    for user in participants:
+        profile = getattr(user, 'profile', None)
+        if profile is None:
+            profiles.append((set(), None, None))
+        else:
+            profiles.append((parse_skills(profile.skills, profile.technical_skillset),
+                             (profile.branch or '').strip().lower() or None, profile.year_of_study))
+    features, skill_columns = build_feature_matrix(profiles)
+    plan = plan_teams(features, team_size, skill_columns)
+    result = FormationResult(participants=len(participants))
+    if not plan:
+        return result
+
+    # Codes are reserved before the transaction, so the code sequence isn't locked for its duration.
+    codes = allocate_team_codes(len(plan)) if not dry_run else [''] * len(plan)
+    teams = [
+        Team(event=event, team_name=f"Team {code}" if code else f"Team {number}", team_code=code,
+             leader=participants[rows[0]], max_size=team_size, member_count=len(rows))
+        for number, (code, rows) in enumerate(zip(codes, plan), start=1)
+    ]
+    result.teams = [(team, [participants[i] for i in rows]) for team, rows in zip(teams, plan)]
+    if dry_run:
+        return result
+
+    with transaction.atomic():
+        Team.objects.bulk_create(teams, batch_size=500)
+        if teams[0].pk is None:
+            # Backends like MySQL don't return primary keys from bulk inserts.
+            pks = dict(Team.objects.filter(team_code__in=codes).values_list('team_code', 'pk'))
+            for team in teams:
+                team.pk = pks[team.team_code]
+        TeamMember.objects.bulk_create(
+            [TeamMember(team=team, participant=member) for team, members in result.teams for member in members],
+            batch_size=1000,
+        )
+        bump_event_stats(event.pk, teams=len(teams), team_members=len(participants))
+    return result
@@ -23,6 +23,6 @@ class TeamJoinForm(forms.Form):
     """
     team_code = forms.CharField(
         max_length=20,
-        widget=forms.TextInput(attrs={'class': 'w-full p-2 border rounded-md', 'placeholder': 'Enter the 6-digit team code'}),
+        widget=forms.TextInput(attrs={'class': 'w-full p-2 border rounded-md', 'placeholder': 'Enter the 8-character team code'}),
         label="Team Invitation Code"
     )
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event
+from teams.formation import form_teams
+
+
+class Command(BaseCommand):
+    help = "Groups every registered participant of an event who has no team into new, skill-balanced teams."
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument('--team-size', type=int, default=4)
+        parser.add_argument('--dry-run', action='store_true', help="Print the proposed teams without saving them.")
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event_id'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} does not exist.")
+        if options['team_size'] < 1:
+            raise CommandError("--team-size must be at least 1.")
+
+        started = time.perf_counter()
+        result = form_teams(event, team_size=options['team_size'], dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - started
+
+        if options['dry_run']:
+            for team, members in result.teams:
+                self.stdout.write(f"{team.team_name}: {', '.join(m.username for m in members)}")
+        verb = "Would form" if options['dry_run'] else "Formed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(result.teams)} team(s) from {result.participants} unteamed participant(s) in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from teams.models import Team
+
+
+class Command(BaseCommand):
+    help = "Recounts TeamMember rows and fixes any Team.member_count that has drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the teams that are out of step.")
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Team.objects.annotate(actual=Count('members'))
+            .exclude(member_count=F('actual'))
+            .only('pk', 'team_name', 'member_count')
+        )
+        for team in drifted:
+            self.stdout.write(f"{team.team_name} (#{team.pk}): stored {team.member_count}, actual {team.actual}")
+            team.member_count = team.actual
+
+        if drifted and not options['dry_run']:
+            Team.objects.bulk_update(drifted, ['member_count'], batch_size=500)
+        verb = "Found" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drifted)} team(s) with a wrong member count."))
@@ -1,34 +1,80 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
 from events.models import Event
-import uuid
+from .codes import allocate_team_codes
 
 def generate_unique_code():
-    """Generates a unique 6-character uppercase alphanumeric code."""
-    return str(uuid.uuid4().hex[:6].upper())
+    """Allocates one collision-free team code (see teams/codes.py)."""
+    return allocate_team_codes(1)[0]
+
+# Single-row counter that feeds the team code allocator.
+class TeamCodeSequence(models.Model):
+    next_value = models.PositiveBigIntegerField(default=0)
+
+class TeamQuerySet(models.QuerySet):
+    def claim_seat(self, pk):
+        """
+        Takes one free seat on a team with a single guarded UPDATE.
+        Returns False if the team is already full.
+        """
+        return self.filter(pk=pk, member_count__lt=F('max_size')).update(member_count=F('member_count') + 1) == 1
+
+    def release_seat(self, pk):
+        return self.filter(pk=pk, member_count__gt=0).update(member_count=F('member_count') - 1) == 1
 
 class Team(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='teams')
     team_name = models.CharField(max_length=100)
-    team_code = models.CharField(max_length=20, unique=True, default=generate_unique_code, help_text="Unique code for invites")
+    # Assigned on first save; bulk creators should fill it from allocate_team_codes(n).
+    team_code = models.CharField(max_length=20, unique=True, blank=True, editable=False, help_text="Unique code for invites")
     leader = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='led_teams')
     max_size = models.PositiveIntegerField(default=5)
+    # Staff who advise this team; the judge scheduler never assigns them to it.
+    mentors = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='mentored_teams')
+    # Denormalized count of TeamMember rows, maintained by TeamMember.objects.join()
+    # and the signals in teams/signals.py. Repair with `manage.py repair_team_member_counts`.
+    member_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    objects = TeamQuerySet.as_manager()
+
     # The 'members' relationship is defined via a reverse relation from the TeamMember model
 
     class Meta:
         # A team name should be unique *within* a specific event
         unique_together = ('event', 'team_name')
 
+    def save(self, *args, **kwargs):
+        if not self.team_code:
+            self.team_code = generate_unique_code()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.team_name} ({self.event.event_name})"
 
+class TeamMemberManager(models.Manager):
+    def join(self, team, participant):
+        """
+        Adds `participant` to `team` if it has a free seat. The seat is taken
+        with one conditional UPDATE on the team row, so concurrent joins can
+        never overfill a team. Returns the new membership, or None if full.
+        """
+        with transaction.atomic():
+            if not Team.objects.claim_seat(team.pk):
+                return None
+            member = self.model(team=team, participant=participant)
+            member._seat_claimed = True # Tells the post_save signal not to count it again
+            member.save()
+        return member
+
 class TeamMember(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='members')
     participant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='team_memberships')
     joined_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TeamMemberManager()
+
     class Meta:
         # A user can only be on one team per event
         unique_together = ('team', 'participant')
@@ -0,0 +1,17 @@
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Team, TeamMember
+
+# Keep Team.member_count in step with memberships created or removed
+# outside TeamMember.objects.join() (team creation, the admin, deletes).
+
+@receiver(post_save, sender=TeamMember)
+def count_new_member(sender, instance, created, **kwargs):
+    if created and not getattr(instance, '_seat_claimed', False):
+        Team.objects.filter(pk=instance.team_id).update(member_count=F('member_count') + 1)
+
+@receiver(post_delete, sender=TeamMember)
+def uncount_removed_member(sender, instance, **kwargs):
+    Team.objects.release_seat(instance.team_id)
@@ -1,3 +1,195 @@
-from django.test import TestCase
+import os
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import EventRegistration, User, UserProfile
+from campusinnovate.testing import make_event
+from events.models import EventStats
+from . import codes
+from .codes import ALPHABET, allocate_team_codes, normalize_team_code, permute
+from .formation import build_feature_matrix, form_teams, parse_skills, plan_teams
+from .models import Team, TeamMember
+
+
+
+class TeamMemberCountTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(username=f'u{i}') for i in range(4)]
+        self.team = Team.objects.create(event=make_event(), team_name='A', leader=self.users[0], max_size=3)
+        TeamMember.objects.create(team=self.team, participant=self.users[0])
+
+    def count(self):
+        return Team.objects.values_list('member_count', flat=True).get(pk=self.team.pk)
+
+    def test_join_and_leave_maintain_count(self):
+        self.assertEqual(self.count(), 1)
+        self.assertIsNotNone(TeamMember.objects.join(self.team, self.users[1]))
+        self.assertIsNotNone(TeamMember.objects.join(self.team, self.users[2]))
+        self.assertIsNone(TeamMember.objects.join(self.team, self.users[3]))
+        self.assertEqual(self.count(), 3)
+        TeamMember.objects.filter(participant=self.users[2]).delete()
+        self.assertEqual(self.count(), 2)
+
+    def test_repair_command_fixes_drift(self):
+        Team.objects.filter(pk=self.team.pk).update(member_count=7)
+        call_command('repair_team_member_counts', stdout=StringIO())
+        self.assertEqual(self.count(), 1)
+
+
+class ParallelTeamJoinTests(TransactionTestCase):
+    def test_parallel_joins_never_exceed_max_size(self):
+        users = User.objects.bulk_create([User(username=f'u{i}') for i in range(80)])
+        users = list(User.objects.order_by('pk'))
+        team = Team.objects.create(event=make_event(), team_name='A', leader=users[0], max_size=5)
+
+        def join(user):
+            try:
+                return TeamMember.objects.join(team, user) is not None
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(join, users))
+
+        team.refresh_from_db()
+        self.assertEqual(sum(results), 5)
+        self.assertEqual(team.member_count, 5)
+        self.assertEqual(team.members.count(), 5)
+
+
+class TeamCodeAllocatorTests(TestCase):
+    def test_permutation_is_a_bijection(self):
+        key = b'k' * 32
+        values = {permute(n, key) for n in range(20000)}
+        self.assertEqual(len(values), 20000)
+        self.assertTrue(all(0 <= v < 2 ** 40 for v in values))
+
+    def test_allocates_distinct_codes_across_calls(self):
+        codes = allocate_team_codes(500) + allocate_team_codes(500)
+        self.assertEqual(len(set(codes)), 1000)
+        self.assertTrue(all(len(code) == 8 and set(code) <= set(ALPHABET) for code in codes))
+
+    def test_team_gets_code_on_save_and_lookalikes_normalize(self):
+        team = Team.objects.create(event=make_event(), team_name='A')
+        self.assertEqual(len(team.team_code), 8)
+        typed = team.team_code.lower().replace('0', 'o').replace('1', 'l')
+        self.assertEqual(normalize_team_code(f' {typed} '), team.team_code)
+
+    def test_codes_are_reserved_outside_the_callers_transaction(self):
+        # The test case's own atomic blocks are the baseline; a caller's transaction would add one.
+        depths = []
+        reserve = codes.reserve_sequence
+        def spy(count):
+            depths.append(len(connection.atomic_blocks))
+            return reserve(count)
+
+        event = make_event()
+        make_participants(event, 6)
+        user = User.objects.create(username='leader')
+        self.client.force_login(user)
+        with mock.patch.object(codes, 'reserve_sequence', spy):
+            form_teams(event, team_size=3)
+            EventRegistration.objects.create(event=event, participant=user)
+            self.client.post(reverse('team_create', args=[event.pk]), {'team_name': 'Leaders', 'max_size': 4})
+        self.assertTrue(Team.objects.filter(team_name='Leaders', leader=user).exists())
+        self.assertEqual(depths, [len(connection.atomic_blocks)] * 2)
+
+
+@unittest.skipUnless(os.environ.get('CAMPUSINNOVATE_BENCHMARKS'), "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class TeamCodeAllocationBenchmark(TestCase):
+    def test_allocation_throughput(self):
+        count = 100000
+        started = time.perf_counter()
+        codes = allocate_team_codes(count)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(set(codes)), count)
+        print(f"\nteam code allocation: {count} codes in {elapsed:.2f}s, {count / elapsed:.0f} codes/s")
+
+
+SKILL_POOL = ['python', 'django', 'react', 'design', 'ml', 'java', 'android', 'sql', 'devops', 'pitching', 'ui', 'iot']
+
+
+def make_participants(event, count, offset=0):
+    users = User.objects.bulk_create([User(username=f'p{offset + i}') for i in range(count)])
+    users = list(User.objects.filter(username__in=[u.username for u in users]).order_by('pk'))
+    UserProfile.objects.bulk_create([
+        UserProfile(user=user, branch=['CSE', 'ECE', 'MECH'][i % 3], year_of_study=1 + i % 4,
+                    skills=', '.join(SKILL_POOL[(i * 7 + j) % 12] for j in range(i % 3 + 1)),
+                    technical_skillset=SKILL_POOL[i % 12])
+        for i, user in enumerate(users)
+    ])
+    EventRegistration.objects.bulk_create([EventRegistration(event=event, participant=user) for user in users])
+    return users
+
+
+class TeamFormationTests(TestCase):
+    def test_parse_skills_normalizes_free_text(self):
+        self.assertEqual(parse_skills('Python,  Machine   Learning;', 'python / React\nSQL'),
+                         {'python', 'machine learning', 'react', 'sql'})
+
+    def test_plan_balances_sizes_and_spreads_skills(self):
+        profiles = [({'frontend'}, None, None)] * 5 + [({'backend'}, None, None)] * 5
+        features, skill_columns = build_feature_matrix(profiles)
+        plan = plan_teams(features, 2, skill_columns)
+        self.assertEqual(sorted(i for team in plan for i in team), list(range(10)))
+        self.assertEqual([len(team) for team in plan], [2] * 5)
+        # Every pair should mix a frontend and a backend participant.
+        self.assertTrue(all({i < 5 for i in team} == {True, False} for team in plan))
+
+    def test_uneven_counts_give_sizes_within_one(self):
+        features, skill_columns = build_feature_matrix([({f's{i}'}, None, None) for i in range(11)])
+        sizes = sorted(len(team) for team in plan_teams(features, 4, skill_columns))
+        self.assertEqual(sizes, [3, 4, 4])
+
+    def test_form_teams_writes_teams_members_and_stats(self):
+        event = make_event()
+        users = make_participants(event, 10)
+        existing = Team.objects.create(event=event, team_name='Existing', leader=users[0])
+        TeamMember.objects.create(team=existing, participant=users[0])
+        EventRegistration.objects.filter(participant=users[1]).update(status='cancelled')
+
+        result = form_teams(event, team_size=3)
+
+        self.assertEqual(result.participants, 8)
+        formed = Team.objects.filter(event=event).exclude(pk=existing.pk)
+        self.assertEqual(formed.count(), 3)
+        members = TeamMember.objects.filter(team__in=formed)
+        self.assertEqual(members.count(), 8)
+        self.assertFalse(members.filter(participant__in=users[:2]).exists())
+        for team in formed:
+            self.assertEqual(team.member_count, team.members.count())
+            self.assertTrue(team.members.filter(participant=team.leader).exists())
+        stats = EventStats.objects.get(event=event)
+        self.assertEqual((stats.teams, stats.team_members), (4, 9))
+        # Nobody is left to place on a second run.
+        self.assertEqual(form_teams(event).participants, 0)
+
+    def test_dry_run_writes_nothing(self):
+        event = make_event()
+        make_participants(event, 6)
+        out = StringIO()
+        call_command('form_teams', event.pk, '--team-size', '3', '--dry-run', stdout=out)
+        self.assertIn('Would form 2 team(s)', out.getvalue())
+        self.assertFalse(Team.objects.exists())
+
+
+@unittest.skipUnless(os.environ.get('CAMPUSINNOVATE_BENCHMARKS'), "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class TeamFormationBenchmark(TestCase):
+    def test_formation_scales(self):
+        for count in (500, 5000, 20000):
+            event = make_event()
+            make_participants(event, count, offset=count)
+            started = time.perf_counter()
+            result = form_teams(event, team_size=4)
+            elapsed = time.perf_counter() - started
+            self.assertEqual(TeamMember.objects.filter(team__event=event).count(), count)
+            print(f"\nteam formation: {count} participants -> {len(result.teams)} teams in {elapsed:.2f}s")
@@ -2,34 +2,38 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
-from .models import Team, TeamMember
-from events.models import Event, EventRegistration
+from .models import Team, TeamMember, generate_unique_code
+from events.context import get_event_context
+from accounts.ratelimit import get_rate_limit
 from .forms import TeamCreateForm, TeamJoinForm
+from .codes import normalize_team_code
 
 @login_required
 def team_create_view(request, event_id):
     """Allows a registered participant to create a new team for an event."""
-    event = get_object_or_404(Event, pk=event_id)
+    access = get_event_context(request, event_id)
+    event = access.event
 
     # Security Check 1: User must be registered for the event.
-    if not EventRegistration.objects.filter(participant=request.user, event=event).exists():
+    if not access.is_registered:
         messages.error(request, "You must be registered for this event to create a team.")
         return redirect('event-detail', pk=event_id)
 
     # Security Check 2: User cannot be in another team for this event.
-    if TeamMember.objects.filter(participant=request.user, team__event=event).exists():
+    if access.team is not None:
         messages.error(request, "You are already in a team for this event.")
-        team_member = TeamMember.objects.get(participant=request.user, team__event=event)
-        return redirect('team_detail', team_id=team_member.team.id)
+        return redirect('team_detail', team_id=access.team.id)
 
     if request.method == 'POST':
         form = TeamCreateForm(request.POST)
         if form.is_valid():
+            team = form.save(commit=False)
+            team.event = event
+            team.leader = request.user
+            # Reserved before the transaction, so the code sequence isn't locked for its duration.
+            team.team_code = generate_unique_code()
             try:
                 with transaction.atomic():
-                    team = form.save(commit=False)
-                    team.event = event
-                    team.leader = request.user
                     team.save()
 
                     TeamMember.objects.create(team=team, participant=request.user)
@@ -52,7 +56,8 @@ def team_detail_view(request, team_id):
     """Displays the dashboard for a specific team, for its members only."""
     team = get_object_or_404(Team.objects.prefetch_related('members__participant__profile'), pk=team_id)
     
-    user_is_member = team.members.filter(participant=request.user).exists()
+    # The members are already prefetched, so checking them costs no query.
+    user_is_member = any(member.participant_id == request.user.pk for member in team.members.all())
     if not user_is_member and not request.user.is_staff:
         messages.error(request, "You are not authorized to view this team page.")
         return redirect('participant_dashboard')
@@ -66,33 +71,40 @@ def team_detail_view(request, team_id):
 @login_required
 def team_join_view(request, event_id):
     """Allows a registered participant to join a team using a team code."""
-    event = get_object_or_404(Event, pk=event_id)
+    # Throttle team-code guessing per user and per IP, before any queries run.
+    rate_limit = get_rate_limit('team_join')
+    rate_limit_keys = (f'user:{request.user.pk}:event:{event_id}', f"ip:{request.META.get('REMOTE_ADDR')}:event:{event_id}")
+    if request.method == 'POST' and rate_limit.is_limited(*rate_limit_keys):
+        messages.error(request, "Too many invalid team codes. Please wait a while before trying again.")
+        return redirect('team_join', event_id=event_id)
 
-    if not EventRegistration.objects.filter(participant=request.user, event=event).exists():
+    access = get_event_context(request, event_id)
+    event = access.event
+
+    if not access.is_registered:
         messages.error(request, "You must be registered for this event to join a team.")
         return redirect('event-detail', pk=event_id)
 
-    if TeamMember.objects.filter(participant=request.user, team__event=event).exists():
+    if access.team is not None:
         messages.error(request, "You are already in a team for this event.")
-        team_member = TeamMember.objects.get(participant=request.user, team__event=event)
-        return redirect('team_detail', team_id=team_member.team.id)
+        return redirect('team_detail', team_id=access.team.id)
     
     if request.method == 'POST':
         form = TeamJoinForm(request.POST)
         if form.is_valid():
-            team_code = form.cleaned_data['team_code'].upper()
+            team_code = normalize_team_code(form.cleaned_data['team_code'])
             try:
-                with transaction.atomic():
-                    team_to_join = Team.objects.select_for_update().get(team_code=team_code, event=event)
-                    
-                    if team_to_join.members.count() >= team_to_join.max_size:
-                        messages.error(request, f"Cannot join. Team '{team_to_join.team_name}' is already full.")
-                        return redirect('team_join', event_id=event.id)
-                    
-                    TeamMember.objects.create(team=team_to_join, participant=request.user)
-                    messages.success(request, f"You have successfully joined team '{team_to_join.team_name}'!")
-                    return redirect('team_detail', team_id=team_to_join.id)
+                team_to_join = Team.objects.get(team_code=team_code, event=event)
+
+                # Takes a seat with one guarded UPDATE; no row lock or COUNT needed.
+                if TeamMember.objects.join(team_to_join, request.user) is None:
+                    messages.error(request, f"Cannot join. Team '{team_to_join.team_name}' is already full.")
+                    return redirect('team_join', event_id=event.id)
+
+                messages.success(request, f"You have successfully joined team '{team_to_join.team_name}'!")
+                return redirect('team_detail', team_id=team_to_join.id)
             except Team.DoesNotExist:
+                rate_limit.hit(*rate_limit_keys)
                 messages.error(request, "Invalid team code for this event. Please check the code and try again.")
     else:
         form = TeamJoinForm()
@@ -111,7 +123,7 @@ def team_leave_view(request, team_id):
 
     if request.method == 'POST':
         if team.leader == request.user:
-            if team.members.count() > 1:
+            if team.member_count > 1:
                 messages.error(request, "As the team leader, you must transfer leadership or be the last member to leave.")
                 return redirect('team_detail', team_id=team.id)
             else:
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from .models import Attendance, Feedback
-from import_export.admin import ImportExportModelAdmin
+from campusinnovate.chunked_import_export import ChunkedImportExportModelAdmin
+from .resources import AttendanceResource
 
 @admin.register(Attendance)
-class AttendanceAdmin(ImportExportModelAdmin):
+class AttendanceAdmin(ChunkedImportExportModelAdmin):
     """
     Admin view for managing participant attendance.
     Allows for easy filtering and bulk editing.
@@ -13,8 +14,9 @@ class AttendanceAdmin(ImportExportModelAdmin):
     search_fields = ('participant__username', 'participant__first_name', 'participant__last_name', 'event__event_name')
     list_editable = ('is_present',)
     autocomplete_fields = ('participant', 'event')
-    # Enables exporting attendance lists to CSV/Excel
-    resource_class = None 
+    # Enables exporting attendance lists to CSV/Excel; large files go through
+    # the chunked import and stream export views.
+    resource_classes = [AttendanceResource]
 
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
@@ -0,0 +1,181 @@
+"""
+QR check-in: volunteers scan a participant's signed token at the door.
+
+A token is "<event id>.<participant id>" plus an HMAC signature, so a scan
+is verified with the secret key alone, without reading the database. Tokens
+don't expire; they are printed ahead of the event with the
+generate_checkin_tokens command.
+
+Scans are folded into the Attendance row of (event, participant):
+- a check-in marks the participant present and keeps the earliest and the
+  latest check-in time;
+- a check-out keeps the latest check-out time.
+
+Every field only moves to a minimum or a maximum, so the row doesn't depend
+on the order scans arrive in. A participant is inside while their latest
+check-in is later than their latest check-out, which covers re-entry.
+Replaying a scan (as a device re-uploading a batch does) changes nothing
+and costs one read and no write; a live re-scan only moves the latest
+check-in forward. Rows are written with one upserting bulk_create on the
+(event, participant) key, so two volunteers scanning the same newcomer
+can't collide on the insert. Committed scans also adjust the
+live occupancy counters (see tracking/occupancy.py).
+
+Devices that scanned offline upload their scans later with sync_scans. A
+batch is folded the same way, in device-time order, in one transaction.
+"""
+from datetime import timedelta
+
+from django.core import signing
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import EventRegistration
+from events.stats import bump_event_stats
+from .models import Attendance
+from .occupancy import apply_occupancy_changes, is_inside
+
+CHECKIN_SALT = 'tracking.checkin'
+CHECK_IN, CHECK_OUT = 'in', 'out'
+SCAN_ACTIONS = (CHECK_IN, CHECK_OUT)
+SCAN_FIELDS = ('is_present', 'check_in_time', 'last_check_in_time', 'check_out_time')
+MAX_SYNC_RECORDS = 10000
+CLOCK_SKEW = timedelta(minutes=5)  # device clocks may run this far ahead
+
+_signer = signing.Signer(salt=CHECKIN_SALT)
+
+
+def make_checkin_token(event_id, participant_id):
+    return _signer.sign(f'{event_id}.{participant_id}')
+
+
+def read_checkin_token(token):
+    """Returns (event_id, participant_id) for a valid token, or None."""
+    try:
+        event_id, participant_id = _signer.unsign(token.strip()).split('.')
+        return int(event_id), int(participant_id)
+    except (signing.BadSignature, ValueError, AttributeError):
+        return None
+
+
+def apply_scan(attendance, action, when):
+    """Folds one scan into an Attendance instance. Returns True if anything changed."""
+    before = tuple(getattr(attendance, field) for field in SCAN_FIELDS)
+    attendance.is_present = True
+    if action == CHECK_IN:
+        if attendance.check_in_time is None or when < attendance.check_in_time:
+            attendance.check_in_time = when
+        if attendance.last_check_in_time is None or when > attendance.last_check_in_time:
+            attendance.last_check_in_time = when
+    elif attendance.check_out_time is None or when > attendance.check_out_time:
+        attendance.check_out_time = when
+    return before != tuple(getattr(attendance, field) for field in SCAN_FIELDS)
+
+
+def record_scans(event_id, scans):
+    """
+    Applies (participant_id, action, when) scans for one event in a single
+    transaction, oldest first. Reads the affected rows in one query and
+    writes the changed ones in one upsert. Returns [(attendance, changed)] in the order
+    of `scans`, where `changed` is False for scans that were already recorded.
+    """
+    scans = list(scans)
+    with transaction.atomic():
+        rows = {
+            attendance.participant_id: attendance
+            for attendance in Attendance.objects.select_for_update()
+            .filter(event_id=event_id, participant_id__in={participant_id for participant_id, _, _ in scans})
+        }
+        was_present = {participant_id: attendance.is_present for participant_id, attendance in rows.items()}
+        was_inside = {participant_id: is_inside(attendance) for participant_id, attendance in rows.items()}
+        results = [None] * len(scans)
+        changed = set()
+        # Device time, then check-ins before check-outs, so the order scans arrive in doesn't matter.
+        for i in sorted(range(len(scans)), key=lambda i: (scans[i][2], scans[i][1] == CHECK_OUT)):
+            participant_id, action, when = scans[i]
+            attendance = rows.get(participant_id)
+            if attendance is None:
+                attendance = rows[participant_id] = Attendance(event_id=event_id, participant_id=participant_id)
+            results[i] = (attendance, apply_scan(attendance, action, when))
+            if results[i][1]:
+                changed.add(participant_id)
+        if changed:
+            # MySQL upserts on any unique key and rejects an explicit target.
+            unique_fields = ['event', 'participant'] if connection.features.supports_update_conflicts_with_target else None
+            # Fresh rows without a pk, so existing ones conflict on (event, participant) and are updated.
+            fresh = [
+                Attendance(event_id=event_id, participant_id=participant_id,
+                           **{field: getattr(rows[participant_id], field) for field in SCAN_FIELDS})
+                for participant_id in changed
+            ]
+            Attendance.objects.bulk_create(fresh, update_conflicts=True, update_fields=SCAN_FIELDS, unique_fields=unique_fields)
+            newly_present = sum(1 for participant_id in changed if not was_present.get(participant_id, False))
+            bump_event_stats(event_id, attendance_present=newly_present)
+            inside = sum(is_inside(rows[participant_id]) - was_inside.get(participant_id, False) for participant_id in changed)
+            transaction.on_commit(lambda: apply_occupancy_changes(event_id, inside=inside, checked_in=newly_present))
+    return results
+
+
+def _parse_sync_record(event_id, record, now):
+    """(participant_id, action, when) for one uploaded record. Raises ValueError with the reason it is rejected."""
+    if not isinstance(record, dict):
+        raise ValueError("Not an object.")
+    scanned = read_checkin_token(record.get('token'))
+    if scanned is None:
+        raise ValueError("Invalid check-in code.")
+    if scanned[0] != event_id:
+        raise ValueError("This code is for a different event.")
+    action = record.get('action', CHECK_IN)
+    if action not in SCAN_ACTIONS:
+        raise ValueError(f"Unknown action '{action}'.")
+    try:
+        when = parse_datetime(record.get('timestamp'))
+    except (TypeError, ValueError):
+        when = None
+    if when is None:
+        raise ValueError("Missing or invalid timestamp.")
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    if when > now + CLOCK_SKEW:
+        raise ValueError("Timestamp is in the future.")
+    return scanned[1], action, when
+
+
+def sync_scans(event_id, records):
+    """
+    Applies a batch of scans recorded offline by a volunteer device. Each
+    record is {'id': device record id, 'token', 'action', 'timestamp' (ISO
+    8601 device time)}. Valid records are applied together by record_scans;
+    since scans fold into minimums and maximums, the outcome doesn't depend
+    on the order devices upload in, or on how the scans are split into
+    batches. Returns one
+    {'id', 'status', ...} per record: 'applied', 'duplicate' (already
+    recorded) or 'rejected' with an 'error'.
+    """
+    now = timezone.now()
+    results, scans, positions = [], [], []
+    for record in records:
+        record_id = record.get('id') if isinstance(record, dict) else None
+        try:
+            scan = _parse_sync_record(event_id, record, now)
+        except ValueError as e:
+            results.append({'id': record_id, 'status': 'rejected', 'error': str(e)})
+            continue
+        positions.append(len(results))
+        results.append({'id': record_id, 'participant': scan[0]})
+        scans.append(scan)
+    for position, (_, changed) in zip(positions, record_scans(event_id, scans) if scans else ()):
+        results[position]['status'] = 'applied' if changed else 'duplicate'
+    return results
+
+
+def checkin_token_rows(event_id):
+    """(participant id, username, full name, token) for everyone registered for the event."""
+    rows = (
+        EventRegistration.objects.filter(event_id=event_id, status='registered')
+        .values_list('participant_id', 'participant__username', 'participant__first_name', 'participant__last_name')
+        .order_by('participant__last_name', 'participant__first_name', 'participant_id')
+    )
+    for participant_id, username, first_name, last_name in rows.iterator(chunk_size=2000):
+        yield participant_id, username, f'{first_name} {last_name}'.strip(), make_checkin_token(event_id, participant_id)
@@ -0,0 +1,38 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event
+from tracking.checkin import checkin_token_rows
+
+TOKEN_COLUMNS = ('participant_id', 'username', 'name', 'token')
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the signed check-in token of every participant registered for an event as CSV ("
+        + ", ".join(TOKEN_COLUMNS) + "), for printing on badges as QR codes or mailing out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument('--output', help="CSV file to write (default: standard output).")
+
+    def handle(self, *args, **options):
+        if not Event.objects.filter(pk=options['event_id']).exists():
+            raise CommandError(f"Event {options['event_id']} does not exist.")
+
+        started = time.perf_counter()
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else self.stdout
+        try:
+            writer = csv.writer(out)
+            writer.writerow(TOKEN_COLUMNS)
+            count = 0
+            for row in checkin_token_rows(options['event_id']):
+                writer.writerow(row)
+                count += 1
+        finally:
+            if out is not self.stdout:
+                out.close()
+        self.stderr.write(self.style.SUCCESS(f"Wrote {count} check-in token(s) in {time.perf_counter() - started:.1f}s."))
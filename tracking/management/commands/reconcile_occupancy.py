@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from tracking.occupancy import reconcile_occupancy
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts the cached live occupancy counters from Attendance. Run it every few minutes "
+        "during physical and hybrid events."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='*', type=int, help="Only these events (default: those running or starting within a day).")
+
+    def handle(self, *args, **options):
+        figures = reconcile_occupancy(options['event_ids'] or None)
+        for event_id, counts in sorted(figures.items()):
+            self.stdout.write(f"  event {event_id}: {counts['inside']} inside, {counts['checked_in']} checked in, {counts['no_show']} no-show")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled occupancy for {len(figures)} event(s)."))
@@ -7,6 +7,7 @@ class Attendance(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='attendance_records')
     participant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='attendance')
     check_in_time = models.DateTimeField(null=True, blank=True)
+    last_check_in_time = models.DateTimeField(null=True, blank=True, help_text="Latest check-in; later than the check-out after a re-entry")
     check_out_time = models.DateTimeField(null=True, blank=True)
     is_present = models.BooleanField(default=False, help_text="Mark if the participant was present")
 
@@ -0,0 +1,127 @@
+"""
+Live venue occupancy for physical and hybrid events: how many participants
+are inside right now, how many have checked in, and how many registered
+participants haven't shown up.
+
+The figures are kept in the cache as one counter per figure and event. Door
+scans (tracking.checkin.record_scans) adjust them with atomic cache.incr
+once their transaction commits, so the organizers' polling endpoint reads
+three cache keys and never aggregates Attendance.
+
+Counters are only kept for events someone has looked at, and they can drift
+when a key is evicted or rows change outside the scanners (admin edits,
+imports, registrations). reconcile_occupancy recounts from the database in
+three queries and overwrites the counters. It runs on a cache miss, after
+admin edits and imports of a tracked event, and periodically from the
+reconcile_occupancy management command.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from accounts.models import EventRegistration
+from events.models import Event
+from .models import Attendance
+
+OCCUPANCY_MODES = ('physical', 'hybrid')
+OCCUPANCY_TIMEOUT = 60 * 60 * 24
+LIVE_WINDOW = timedelta(days=1)  # events starting this soon are reconciled too
+
+
+def is_inside(attendance):
+    """Checked in, and not checked out since. Rows edited by hand may lack last_check_in_time."""
+    latest = attendance.last_check_in_time or attendance.check_in_time
+    return latest is not None and (attendance.check_out_time is None or latest > attendance.check_out_time)
+
+
+# is_inside as a filter on Attendance.
+INSIDE = Q(check_in_time__isnull=False) & (
+    Q(check_out_time__isnull=True)
+    | Q(last_check_in_time__gt=F('check_out_time'))
+    | Q(last_check_in_time__isnull=True, check_in_time__gt=F('check_out_time'))
+)
+
+
+def _keys(event_id):
+    return {figure: f'occupancy:{event_id}:{figure}' for figure in ('inside', 'checked_in', 'info')}
+
+
+def _figures(inside, checked_in, info):
+    return {
+        'inside': inside,
+        'checked_in': checked_in,
+        'registered': info['registered'],
+        'no_show': max(info['registered'] - checked_in, 0),
+        'reconciled_at': info['reconciled_at'],
+    }
+
+
+def apply_occupancy_changes(event_id, inside=0, checked_in=0):
+    """Adjusts a tracked event's counters; untracked events are recounted on their next read."""
+    keys = _keys(event_id)
+    for figure, delta in (('inside', inside), ('checked_in', checked_in)):
+        if delta:
+            try:
+                cache.incr(keys[figure], delta)
+            except ValueError:
+                pass
+
+
+def reconcile_occupancy(event_ids=None):
+    """
+    Recounts occupancy from the database and overwrites the cached counters.
+    Defaults to the physical and hybrid events that are running or about to
+    start. Returns {event_id: figures} for the events counted.
+    """
+    events = Event.objects.filter(event_mode__in=OCCUPANCY_MODES)
+    if event_ids is None:
+        now = timezone.now()
+        events = events.filter(event_start__lte=now + LIVE_WINDOW, event_end__gte=now)
+    else:
+        events = events.filter(pk__in=event_ids)
+    event_ids = list(events.values_list('pk', flat=True))
+    if not event_ids:
+        return {}
+
+    counts = {
+        row['event_id']: row
+        for row in Attendance.objects.filter(event_id__in=event_ids).order_by().values('event_id').annotate(
+            checked_in=Count('pk', filter=Q(is_present=True)),
+            inside=Count('pk', filter=INSIDE),
+        )
+    }
+    registered = dict(
+        EventRegistration.objects.filter(event_id__in=event_ids, status='registered').order_by()
+        .values('event_id').annotate(count=Count('pk')).values_list('event_id', 'count')
+    )
+
+    reconciled_at = timezone.now().isoformat()
+    figures, values = {}, {}
+    for event_id in event_ids:
+        row = counts.get(event_id, {})
+        keys = _keys(event_id)
+        info = {'registered': registered.get(event_id, 0), 'reconciled_at': reconciled_at}
+        values.update({keys['inside']: row.get('inside', 0), keys['checked_in']: row.get('checked_in', 0), keys['info']: info})
+        figures[event_id] = _figures(row.get('inside', 0), row.get('checked_in', 0), info)
+    cache.set_many(values, OCCUPANCY_TIMEOUT)
+    return figures
+
+
+def refresh_occupancy_if_tracked(event_id):
+    """Recounts an event whose counters are in the cache; others wait for their first read."""
+    if cache.get(_keys(event_id)['info']) is not None:
+        reconcile_occupancy([event_id])
+
+
+def get_occupancy(event_id):
+    """
+    The event's figures from the cache, recounting only on a miss. None for
+    events that aren't physical or hybrid.
+    """
+    keys = _keys(event_id)
+    cached = cache.get_many(keys.values())
+    if len(cached) < len(keys):
+        return reconcile_occupancy([event_id]).get(event_id)
+    return _figures(cached[keys['inside']], cached[keys['checked_in']], cached[keys['info']])
@@ -0,0 +1,35 @@
+from collections import Counter
+
+from django.db import transaction
+from import_export import fields
+from import_export.widgets import ForeignKeyWidget
+
+from accounts.models import User
+from campusinnovate.chunked_import_export import ChunkedModelResource
+from events.stats import bump_event_stats
+from .models import Attendance
+from .occupancy import refresh_occupancy_if_tracked
+
+
+class AttendanceResource(ChunkedModelResource):
+    """One row per event and participant; participants are given by username."""
+    participant = fields.Field(attribute='participant', column_name='participant', widget=ForeignKeyWidget(User, 'username'))
+
+    class Meta:
+        model = Attendance
+        fields = ('event', 'participant', 'is_present', 'check_in_time', 'check_out_time')
+        export_order = fields
+        import_id_fields = ('event', 'participant')
+
+    def after_bulk_save(self, created, updated, **kwargs):
+        # Bulk writes skip the Attendance signals; see bump_event_stats and tracking/signals.py.
+        present = Counter()
+        for attendance in created:
+            present[attendance.event_id] += attendance.is_present
+        for attendance, changes in updated:
+            if 'is_present' in changes:
+                present[attendance.event_id] += 1 if attendance.is_present else -1
+        for event_id, delta in present.items():
+            bump_event_stats(event_id, attendance_present=delta)
+        for event_id in {attendance.event_id for attendance in created} | {attendance.event_id for attendance, _ in updated}:
+            transaction.on_commit(lambda event_id=event_id: refresh_occupancy_if_tracked(event_id))
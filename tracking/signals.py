@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Attendance
+from .occupancy import refresh_occupancy_if_tracked
+
+
+# Scans adjust the occupancy counters themselves (see checkin.record_scans);
+# other Attendance changes, such as admin edits, recount the event once committed.
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_occupancy_for_attendance(sender, instance, **kwargs):
+    event_id = instance.event_id
+    transaction.on_commit(lambda: refresh_occupancy_if_tracked(event_id))
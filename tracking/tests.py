@@ -1,3 +1,389 @@
-from django.test import TestCase
+import io
+import json
+import os
+import time
+import unittest
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import EventRegistration, User
+from campusinnovate.chunked_import_export import export_lines, import_rows
+from campusinnovate.testing import make_event
+from events.models import EventStaff, EventStats
+from .checkin import CHECK_IN, CHECK_OUT, make_checkin_token, read_checkin_token, record_scans
+from .models import Attendance
+from .occupancy import get_occupancy, is_inside, reconcile_occupancy
+from .resources import AttendanceResource
+
+# Benchmarks are slow and print timings; run them with
+#   CAMPUSINNOVATE_BENCHMARKS=1 python manage.py test
+RUN_BENCHMARKS = bool(os.environ.get('CAMPUSINNOVATE_BENCHMARKS'))
+
+
+
+def attendance_row(event, username, present):
+    return {'event': str(event.pk), 'participant': username, 'is_present': '1' if present else '0',
+            'check_in_time': '', 'check_out_time': ''}
+
+
+class AttendanceChunkedImportExportTests(TestCase):
+    def setUp(self):
+        self.event = make_event()
+        self.users = User.objects.bulk_create([User(username=f'student{i}', first_name=f'S{i:03d}') for i in range(10)])
+        Attendance.objects.create(event=self.event, participant=User.objects.get(username='student0'), is_present=True)
+
+    def present(self):
+        return EventStats.objects.get(event=self.event).attendance_present
+
+    def test_import_matches_usernames_and_keeps_stats_in_step(self):
+        self.assertEqual(self.present(), 1)
+        rows = [attendance_row(self.event, f'student{i}', present=i % 2 == 1) for i in range(10)]
+        rows.append(attendance_row(self.event, 'nobody', present=True))
+
+        dry_run = import_rows(AttendanceResource(), rows, dry_run=True, chunk_size=4)
+        self.assertEqual((dry_run.new, dry_run.updated), (9, 1))
+        self.assertEqual(dry_run.errors, [(12, "No user matches 'nobody'")])
+        self.assertEqual(Attendance.objects.count(), 1)
+
+        result = import_rows(AttendanceResource(), rows, chunk_size=4)
+        self.assertEqual((result.new, result.updated), (9, 1))
+        self.assertEqual(Attendance.objects.filter(is_present=True).count(), 5)
+        # student0 was marked absent, five odd students present.
+        self.assertEqual(self.present(), 5)
+
+    def test_stream_export_costs_one_query_per_chunk(self):
+        Attendance.objects.bulk_create([Attendance(event=self.event, participant=user) for user in self.users[1:]])
+        resource = AttendanceResource()
+        with self.assertNumQueries(1):
+            lines = list(export_lines(resource, Attendance.objects.all()))
+        self.assertEqual(lines[0], 'event,participant,is_present,check_in_time,check_out_time\r\n')
+        self.assertEqual(lines[1], f'{self.event.pk},student0,1,,\r\n')
+        self.assertEqual(len(lines), 11)
+
+
+class CheckInScanTests(TestCase):
+    def setUp(self):
+        self.event = make_event()
+        self.volunteer = User.objects.create(username='volunteer')
+        EventStaff.objects.create(event=self.event, user=self.volunteer, role='Door Volunteer')
+        self.student = User.objects.create(username='student', first_name='Ada', last_name='Lovelace')
+        self.url = reverse('check_in_scan', args=[self.event.pk])
+
+    def scan(self, participant_id=None, action=CHECK_IN, event_id=None):
+        token = make_checkin_token(event_id or self.event.pk, participant_id or self.student.pk)
+        return self.client.post(self.url, {'token': token, 'action': action})
+
+    def test_tokens_are_signed(self):
+        token = make_checkin_token(self.event.pk, self.student.pk)
+        self.assertEqual(read_checkin_token(token), (self.event.pk, self.student.pk))
+        self.assertIsNone(read_checkin_token(token.replace(f'.{self.student.pk}:', f'.{self.volunteer.pk}:')))
+        self.assertIsNone(read_checkin_token('garbage'))
+
+    def test_scans_keep_stats_in_step(self):
+        self.client.force_login(self.volunteer)
+        response = self.scan()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['recorded'])
+        attendance = Attendance.objects.get(event=self.event, participant=self.student)
+        self.assertTrue(attendance.is_present)
+        self.assertEqual(EventStats.objects.get(event=self.event).attendance_present, 1)
+
+        self.scan()  # a second scan at the door keeps the first check-in time
+        self.assertEqual(Attendance.objects.get(pk=attendance.pk).check_in_time, attendance.check_in_time)
+
+        self.assertTrue(self.scan(action=CHECK_OUT).json()['recorded'])
+        self.assertIsNotNone(Attendance.objects.get(pk=attendance.pk).check_out_time)
+        self.assertTrue(self.scan().json()['inside'])  # re-entry
+        attendance.refresh_from_db()
+        self.assertTrue(is_inside(attendance))
+        self.assertEqual(EventStats.objects.get(event=self.event).attendance_present, 1)
+
+    def test_scans_fold_in_time_order(self):
+        now = timezone.now()
+        record_scans(self.event.pk, [
+            (self.student.pk, CHECK_OUT, now + timedelta(hours=3)),
+            (self.student.pk, CHECK_IN, now + timedelta(hours=1)),
+            (self.student.pk, CHECK_IN, now),
+        ])
+        attendance = Attendance.objects.get(event=self.event, participant=self.student)
+        self.assertEqual((attendance.check_in_time, attendance.check_out_time), (now, now + timedelta(hours=3)))
+        self.assertFalse(is_inside(attendance))
+        [(_, changed)] = record_scans(self.event.pk, [(self.student.pk, CHECK_IN, now + timedelta(hours=1))])
+        self.assertFalse(changed)  # replayed scans change nothing
+
+    def test_rejects_bad_scans(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.scan().status_code, 403)
+        self.client.force_login(self.volunteer)
+        self.assertEqual(self.scan(event_id=self.event.pk + 1).status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'token': 'forged:token'}).status_code, 400)
+        self.assertEqual(self.scan(action='sideways').status_code, 400)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_generate_checkin_tokens_command(self):
+        EventRegistration.objects.create(event=self.event, participant=self.student)
+        out = io.StringIO()
+        call_command('generate_checkin_tokens', self.event.pk, stdout=out, stderr=io.StringIO())
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'participant_id,username,name,token')
+        participant_id, username, name, token = lines[1].split(',')
+        self.assertEqual((username, name), ('student', 'Ada Lovelace'))
+        self.assertEqual(read_checkin_token(token), (self.event.pk, self.student.pk))
+
+
+def sync_record(record_id, event, participant, action, when):
+    return {'id': record_id, 'token': make_checkin_token(event.pk, participant.pk), 'action': action, 'timestamp': when.isoformat()}
+
+
+class CheckInSyncTests(TestCase):
+    def setUp(self):
+        self.event = make_event()
+        self.volunteer = User.objects.create(username='volunteer')
+        EventStaff.objects.create(event=self.event, user=self.volunteer, role='Volunteer')
+        self.students = User.objects.bulk_create([User(username=f'student{i}') for i in range(3)])
+        self.url = reverse('check_in_sync', args=[self.event.pk])
+        self.start = timezone.now() - timedelta(hours=6)
+
+    def at(self, hours):
+        return self.start + timedelta(hours=hours)
+
+    def upload(self, records):
+        return self.client.post(self.url, json.dumps(records), content_type='application/json')
+
+    def test_batch_applies_in_device_time_order(self):
+        first, second, third = self.students
+        records = [
+            sync_record('a1', self.event, first, CHECK_OUT, self.at(4)),
+            sync_record('a2', self.event, first, CHECK_IN, self.at(1)),
+            sync_record('b1', self.event, first, CHECK_IN, self.at(1)),       # same scan from a second device
+            sync_record('b2', self.event, first, CHECK_OUT, self.at(3)),
+            sync_record('b3', self.event, second, CHECK_IN, self.at(1)),
+            sync_record('b4', self.event, second, CHECK_IN, self.at(1)),      # double scan
+            sync_record('c1', self.event, third, 'sideways', self.at(1)),
+            sync_record('c2', make_event(), third, CHECK_IN, self.at(1)),
+            sync_record('c3', self.event, third, CHECK_IN, timezone.now() + timedelta(hours=1)),
+            {'id': 'c4', 'token': make_checkin_token(self.event.pk, third.pk), 'timestamp': 'yesterday'},
+            'not a scan',
+        ]
+        self.client.force_login(self.volunteer)
+        response = self.upload(records).json()
+
+        self.assertEqual((response['applied'], response['duplicate'], response['rejected']), (4, 2, 5))
+        self.assertEqual([result['status'] for result in response['results'][4:6]], ['applied', 'duplicate'])
+        self.assertEqual(response['results'][7], {'id': 'c2', 'status': 'rejected', 'error': "This code is for a different event."})
+
+        attendance = Attendance.objects.get(event=self.event, participant=first)
+        self.assertEqual((attendance.check_in_time, attendance.check_out_time), (self.at(1), self.at(4)))
+        self.assertFalse(Attendance.objects.filter(participant=third).exists())
+        self.assertEqual(EventStats.objects.get(event=self.event).attendance_present, 2)
+
+        # Replaying the same scans, in any order, changes nothing.
+        response = self.upload(records[::-1]).json()
+        self.assertEqual((response['applied'], response['duplicate']), (0, 6))
+        attendance.refresh_from_db()
+        self.assertEqual((attendance.check_in_time, attendance.check_out_time), (self.at(1), self.at(4)))
+
+    def test_outcome_does_not_depend_on_how_uploads_are_split(self):
+        first = self.students[0]
+        check_in, check_out, re_entry = (
+            sync_record('in', self.event, first, CHECK_IN, self.at(2)),
+            sync_record('out', self.event, first, CHECK_OUT, self.at(3)),
+            sync_record('again', self.event, first, CHECK_IN, self.at(4)),
+        )
+        self.client.force_login(self.volunteer)
+        outcomes = []
+        for uploads in ([[check_in, check_out], [re_entry]], [[check_in, re_entry], [check_out]], [[re_entry], [check_out, check_in]]):
+            Attendance.objects.all().delete()
+            for records in uploads:
+                self.upload(records)
+            attendance = Attendance.objects.get(event=self.event, participant=first)
+            outcomes.append((attendance.check_in_time, attendance.last_check_in_time, attendance.check_out_time, is_inside(attendance)))
+        self.assertEqual(outcomes, [(self.at(2), self.at(4), self.at(3), True)] * 3)
+
+    def test_rejects_bad_uploads(self):
+        self.client.force_login(self.volunteer)
+        self.assertEqual(self.client.post(self.url, 'nope', content_type='application/json').status_code, 400)
+        self.assertEqual(self.upload({'token': 'x'}).status_code, 400)
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.upload([]).status_code, 403)
+
+
+class OccupancyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = make_event(event_end=timezone.now() + timedelta(hours=8))
+        self.volunteer = User.objects.create(username='volunteer', is_staff=True)
+        EventStaff.objects.create(event=self.event, user=self.volunteer, role='Volunteer')
+        self.students = User.objects.bulk_create([User(username=f'student{i}') for i in range(3)])
+        EventRegistration.objects.bulk_create([EventRegistration(event=self.event, participant=s) for s in self.students])
+        self.url = reverse('event_occupancy', args=[self.event.pk])
+
+    def figures(self):
+        return {figure: value for figure, value in get_occupancy(self.event.pk).items() if figure != 'reconciled_at'}
+
+    def scan(self, student, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_scans(self.event.pk, [(student.pk, action, timezone.now())])
+
+    def test_scans_update_the_cached_counters(self):
+        self.client.force_login(self.volunteer)
+        response = self.client.get(self.url)  # first read recounts from the database
+        self.assertEqual(response.json()['no_show'], 3)
+
+        first, second, third = self.students
+        self.scan(first, CHECK_IN)
+        self.scan(second, CHECK_IN)
+        self.scan(second, CHECK_IN)
+        self.scan(first, CHECK_OUT)
+        with self.assertNumQueries(0):
+            figures = self.figures()
+        self.assertEqual(figures, {'inside': 1, 'checked_in': 2, 'registered': 3, 'no_show': 1})
+
+        self.scan(first, CHECK_IN)  # re-entry
+        self.assertEqual(self.figures()['inside'], 2)
+
+        # Changes outside the scanners recount a tracked event once committed.
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(event=self.event, participant=third, is_present=True, check_in_time=timezone.now())
+        self.assertEqual(self.figures(), {'inside': 3, 'checked_in': 3, 'registered': 3, 'no_show': 0})
+
+    def test_reconciliation_corrects_drift(self):
+        get_occupancy(self.event.pk)
+        self.scan(self.students[0], CHECK_IN)
+        cache.set(f'occupancy:{self.event.pk}:inside', 42)
+        out = io.StringIO()
+        call_command('reconcile_occupancy', stdout=out)
+        self.assertIn('Reconciled occupancy for 1 event(s).', out.getvalue())
+        self.assertEqual(self.figures()['inside'], 1)
+
+    def test_only_physical_and_hybrid_events_for_their_staff(self):
+        virtual = make_event(event_mode='virtual')
+        EventStaff.objects.create(event=virtual, user=self.volunteer, role='Volunteer')
+        self.assertEqual(reconcile_occupancy([virtual.pk]), {})
+        self.client.force_login(self.volunteer)
+        self.assertEqual(self.client.get(reverse('event_occupancy', args=[virtual.pk])).status_code, 404)
+
+        response = self.client.get(reverse('event_manager_dashboard'))
+        self.assertContains(response, f'data-occupancy-url="{self.url}"')
+        self.assertNotContains(response, reverse('event_occupancy', args=[virtual.pk]))
+
+        self.client.force_login(self.students[0])
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class AttendanceImportExportBenchmark(TestCase):
+    PARTICIPANTS = 30000
+
+    def test_chunked_import_and_stream_export(self):
+        event = make_event()
+        User.objects.bulk_create([User(username=f'student{i}') for i in range(self.PARTICIPANTS)], batch_size=5000)
+        rows = [attendance_row(event, f'student{i}', present=i % 3 == 0) for i in range(self.PARTICIPANTS)]
+
+        started = time.perf_counter()
+        result = import_rows(AttendanceResource(), rows)
+        imported = time.perf_counter() - started
+        self.assertEqual(result.new, self.PARTICIPANTS)
+
+        started = time.perf_counter()
+        lines = sum(1 for _ in export_lines(AttendanceResource(), Attendance.objects.all()))
+        exported = time.perf_counter() - started
+        self.assertEqual(lines, self.PARTICIPANTS + 1)
+        print(f"\nattendance ({connections['default'].vendor}): {self.PARTICIPANTS} rows imported in {imported:.1f}s, "
+              f"exported in {exported:.1f}s")
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class CheckInScanBenchmark(TransactionTestCase):
+    """Serial scans through one client with real commits; each server worker adds as much again."""
+    PARTICIPANTS = 2000
+
+    def test_scan_throughput(self):
+        event = make_event()
+        volunteer = User.objects.create(username='volunteer')
+        EventStaff.objects.create(event=event, user=volunteer, role='Volunteer')
+        students = User.objects.bulk_create([User(username=f'student{i}') for i in range(self.PARTICIPANTS)])
+        EventRegistration.objects.bulk_create([EventRegistration(event=event, participant=student) for student in students])
+
+        started = time.perf_counter()
+        out = io.StringIO()
+        call_command('generate_checkin_tokens', event.pk, stdout=out, stderr=io.StringIO())
+        tokens = [line.rsplit(',', 1)[1] for line in out.getvalue().splitlines()[1:]]
+        generated = time.perf_counter() - started
+
+        self.client.force_login(volunteer)
+        url = reverse('check_in_scan', args=[event.pk])
+        started = time.perf_counter()
+        for token in tokens:
+            self.assertEqual(self.client.post(url, {'token': token}).status_code, 200)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(Attendance.objects.filter(event=event, is_present=True).count(), self.PARTICIPANTS)
+        started = time.perf_counter()
+        for token in tokens:
+            self.assertTrue(self.client.post(url, {'token': token}).json()['inside'])
+        repeated = time.perf_counter() - started
+        print(f"\ncheck-in ({connections['default'].vendor}): {self.PARTICIPANTS} tokens generated in {generated:.2f}s; "
+              f"{self.PARTICIPANTS / elapsed:.0f} first scans/s, {self.PARTICIPANTS / repeated:.0f} repeat scans/s")
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class CheckInSyncBenchmark(TransactionTestCase):
+    RECORDS = 5000
+
+    def test_batch_sync(self):
+        event = make_event()
+        volunteer = User.objects.create(username='volunteer')
+        EventStaff.objects.create(event=event, user=volunteer, role='Volunteer')
+        students = User.objects.bulk_create([User(username=f'student{i}') for i in range(self.RECORDS // 2)])
+        start = timezone.now() - timedelta(hours=8)
+        records = [sync_record(f'in{i}', event, student, CHECK_IN, start + timedelta(seconds=i)) for i, student in enumerate(students)]
+        records += [sync_record(f'out{i}', event, student, CHECK_OUT, start + timedelta(hours=4, seconds=i)) for i, student in enumerate(students)]
+        body = json.dumps(records)
+
+        self.client.force_login(volunteer)
+        url = reverse('check_in_sync', args=[event.pk])
+        started = time.perf_counter()
+        response = self.client.post(url, body, content_type='application/json').json()
+        elapsed = time.perf_counter() - started
+        self.assertEqual(response['applied'], self.RECORDS)
+        started = time.perf_counter()
+        replay = self.client.post(url, body, content_type='application/json').json()
+        replayed = time.perf_counter() - started
+        self.assertEqual(replay['duplicate'], self.RECORDS)
+        print(f"\ncheck-in sync ({connections['default'].vendor}): {self.RECORDS} records applied in {elapsed * 1000:.0f}ms, "
+              f"replayed in {replayed * 1000:.0f}ms")
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set CAMPUSINNOVATE_BENCHMARKS=1 to run benchmarks")
+class OccupancyBenchmark(TestCase):
+    PARTICIPANTS = 30000
+    READS = 1000
+
+    def test_cached_read_vs_recount(self):
+        cache.clear()
+        event = make_event(event_end=timezone.now() + timedelta(hours=8))
+        students = User.objects.bulk_create([User(username=f'student{i}') for i in range(self.PARTICIPANTS)], batch_size=5000)
+        now = timezone.now()
+        Attendance.objects.bulk_create([
+            Attendance(event=event, participant=student, is_present=True, check_in_time=now,
+                       check_out_time=now if i % 4 == 0 else None)
+            for i, student in enumerate(students)
+        ], batch_size=5000)
+
+        started = time.perf_counter()
+        figures = reconcile_occupancy([event.pk])[event.pk]
+        recount = time.perf_counter() - started
+        self.assertEqual(figures['inside'], self.PARTICIPANTS * 3 // 4)
+
+        started = time.perf_counter()
+        for _ in range(self.READS):
+            get_occupancy(event.pk)
+        cached = (time.perf_counter() - started) / self.READS
+        print(f"\noccupancy ({connections['default'].vendor}, {self.PARTICIPANTS} attendance rows): "
+              f"recount {recount * 1000:.1f}ms, cached read {cached * 1e6:.0f}us")
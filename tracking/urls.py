@@ -5,4 +5,10 @@ urlpatterns = [
     # URL for a participant to submit feedback for a specific event
     # e.g., /tracking/event/1/feedback/
     path('event/<int:event_id>/feedback/', views.submit_feedback_view, name='submit_feedback'),
+    # Door scanners POST a participant's QR token here
+    path('event/<int:event_id>/checkin/', views.check_in_scan_view, name='check_in_scan'),
+    # Volunteer devices upload scans recorded offline here
+    path('event/<int:event_id>/checkin/sync/', views.check_in_sync_view, name='check_in_sync'),
+    # Live "inside / checked in / no-show" figures, polled by the staff dashboard
+    path('event/<int:event_id>/occupancy/', views.occupancy_view, name='event_occupancy'),
 ]
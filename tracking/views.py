@@ -1,20 +1,31 @@
+import json
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import Http404, JsonResponse
 from django.utils import timezone
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET, require_POST
 from .models import Feedback
-from events.models import Event, EventRegistration
+from events.context import get_event_context
+from events.roles import has_event_role
+from .checkin import CHECK_IN, MAX_SYNC_RECORDS, SCAN_ACTIONS, read_checkin_token, record_scans, sync_scans
 from .forms import FeedbackForm
+from .occupancy import get_occupancy, is_inside
+
+CHECKIN_ROLES = ('volunteer', 'manager')
 
 @login_required
 def submit_feedback_view(request, event_id):
     """
     Allows a participant to submit feedback for an event they were registered for.
     """
-    event = get_object_or_404(Event, pk=event_id)
+    access = get_event_context(request, event_id)
+    event = access.event
 
     # Security Check 1: User must have been registered for the event.
-    if not EventRegistration.objects.filter(participant=request.user, event=event).exists():
+    if not access.is_registered:
         messages.error(request, "You can only provide feedback for events you were registered for.")
         return redirect('participant_dashboard')
 
@@ -46,3 +57,76 @@ def submit_feedback_view(request, event_id):
         'event': event,
     }
     return render(request, 'tracking/feedback_form.html', context)
+
+
+@login_required
+@require_POST
+def check_in_scan_view(request, event_id):
+    """
+    Records one scanned QR token for the door. POST `token` and `action`
+    ('in' or 'out', default 'in'); answers JSON for the scanner. The token is
+    verified without touching the database.
+    """
+    if not has_event_role(request.user, event_id, *CHECKIN_ROLES):
+        return JsonResponse({'error': "You are not on this event's check-in staff."}, status=403)
+    action = request.POST.get('action', CHECK_IN)
+    if action not in SCAN_ACTIONS:
+        return JsonResponse({'error': f"Unknown action '{action}'."}, status=400)
+    scanned = read_checkin_token(request.POST.get('token', ''))
+    if scanned is None:
+        return JsonResponse({'error': "Invalid check-in code."}, status=400)
+    token_event_id, participant_id = scanned
+    if token_event_id != event_id:
+        return JsonResponse({'error': "This code is for a different event."}, status=400)
+
+    [(attendance, recorded)] = record_scans(event_id, [(participant_id, action, timezone.now())])
+    return JsonResponse({
+        'participant': participant_id,
+        'action': action,
+        'recorded': recorded,  # False if the scan changed nothing
+        'check_in_time': attendance.check_in_time,
+        'check_out_time': attendance.check_out_time,
+        'inside': is_inside(attendance),
+    })
+
+
+@login_required
+@require_POST
+def check_in_sync_view(request, event_id):
+    """
+    Uploads scans a volunteer device recorded offline: a JSON array of
+    {"id", "token", "action", "timestamp"} objects. Answers with one result
+    per record (see tracking.checkin.sync_scans).
+    """
+    if not has_event_role(request.user, event_id, *CHECKIN_ROLES):
+        return JsonResponse({'error': "You are not on this event's check-in staff."}, status=403)
+    try:
+        records = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': "Body must be a JSON array of scans."}, status=400)
+    if not isinstance(records, list):
+        return JsonResponse({'error': "Body must be a JSON array of scans."}, status=400)
+    if len(records) > MAX_SYNC_RECORDS:
+        return JsonResponse({'error': f"Upload at most {MAX_SYNC_RECORDS} scans at a time."}, status=400)
+
+    results = sync_scans(event_id, records)
+    counts = {status: 0 for status in ('applied', 'duplicate', 'rejected')}
+    for result in results:
+        counts[result['status']] += 1
+    return JsonResponse({**counts, 'results': results})
+
+
+@login_required
+@require_GET
+@never_cache
+def occupancy_view(request, event_id):
+    """
+    Live occupancy figures for a physical or hybrid event, polled by the staff
+    dashboard. Served from the cache counters (see tracking.occupancy).
+    """
+    if not has_event_role(request.user, event_id, *CHECKIN_ROLES):
+        return JsonResponse({'error': "You are not on this event's staff."}, status=403)
+    figures = get_occupancy(event_id)
+    if figures is None:
+        raise Http404("Occupancy is only tracked for physical and hybrid events.")
+    return JsonResponse(figures)